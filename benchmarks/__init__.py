@@ -0,0 +1,5 @@
+"""Performance benchmarks for the SLA dashboard.
+
+Each benchmark runs against a throwaway SQLite database selected through
+``DATABASE_URL`` before ``src.main`` is imported.
+"""
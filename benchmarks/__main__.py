@@ -0,0 +1,46 @@
+"""Run every benchmark and collect the results in one JSON document.
+
+Usage: python -m benchmarks [--tickets N] [--only NAME ...] [--output FILE]
+
+Each benchmark runs in its own process with its own throwaway database, so
+they do not share state or configuration.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.harness import write_results
+
+BENCHMARKS = ['import', 'endpoints', 'export', 'concurrent', 'executive_summary', 'startup']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='run just these benchmarks')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            command = [sys.executable, '-m', f'benchmarks.bench_{name}', '--tickets', str(args.tickets),
+                       '--output', output.name]
+            print(f'== {name}', file=sys.stderr, flush=True)
+            completed = subprocess.run(command, stdout=subprocess.DEVNULL, cwd=os.getcwd())
+            if completed.returncode != 0:
+                results[name] = {'error': f'exited with status {completed.returncode}'}
+                continue
+            result = json.load(output)
+            result.pop('environment', None)
+            results[name] = result
+
+    write_results({'tickets': args.tickets, 'benchmarks': results}, args.output)
+    return 0 if all('error' not in result for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Read latency while an import is writing.
+
+Usage: python -m benchmarks.bench_concurrent [--tickets N] [--import-tickets M] [--readers R] [--output FILE]
+
+Reader threads replay the frontend's request mix. They run first on an idle
+database (baseline) and then while ``import_tickets`` loads a batch of new
+tickets in another thread. The latency distributions are compared, and
+errors are counted, with "database is locked" errors separated out. Every
+thread shares one process and the GIL; benchmarks/load_test.py measures the
+same against real gunicorn workers.
+"""
+import argparse
+import itertools
+import sys
+import threading
+import time
+
+from benchmarks.harness import summarize, use_temp_database, write_results
+
+use_temp_database()
+
+from src.main import app  # noqa: E402
+from src.routes.data_extraction import import_tickets  # noqa: E402
+from benchmarks.bench_endpoints import ENDPOINTS  # noqa: E402
+from benchmarks.generator import TicketGenerator, seed_database  # noqa: E402
+
+
+class ReaderPool:
+    """Threads issuing the endpoint mix until stopped"""
+
+    def __init__(self, readers):
+        self.readers = readers
+        self.samples = []
+        self.errors = 0
+        self.lock_errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _read(self, offset):
+        client = app.test_client()
+        urls = itertools.cycle([url for _, url in ENDPOINTS[offset:] + ENDPOINTS[:offset]])
+        while not self._stop.is_set():
+            url = next(urls)
+            started = time.perf_counter()
+            try:
+                response = client.get(url)
+                failed = response.status_code != 200
+                locked = failed and 'locked' in response.get_data(as_text=True)
+            except Exception as e:
+                failed, locked = True, 'locked' in str(e)
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.samples.append(elapsed)
+                self.errors += failed
+                self.lock_errors += locked
+
+    def run_while(self, work):
+        threads = [threading.Thread(target=self._read, args=(index,)) for index in range(self.readers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            work()
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'seconds': round(elapsed, 2),
+            'requests': len(self.samples),
+            'requests_per_second': round(len(self.samples) / elapsed, 1),
+            'errors': self.errors,
+            'lock_errors': self.lock_errors,
+            'latency': summarize(self.samples)
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=100000, help='tickets present before the import')
+    parser.add_argument('--import-tickets', type=int, default=20000, help='new tickets written during the run')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--baseline-seconds', type=float, default=10)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    # New tickets for the import: a second stream with ids after the seeded ones
+    batch = list(TicketGenerator(args.import_tickets, seed=7, first_id=args.tickets + 1))
+
+    with app.app_context():
+        seed_database(args.tickets)
+
+    baseline = ReaderPool(args.readers).run_while(lambda: time.sleep(args.baseline_seconds))
+
+    import_stats = {}
+
+    def run_import():
+        with app.app_context():
+            started = time.perf_counter()
+            result = import_tickets(batch)
+            import_stats['seconds'] = round(time.perf_counter() - started, 2)
+            import_stats['imported'] = result['imported_tickets']
+
+    during_import = ReaderPool(args.readers).run_while(run_import)
+
+    write_results({
+        'benchmark': 'concurrent_reads',
+        'tickets': args.tickets,
+        'results': {
+            'readers': args.readers,
+            'import': import_stats,
+            'baseline': baseline,
+            'during_import': during_import
+        }
+    }, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
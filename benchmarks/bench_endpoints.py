@@ -0,0 +1,79 @@
+"""Latency, statements, payload size and memory of each dashboard endpoint.
+
+Usage: python -m benchmarks.bench_endpoints [--tickets N] [--repeat R] [--output FILE]
+
+Every endpoint the frontend calls is measured twice: once answered from the
+columnar analytics snapshot and once from SQL (``ANALYTICS_SNAPSHOT`` off).
+Endpoints that never use the snapshot report the same path in both modes.
+"""
+import argparse
+import sys
+
+from benchmarks.harness import StatementRecorder, peak_memory_kb, summarize, time_calls, use_temp_database, write_results
+
+use_temp_database()
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.services.ticket_snapshot import ticket_snapshots  # noqa: E402
+from benchmarks.generator import seed_database  # noqa: E402
+
+# (name, URL) in the order app.js loads them
+ENDPOINTS = [
+    ('sla_metrics', '/api/dashboard/sla-metrics'),
+    ('customer_segments', '/api/dashboard/customer-segments'),
+    ('trends', '/api/dashboard/trends'),
+    ('sla_metrics_wholesale', '/api/dashboard/sla-metrics?customer_type=wholesale'),
+    ('outages', '/api/dashboard/outages'),
+    ('executive_summary', '/api/dashboard/executive-summary'),
+    ('customers', '/api/extraction/customers'),
+    ('sla_definitions', '/api/extraction/sla-definitions'),
+    ('tickets', '/api/dashboard/tickets'),
+    ('tickets_search', '/api/dashboard/tickets?q=delivery+failed'),
+    ('tickets_tag_tier', '/api/dashboard/tickets?tag=sms&customer_tier=Gold')
+]
+
+
+def measure(client, name, url, repeat):
+    def run():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        return response
+
+    with StatementRecorder(db.engine) as recorder:
+        response = run()
+    return {
+        'endpoint': name,
+        'url': url,
+        'statements': len(recorder.statements),
+        'response_bytes': len(response.get_data()),
+        'peak_memory_kb': peak_memory_kb(run),
+        **summarize(time_calls(run, repeat))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    client = app.test_client()
+    results = []
+    with app.app_context():
+        seed_database(args.tickets)
+        for mode, snapshot in (('snapshot', True), ('sql', False)):
+            app.config['ANALYTICS_SNAPSHOT'] = snapshot
+            if snapshot:
+                ticket_snapshots.load()  # build outside the timed calls
+            for name, url in ENDPOINTS:
+                results.append({'mode': mode, **measure(client, name, url, args.repeat)})
+
+    write_results({'benchmark': 'endpoints', 'tickets': args.tickets, 'results': results}, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Compare the executive summary's query count and table scans.
+
+Usage: python -m benchmarks.bench_executive_summary [--tickets N] [--output FILE]
+
+The legacy variants replay the five separate queries the endpoint used to
+issue (once, and twice to cover a previous-period comparison); the current
+variant calls the endpoint itself with the analytics
+snapshot disabled so the SQL path is measured.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.harness import StatementRecorder, use_temp_database, write_results
+
+use_temp_database(snapshot=False)
+
+from sqlalchemy import func  # noqa: E402
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.ticket import Ticket, Outage  # noqa: E402
+from benchmarks.generator import seed_database  # noqa: E402
+
+
+def legacy_summary(start_date, end_date):
+    """The five queries the endpoint issued before consolidation"""
+    window = (Ticket.created_at >= start_date, Ticket.created_at <= end_date)
+    db.session.query(Ticket).filter(*window).count()
+    db.session.query(Ticket).filter(*window, Ticket.sla_breach == True).count()
+    db.session.query(Outage).filter(Outage.start_time >= start_date, Outage.start_time <= end_date).count()
+    db.session.query(Ticket).filter(*window, Ticket.status.in_(['Open', 'Pending', 'Escalated'])).count()
+    db.session.query(Ticket.issue_type, func.count(Ticket.id)).filter(*window).group_by(
+        Ticket.issue_type).order_by(func.count(Ticket.id).desc()).limit(5).all()
+
+
+def measure(label, run, repeat):
+    with StatementRecorder(db.engine) as recorder:
+        run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'variant': label,
+        'statements': len(recorder.statements),
+        'ticket_scans': recorder.ticket_scans(),
+        'median_ms': round(sorted(timings)[len(timings) // 2], 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=30)
+    client = app.test_client()
+
+    with app.app_context():
+        seed_database(args.tickets)
+        results = {
+            'benchmark': 'executive_summary',
+            'tickets': args.tickets,
+            'results': [
+                measure('legacy', lambda: legacy_summary(start_date, end_date), args.repeat),
+                measure('legacy_with_previous_period', lambda: (
+                    legacy_summary(start_date, end_date),
+                    legacy_summary(start_date - (end_date - start_date), start_date)
+                ), args.repeat),
+                measure('consolidated', lambda: client.get('/api/dashboard/executive-summary'), args.repeat)
+            ]
+        }
+
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Export throughput: paging through every ticket the way the frontend exports.
+
+Usage: python -m benchmarks.bench_export [--tickets N] [--per-page P] [--max-pages M] [--output FILE]
+
+Paging clients pull ``/api/dashboard/tickets?per_page=1000``; this walks
+the pages until ``has_next`` is false and reports tickets and bytes per
+second plus per-page latency. The streamed ``/tickets/export`` that app.js
+uses is measured as well: time to first byte, throughput, and peak memory.
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.harness import StatementRecorder, peak_memory_kb, summarize, use_temp_database, write_results
+
+use_temp_database()
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from benchmarks.generator import seed_database  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--per-page', type=int, default=1000)
+    parser.add_argument('--max-pages', type=int, default=0, help='stop after this many pages (0 = all)')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    client = app.test_client()
+    with app.app_context():
+        seed_database(args.tickets)
+
+        def fetch(page):
+            response = client.get(f'/api/dashboard/tickets?per_page={args.per_page}&page={page}')
+            if response.status_code != 200:
+                raise RuntimeError(f'page {page} returned {response.status_code}')
+            return response
+
+        with StatementRecorder(db.engine) as recorder:
+            fetch(1)
+        first_page_statements = len(recorder.statements)
+        first_page_memory = peak_memory_kb(lambda: fetch(1))
+
+        page_ms = []
+        exported = 0
+        total_bytes = 0
+        page = 1
+        started = time.perf_counter()
+        while True:
+            page_started = time.perf_counter()
+            response = fetch(page)
+            page_ms.append((time.perf_counter() - page_started) * 1000)
+            body = response.get_json()
+            exported += len(body['tickets'])
+            total_bytes += len(response.get_data())
+            if not body['pagination']['has_next'] or (args.max_pages and page >= args.max_pages):
+                break
+            page += 1
+        elapsed = time.perf_counter() - started
+
+        def stream():
+            response = client.get('/api/dashboard/tickets/export?format=csv', buffered=False)
+            if response.status_code != 200:
+                raise RuntimeError(f'export returned {response.status_code}')
+            first_byte, size = None, 0
+            for chunk in response.response:
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+                size += len(chunk)
+            response.close()
+            return first_byte, size
+
+        stream_started = time.perf_counter()
+        first_byte, stream_bytes = stream()
+        stream_elapsed = time.perf_counter() - stream_started
+        stream_memory = peak_memory_kb(stream)
+
+    write_results({
+        'benchmark': 'export',
+        'tickets': args.tickets,
+        'results': {
+            'per_page': args.per_page,
+            'pages': len(page_ms),
+            'exported_tickets': exported,
+            'seconds': round(elapsed, 2),
+            'tickets_per_second': round(exported / elapsed, 1),
+            'megabytes_per_second': round(total_bytes / elapsed / 1e6, 2),
+            'statements_per_page': first_page_statements,
+            'page_peak_memory_kb': first_page_memory,
+            'page_latency': summarize(page_ms),
+            'stream': {
+                'seconds': round(stream_elapsed, 2),
+                'first_byte_ms': round((first_byte - stream_started) * 1000, 1),
+                'tickets_per_second': round(args.tickets / stream_elapsed, 1),
+                'megabytes_per_second': round(stream_bytes / stream_elapsed / 1e6, 2),
+                'peak_memory_kb': stream_memory
+            }
+        }
+    }, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
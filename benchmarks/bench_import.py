@@ -0,0 +1,78 @@
+"""Import throughput: first load, unchanged re-import and partial update.
+
+Usage: python -m benchmarks.bench_import [--tickets N] [--update-fraction F] [--output FILE]
+
+Runs ``import_tickets`` (the code behind both the file import and the API
+sync) on generated records and reports tickets per second, statements issued
+and the process's peak RSS after each phase.
+"""
+import argparse
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.harness import StatementRecorder, use_temp_database, write_results
+
+use_temp_database()
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.routes.data_extraction import import_tickets  # noqa: E402
+from benchmarks.generator import TicketGenerator  # noqa: E402
+
+
+def modified_copies(records, fraction, seed=7):
+    """A copy of ``records`` in which ``fraction`` of tickets were edited later"""
+    rnd = random.Random(seed)
+    edited = []
+    for record in records:
+        if rnd.random() < fraction:
+            record = dict(record)
+            updated_at = datetime.fromisoformat(record['updated_at'].replace('Z', '')) + timedelta(hours=1)
+            record['updated_at'] = updated_at.strftime('%Y-%m-%dT%H:%M:%SZ')
+            record['status'] = 4
+        edited.append(record)
+    return edited
+
+
+def run_phase(name, records):
+    with StatementRecorder(db.engine) as recorder:
+        started = time.perf_counter()
+        result = import_tickets(records)
+        elapsed = time.perf_counter() - started
+    return {
+        'phase': name,
+        'records': len(records),
+        'seconds': round(elapsed, 2),
+        'records_per_second': round(len(records) / elapsed, 1),
+        'statements': len(recorder.statements),
+        'imported': result['imported_tickets'],
+        'updated': result['updated_tickets'],
+        'skipped': result['skipped_tickets'],
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=50000)
+    parser.add_argument('--update-fraction', type=float, default=0.1)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    records = list(TicketGenerator(args.tickets))
+    with app.app_context():
+        phases = [
+            run_phase('initial', records),
+            run_phase('unchanged', records),
+            run_phase('partial_update', modified_copies(records, args.update_fraction))
+        ]
+
+    write_results({'benchmark': 'import', 'tickets': args.tickets, 'results': phases}, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Measure gunicorn start-up and worker boot time, with and without preloading.
+
+Usage: python -m benchmarks.bench_startup [--tickets N] [--workers W] [--recycles R] [--output FILE]
+
+A database is seeded once and the analytics snapshot built, then gunicorn
+is started from gunicorn.conf.py twice: with GUNICORN_PRELOAD=false (every
+worker imports the app, checks the schema and loads the snapshot, as before
+the config existed) and with the default preload (the master does that once
+and workers are forks). Reported per mode:
+
+* ``ready_seconds``: launch until every worker has logged that it is ready;
+* ``worker_boot``: fork-to-ready time of the initial workers;
+* ``recycle_boot``: the same for workers replaced after ``max_requests``,
+  forced by sending enough requests to recycle each worker ``R`` times.
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.harness import summarize, write_results
+from benchmarks.load_test import _free_port
+
+READY = re.compile(r'Worker (\d+) ready in ([\d.]+) ms')
+MAX_REQUESTS = 20
+
+
+class Gunicorn:
+    """gunicorn started from gunicorn.conf.py, with its log captured to a file"""
+
+    def __init__(self, env, workers, preload):
+        self.port = _free_port()
+        self.env = dict(env, GUNICORN_PRELOAD='true' if preload else 'false')
+        self.workers = workers
+        self.log = tempfile.NamedTemporaryFile(mode='w+', suffix='.log')
+        self.process = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', str(self.workers),
+             '--bind', f'127.0.0.1:{self.port}', '--max-requests', str(MAX_REQUESTS), '--max-requests-jitter', '0',
+             '--log-level', 'info', 'src.main:app'],
+            env=self.env, stderr=self.log, stdout=subprocess.DEVNULL
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=60)
+        self.log.close()
+
+    def ready(self):
+        """[(pid, ms)] of every 'ready' line logged so far"""
+        self.log.seek(0)
+        return [(int(pid), float(ms)) for pid, ms in READY.findall(self.log.read())]
+
+    def wait_for(self, count, timeout=300):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('gunicorn exited during start-up')
+            ready = self.ready()
+            if len(ready) >= count:
+                return ready
+            time.sleep(0.02)
+        raise RuntimeError(f'only {len(self.ready())} of {count} workers became ready')
+
+
+def measure(env, workers, recycles, preload):
+    with Gunicorn(env, workers, preload) as server:
+        initial = server.wait_for(workers)
+        ready_seconds = time.perf_counter() - server.started
+
+        # Each worker exits after MAX_REQUESTS requests and is replaced
+        session = requests.Session()
+        for _ in range(workers * MAX_REQUESTS * recycles):
+            session.get(f'http://127.0.0.1:{server.port}/api/dashboard/health', timeout=60)
+        recycled = server.wait_for(workers * (recycles + 1))[workers:]
+
+    return {
+        'mode': 'preload' if preload else 'import_per_worker',
+        'ready_seconds': round(ready_seconds, 3),
+        'worker_boot': summarize([ms for _, ms in initial]),
+        'recycle_boot': summarize([ms for _, ms in recycled])
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--recycles', type=int, default=2, help='times each worker is recycled')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='sla-startup-')
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(directory, 'startup.db')}",
+        ANALYTICS_SNAPSHOT_DIR=os.path.join(directory, 'snapshots'),
+        METRICS_DIR='',
+        SLOW_QUERY_MS='0'
+    )
+    try:
+        subprocess.run([sys.executable, '-m', 'benchmarks.generator', '--tickets', str(args.tickets),
+                        '--database', env['DATABASE_URL']], env=env, check=True, stdout=subprocess.DEVNULL)
+        # Build the snapshot up front so both modes start from the same state
+        subprocess.run([sys.executable, '-c', 'import src.main'], env=env, check=True)
+
+        results = {
+            'benchmark': 'startup',
+            'tickets': args.tickets,
+            'workers': args.workers,
+            'results': [measure(env, args.workers, args.recycles, preload) for preload in (False, True)]
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Shared plumbing for the benchmark scripts.
+
+``use_temp_database()`` must run before ``src.main`` is imported: the app
+reads its configuration from the environment at import time.
+"""
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+
+def use_temp_database(snapshot=True):
+    """Point the app at a throwaway SQLite database and snapshot directory"""
+    directory = tempfile.mkdtemp(prefix='sla-bench-')
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    os.environ.setdefault('ANALYTICS_SNAPSHOT', 'true' if snapshot else 'false')
+    os.environ.setdefault('ANALYTICS_SNAPSHOT_DIR', os.path.join(directory, 'snapshots'))
+    os.environ.setdefault('METRICS_DIR', '')
+    os.environ.setdefault('SLOW_QUERY_MS', '0')
+    return directory
+
+
+class StatementRecorder:
+    """Counts statements and ticket-table scans issued on the engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def ticket_scans(self):
+        """Number of tickets-table accesses in the recorded statements' plans"""
+        scans = 0
+        with self.engine.connect() as conn:
+            for statement, parameters in self.statements:
+                if 'tickets' not in statement or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                    continue
+                plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+                scans += sum(1 for row in plan if ' tickets' in row[-1])
+        return scans
+
+
+def summarize(samples_ms):
+    """Latency distribution of a list of millisecond samples"""
+    if not samples_ms:
+        return {'count': 0}
+    ordered = sorted(samples_ms)
+
+    def percentile(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 2)
+
+    return {
+        'count': len(ordered),
+        'min_ms': round(ordered[0], 2),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(ordered[-1], 2),
+        'mean_ms': round(sum(ordered) / len(ordered), 2)
+    }
+
+
+def time_calls(run, repeat, warmup=1):
+    """Milliseconds per call of ``run`` after ``warmup`` untimed calls"""
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def peak_memory_kb(run):
+    """Peak Python heap allocated while ``run`` executes (tracemalloc)"""
+    tracemalloc.start()
+    try:
+        run()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def environment():
+    """Where and on what the results were produced, for comparing runs"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def write_results(results, output=None):
+    """Print the results and optionally save them as JSON"""
+    results = {'environment': environment(), **results}
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
@@ -0,0 +1,264 @@
+"""Load test: concurrent dashboard users against a local gunicorn.
+
+Usage: python -m benchmarks.load_test [--tickets N ...] [--users U ...] [--workers W]
+                                      [--worker-class sync|gthread|asgi] [--duration S]
+                                      [--import-tickets M] [--output FILE]
+
+For every data size a fresh database is seeded and gunicorn is started on
+it from gunicorn.conf.py with ``--workers W`` and the given WORKER_CLASS.
+Each user count then runs for ``--duration`` seconds. Every simulated user
+replays what app.js does:
+
+* opening the dashboard: ``/health``, then the three overview calls fetched
+  in parallel (``loadDashboard``);
+* switching sections: a customer segment, outages, the executive summary,
+  or customers plus SLA definitions (fetched in parallel);
+* now and then, the streamed CSV export (``/tickets/export``).
+
+Users wait a random think time between actions. With ``--import-tickets``,
+a file import of that many new tickets is started when the run begins; this
+is the 9am case. Reported per run: throughput, p50/p95/p99 per request and
+per page view, and error rate, with SQLite "database is locked" failures
+counted separately.
+"""
+import argparse
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.harness import summarize, write_results
+
+OVERVIEW = ['/api/dashboard/sla-metrics', '/api/dashboard/customer-segments', '/api/dashboard/trends']
+SECTIONS = [
+    ('segment', ['/api/dashboard/sla-metrics?customer_type={customer_type}']),
+    ('outages', ['/api/dashboard/outages']),
+    ('executive', ['/api/dashboard/executive-summary']),
+    ('customers', ['/api/extraction/customers', '/api/extraction/sla-definitions'])
+]
+CUSTOMER_TYPES = ['wholesale', 'enterprise', 'local_enterprise']
+EXPORT = '/api/dashboard/tickets/export?format=csv'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """A seeded database served by gunicorn in a child process"""
+
+    def __init__(self, tickets, workers, import_tickets=0, worker_class='sync'):
+        self.directory = tempfile.mkdtemp(prefix='sla-load-')
+        self.port = _free_port()
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        self.env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(self.directory, 'load.db')}",
+            ANALYTICS_SNAPSHOT_DIR=os.path.join(self.directory, 'snapshots'),
+            METRICS_DIR=os.path.join(self.directory, 'metrics'),
+            FRESHDESK_DATA_FILE=os.path.join(self.directory, 'import.json'),
+            WORKER_CLASS=worker_class
+        )
+        self.tickets = tickets
+        self.workers = workers
+        self.import_tickets = import_tickets
+        self.process = None
+
+    def __enter__(self):
+        subprocess.run([sys.executable, '-m', 'benchmarks.generator', '--tickets', str(self.tickets),
+                        '--database', self.env['DATABASE_URL']], env=self.env, check=True, stdout=subprocess.DEVNULL)
+        if self.import_tickets:
+            # A second stream with ids after the seeded ones, so the import inserts
+            subprocess.run([sys.executable, '-m', 'benchmarks.generator', '--tickets', str(self.import_tickets),
+                            '--seed', '7', '--first-id', str(self.tickets + 1),
+                            '--output', self.env['FRESHDESK_DATA_FILE']],
+                           env=self.env, check=True, stdout=subprocess.DEVNULL)
+
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', str(self.workers),
+             '--bind', f'127.0.0.1:{self.port}', '--timeout', '300', '--log-level', 'warning'],
+            env=self.env
+        )
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline and self.process.poll() is None:
+            try:
+                if requests.get(f'{self.base_url}/api/dashboard/health', timeout=2).ok:
+                    return self
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.5)
+        self.__exit__(None, None, None)
+        raise RuntimeError('gunicorn did not become healthy')
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class Recorder:
+    """Thread-safe collection of request and page-view samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.pages = {}
+        self.errors = 0
+        self.lock_errors = 0
+
+    def request(self, name, elapsed_ms, failed, locked):
+        with self._lock:
+            self.requests.setdefault(name, []).append(elapsed_ms)
+            self.errors += failed
+            self.lock_errors += locked
+
+    def page(self, name, elapsed_ms):
+        with self._lock:
+            self.pages.setdefault(name, []).append(elapsed_ms)
+
+
+class User:
+    """One analyst: opens the dashboard, then browses sections until stopped"""
+
+    def __init__(self, server, recorder, rnd, think_time, export_probability):
+        self.server = server
+        self.recorder = recorder
+        self.rnd = rnd
+        self.think_time = think_time
+        self.export_probability = export_probability
+        self.session = requests.Session()
+        # Browsers open up to six connections per host; app.js uses at most three at once
+        self.pool = ThreadPoolExecutor(max_workers=3)
+
+    def get(self, path):
+        name = path.split('?')[0].rsplit('/', 1)[-1]
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.server.base_url + path, timeout=300)
+            failed = response.status_code != 200
+            locked = failed and 'locked' in response.text
+        except requests.RequestException as e:
+            failed, locked = True, 'locked' in str(e)
+        self.recorder.request(name, (time.perf_counter() - started) * 1000, failed, locked)
+
+    def view(self, name, paths):
+        """Fetch ``paths`` concurrently, as Promise.all does, and time the whole view"""
+        started = time.perf_counter()
+        list(self.pool.map(self.get, paths))
+        self.recorder.page(name, (time.perf_counter() - started) * 1000)
+
+    def think(self, stop):
+        stop.wait(self.rnd.expovariate(1 / self.think_time) if self.think_time else 0)
+
+    def run(self, stop):
+        self.get('/api/dashboard/health')
+        self.view('overview', OVERVIEW)
+        while not stop.is_set():
+            self.think(stop)
+            if stop.is_set():
+                break
+            if self.rnd.random() < self.export_probability:
+                self.view('export', [EXPORT])
+                continue
+            name, paths = self.rnd.choice(SECTIONS)
+            customer_type = self.rnd.choice(CUSTOMER_TYPES)
+            self.view(name, [path.format(customer_type=customer_type) for path in paths])
+        self.pool.shutdown()
+        self.session.close()
+
+
+def run_load(server, users, duration, think_time, export_probability, with_import, seed=1):
+    recorder = Recorder()
+    stop = threading.Event()
+    rnd = random.Random(seed)
+    threads = [
+        threading.Thread(target=User(server, recorder, random.Random(rnd.random()), think_time,
+                                     export_probability).run, args=(stop,))
+        for _ in range(users)
+    ]
+
+    import_result = {}
+
+    def run_import():
+        started = time.perf_counter()
+        response = requests.post(f'{server.base_url}/api/extraction/import-freshdesk-data', timeout=60)
+        job = response.json().get('job') if response.status_code == 202 else None
+        # The import runs in the background; poll its job until it finishes
+        while job is not None and job['status'] in ('queued', 'running'):
+            time.sleep(0.5)
+            job = requests.get(f"{server.base_url}/api/extraction/import-jobs/{job['id']}", timeout=60).json()
+        import_result.update(status=job['status'] if job else response.status_code,
+                             seconds=round(time.perf_counter() - started, 2))
+
+    importer = threading.Thread(target=run_import) if with_import else None
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    if importer:
+        importer.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if importer:
+        importer.join()
+
+    total = sum(len(samples) for samples in recorder.requests.values())
+    return {
+        'users': users,
+        'seconds': round(elapsed, 2),
+        'requests': total,
+        'requests_per_second': round(total / elapsed, 1),
+        'errors': recorder.errors,
+        'error_rate': round(recorder.errors / total, 4) if total else 0,
+        'lock_errors': recorder.lock_errors,
+        'import': import_result or None,
+        'latency': summarize([sample for samples in recorder.requests.values() for sample in samples]),
+        'by_request': {name: summarize(samples) for name, samples in sorted(recorder.requests.items())},
+        'by_view': {name: summarize(samples) for name, samples in sorted(recorder.pages.items())}
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, nargs='+', default=[100000], help='data sizes to test')
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 10, 50], help='concurrent users to test')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--worker-class', default='sync', choices=['sync', 'gthread', 'asgi'])
+    parser.add_argument('--duration', type=float, default=30, help='seconds per run')
+    parser.add_argument('--think-time', type=float, default=1.0, help='mean seconds between a user\'s actions')
+    parser.add_argument('--export-probability', type=float, default=0.02)
+    parser.add_argument('--import-tickets', type=int, default=0,
+                        help='import this many new tickets at the start of each run (0 = reads only)')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    runs = []
+    for tickets in args.tickets:
+        for users in args.users:
+            # A fresh server per run, so every import starts from the same state
+            with Server(tickets, args.workers, args.import_tickets, args.worker_class) as server:
+                print(f'== {tickets} tickets, {users} users', file=sys.stderr, flush=True)
+                result = run_load(server, users, args.duration, args.think_time, args.export_probability,
+                                  bool(args.import_tickets))
+                runs.append({'tickets': tickets, 'workers': args.workers, 'worker_class': args.worker_class, **result})
+
+    write_results({'benchmark': 'load_test', 'results': runs}, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
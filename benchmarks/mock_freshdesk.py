@@ -0,0 +1,174 @@
+"""Local stand-in for the Freshdesk v2 tickets API.
+
+Serves ``GET /api/v2/tickets`` over a fixed list of ticket records with the
+parameters the sync sends (``updated_since``, ``page``, ``per_page``,
+ascending ``updated_at`` order) and Freshdesk's rate-limit headers. Every
+request is logged, and the next responses can be made to fail with a 429
+and ``Retry-After`` or to stall past the client's timeout, so the sync can
+be exercised without a Freshdesk account.
+
+Usage: python -m benchmarks.mock_freshdesk --tickets N [--port P]
+then point the app at it with FRESHDESK_BASE_URL=http://127.0.0.1:P and any
+FRESHDESK_API_KEY.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.generator import TicketGenerator
+
+MAX_PAGES = 300
+RATE_LIMIT_TOTAL = 700
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class MockFreshdesk:
+    """Threaded HTTP server answering the tickets endpoint from ``records``"""
+
+    def __init__(self, records=(), host='127.0.0.1', port=0):
+        self.records = list(records)
+        self.requests = []  # query parameters of every request, in arrival order
+        self.extra_headers = {}  # sent with every response, overriding the defaults
+        self._lock = threading.Lock()
+        self._faults = []
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-freshdesk', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def update(self, ticket_id, **fields):
+        """Change a record in place, as an agent editing the ticket would"""
+        with self._lock:
+            for record in self.records:
+                if record['id'] == ticket_id:
+                    record.update(fields)
+                    return record
+        raise KeyError(ticket_id)
+
+    def rate_limit_next(self, count=1, retry_after='1'):
+        """Answer the next ``count`` requests with 429 and this Retry-After value"""
+        with self._lock:
+            self._faults.extend([('429', retry_after)] * count)
+
+    def stall_next(self, count=1, seconds=1.0):
+        """Hold the next ``count`` responses for ``seconds`` before answering"""
+        with self._lock:
+            self._faults.extend([('stall', seconds)] * count)
+
+    def list_tickets(self, params):
+        """Status, headers and body for one tickets request"""
+        with self._lock:
+            self.requests.append(params)
+            fault = self._faults.pop(0) if self._faults else None
+            remaining = max(0, RATE_LIMIT_TOTAL - len(self.requests))
+            records = [dict(record) for record in self.records]
+
+        headers = {'X-RateLimit-Total': str(RATE_LIMIT_TOTAL), 'X-RateLimit-Remaining': str(remaining)}
+        headers.update(self.extra_headers)
+        if fault is not None and fault[0] == '429':
+            return 429, {**headers, 'Retry-After': fault[1]}, {'message': 'Rate limit exceeded'}
+        if fault is not None and fault[0] == 'stall':
+            time.sleep(fault[1])
+
+        page = int(params.get('page', 1))
+        per_page = min(int(params.get('per_page', 30)), 100)
+        if page > MAX_PAGES:
+            return 400, headers, {'description': 'Validation failed', 'errors': [{'field': 'page'}]}
+
+        if params.get('updated_since'):
+            since = _parse_timestamp(params['updated_since'])
+            records = [record for record in records if _parse_timestamp(record['updated_at']) >= since]
+        records.sort(key=lambda record: (_parse_timestamp(record['updated_at']), record['id']))
+        if params.get('order_type') == 'desc':
+            records.reverse()
+
+        page_records = records[(page - 1) * per_page:page * per_page]
+        include = params.get('include', '').split(',')
+        for record in page_records:
+            if 'description' not in include:
+                record.pop('description', None)
+            if 'stats' not in include:
+                record.pop('stats', None)
+        return 200, headers, page_records
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != '/api/v2/tickets':
+                    return self._send(404, {}, {'message': 'Not found'})
+                if not self.headers.get('Authorization'):
+                    return self._send(401, {}, {'message': 'Authentication required'})
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                self._send(*mock.list_tickets(params))
+
+            def _send(self, status, headers, body):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up on a stalled response
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve synthetic tickets as a Freshdesk v2 API stand-in')
+    parser.add_argument('--tickets', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    mock = MockFreshdesk(TicketGenerator(args.tickets, seed=args.seed), port=args.port)
+    print(f'Serving {args.tickets} tickets at {mock.base_url}/api/v2/tickets')
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,6 +22,7 @@ SERVICE_NAME="sla-dashboard"
 PYTHON_VERSION="3.11"
 PORT="5000"
 DOMAIN=""  # Set this if you have a domain
+WORKER_CLASS="sync"  # sync, gthread or asgi (see gunicorn.conf.py)
 
 # Logging function
 log() {
@@ -178,7 +179,8 @@ setup_app_directory() {
     # Copy application files
     if [[ -d "./src" ]]; then
         cp -r ./src $APP_DIR/app/
-        cp -r ./requirements.txt $APP_DIR/app/ 2>/dev/null || true
+        cp ./requirements.txt $APP_DIR/app/
+        cp ./gunicorn.conf.py $APP_DIR/app/
     else
         error "Application source files not found. Run this script from the SLA Dashboard directory."
     fi
@@ -199,12 +201,12 @@ install_dependencies() {
     # Create virtual environment
     sudo -u $APP_USER python3.11 -m venv venv
     
-    # Activate virtual environment and install dependencies
+    # Activate virtual environment and install the pinned dependencies (numpy included:
+    # without it the analytics snapshot is silently off)
     sudo -u $APP_USER bash -c "
         source venv/bin/activate
         pip install --upgrade pip
-        pip install flask flask-sqlalchemy flask-cors gunicorn
-        pip install requests python-dateutil
+        pip install -r requirements.txt
     "
     
     log "Python dependencies installed successfully"
@@ -240,7 +242,10 @@ FLASK_APP=main.py
 FLASK_ENV=production
 SECRET_KEY=$(openssl rand -hex 32)
 DATABASE_URL=sqlite:///$APP_DIR/app/database/app.db
+ANALYTICS_SNAPSHOT_DIR=$APP_DIR/app/database/snapshots
+METRICS_DIR=$APP_DIR/app/database/metrics
 PORT=$PORT
+WORKER_CLASS=$WORKER_CLASS
 EOF
 
     # Create startup script
@@ -249,7 +254,7 @@ EOF
 cd $APP_DIR/app
 source venv/bin/activate
 source ../config/.env
-exec gunicorn --bind 0.0.0.0:$PORT --workers 4 --timeout 120 --keep-alive 2 --max-requests 1000 --max-requests-jitter 100 src.main:app
+exec gunicorn -c gunicorn.conf.py
 EOF
 
     chmod +x $APP_DIR/app/start.sh
@@ -556,6 +561,7 @@ print_summary() {
     echo "Directory: $APP_DIR"
     echo "User: $APP_USER"
     echo "Port: $PORT"
+    echo "Worker class: $WORKER_CLASS"
     echo "Service: $SERVICE_NAME"
     echo "Logs: $APP_DIR/logs/"
     echo "Backups: $APP_DIR/backups/"
@@ -596,10 +602,17 @@ main() {
                 PORT="$2"
                 shift 2
                 ;;
+            --worker-class)
+                WORKER_CLASS="$2"
+                shift 2
+                ;;
             --help)
-                echo "Usage: $0 [--domain DOMAIN] [--port PORT]"
-                echo "  --domain DOMAIN  Set domain name for SSL setup"
-                echo "  --port PORT      Set application port (default: 5000)"
+                echo "Usage: $0 [--domain DOMAIN] [--port PORT] [--worker-class CLASS]"
+                echo "  --domain DOMAIN       Set domain name for SSL setup"
+                echo "  --port PORT           Set application port (default: 5000)"
+                echo "  --worker-class CLASS  sync (default), gthread, or asgi for uvicorn workers;"
+                echo "                        asgi keeps streamed exports and dashboard event"
+                echo "                        streams from tying up workers"
                 exit 0
                 ;;
             *)
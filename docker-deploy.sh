@@ -21,6 +21,7 @@ IMAGE_NAME="sla-dashboard:latest"
 PORT="5000"
 EXTERNAL_PORT="80"
 DOMAIN=""
+WORKER_CLASS="sync"  # sync, gthread or asgi (see gunicorn.conf.py)
 
 log() {
     echo -e "${GREEN}[$(date +'%Y-%m-%d %H:%M:%S')] $1${NC}"
@@ -76,7 +77,7 @@ HEALTHCHECK --interval=30s --timeout=30s --start-period=5s --retries=3 \
     CMD curl -f http://localhost:5000/api/dashboard/health || exit 1
 
 # Run application
-CMD ["gunicorn", "--bind", "0.0.0.0:5000", "--workers", "4", "--timeout", "120", "src.main:app"]
+CMD ["gunicorn", "-c", "gunicorn.conf.py"]
 EOF
 
     log "Dockerfile created"
@@ -98,6 +99,7 @@ services:
       - "$EXTERNAL_PORT:5000"
     environment:
       - FLASK_ENV=production
+      - WORKER_CLASS=$WORKER_CLASS
       - SECRET_KEY=\${SECRET_KEY:-$(openssl rand -hex 32)}
     volumes:
       - ./data:/app/src/database
@@ -334,8 +336,12 @@ main() {
                 EXTERNAL_PORT="$2"
                 shift 2
                 ;;
+            --worker-class)
+                WORKER_CLASS="$2"
+                shift 2
+                ;;
             --help)
-                echo "Usage: $0 [--domain DOMAIN] [--port PORT]"
+                echo "Usage: $0 [--domain DOMAIN] [--port PORT] [--worker-class sync|gthread|asgi]"
                 exit 0
                 ;;
             *)
@@ -0,0 +1,64 @@
+"""Gunicorn settings: ``gunicorn -c gunicorn.conf.py``
+
+The app is preloaded: src.main is imported once in the master, which checks
+the schema and loads the analytics snapshot and outage index before any
+worker exists. Workers, including the ones that replace workers recycled by
+``max_requests``, are then plain forks that share those pages copy-on-write
+instead of each importing the app, re-checking the schema and loading the
+snapshot again.
+
+WORKER_CLASS picks how requests are served:
+
+* ``sync`` (default): src.main:app, one request at a time per worker;
+* ``gthread``: src.main:app with GUNICORN_THREADS threads per worker;
+* ``asgi``: src.asgi:app on uvicorn workers from the uvicorn-worker
+  package (uvicorn.workers is deprecated). Streamed exports and the
+  dashboard's event stream then hold a connection rather than a worker,
+  so long downloads and idle dashboards do not starve other requests.
+
+Other settings from the environment: PORT, WEB_CONCURRENCY (workers),
+GUNICORN_TIMEOUT, and GUNICORN_PRELOAD=false to import the app in every
+worker instead (needed for ``--reload``).
+"""
+import os
+import time
+
+WORKER_CLASSES = {
+    'sync': ('sync', 'src.main:app'),
+    'gthread': ('gthread', 'src.main:app'),
+    'asgi': ('uvicorn_worker.UvicornWorker', 'src.asgi:app')
+}
+
+worker_mode = os.environ.get('WORKER_CLASS', 'sync')
+if worker_mode not in WORKER_CLASSES:
+    raise ValueError(f"Unknown WORKER_CLASS '{worker_mode}', expected one of: {', '.join(WORKER_CLASSES)}")
+worker_class, wsgi_app = WORKER_CLASSES[worker_mode]
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_mode == 'gthread' else 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 2
+max_requests = 1000
+max_requests_jitter = 100
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def pre_fork(server, worker):
+    # Set in the master, inherited by the child
+    worker.fork_started = time.monotonic()
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from src.main import app
+    from src.models.user import db
+
+    # Pooled connections opened by the master during startup must not be shared
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s ready in %.1f ms', worker.pid, (time.monotonic() - worker.fork_started) * 1000)
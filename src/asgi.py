@@ -0,0 +1,161 @@
+"""ASGI entry point: ``WORKER_CLASS=asgi gunicorn -c gunicorn.conf.py`` (needs uvicorn).
+
+Each worker runs an event loop. Flask requests are handed to a pool of
+``ASGI_THREADS`` threads, with one pool call for the view and one per piece
+of a streamed response, and every ``send`` is awaited on the loop. A client
+slowly reading a large export therefore holds a socket but no thread between
+pieces, and several exports interleave with dashboard requests instead of
+each taking a whole sync worker for the length of the download.
+
+/api/dashboard/events is served natively as a long-lived stream (see
+src/services/events.py), so open dashboards cost no thread at all.
+"""
+import asyncio
+import contextvars
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from src.main import app as flask_app
+from src.models.state import get_data_version
+from src.services.events import STREAM_HEADERS, DataVersionEvents
+
+EVENTS_PATH = '/api/dashboard/events'
+
+executor = ThreadPoolExecutor(max_workers=flask_app.config['ASGI_THREADS'], thread_name_prefix='asgi')
+
+
+def _in_thread(function, *args):
+    return asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+
+def _read_version():
+    with flask_app.app_context():
+        return get_data_version()
+
+
+async def _read_version_async():
+    return await _in_thread(_read_version)
+
+
+events = DataVersionEvents(_read_version_async, flask_app.config['EVENTS_POLL_SECONDS'])
+
+
+def _environ(scope, body):
+    """WSGI environ for an ASGI http scope (PEP 3333 strings are latin-1)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+async def _watch_disconnect(receive, disconnected):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            disconnected.set()
+            return
+
+
+async def _serve_flask(scope, receive, send, disconnected):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    watcher = asyncio.create_task(_watch_disconnect(receive, disconnected))
+
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    # Every call into the app for this request runs in one context, so the
+    # request context pushed by stream_with_context survives switching threads
+    context = contextvars.copy_context()
+    iterable = await _in_thread(context.run, flask_app, _environ(scope, bytes(body)), start_response)
+    iterator = iter(iterable)
+    started = False
+    try:
+        while not disconnected.is_set():
+            chunk = await _in_thread(context.run, next, iterator, None)
+            if chunk is None:
+                break
+            if not started:
+                await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+                started = True
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        if not disconnected.is_set():
+            if not started:
+                await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+        if hasattr(iterable, 'close'):
+            await _in_thread(context.run, iterable.close)
+
+
+async def _serve_events(scope, receive, send, disconnected):
+    watcher = asyncio.create_task(_watch_disconnect(receive, disconnected))
+    headers = [(b'content-type', b'text/event-stream; charset=utf-8')]
+    headers += [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in STREAM_HEADERS.items()]
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        async for text in events.stream(disconnected):
+            await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    disconnected = asyncio.Event()
+    if scope['path'] == EVENTS_PATH and scope['method'] == 'GET':
+        await _serve_events(scope, receive, send, disconnected)
+    else:
+        await _serve_flask(scope, receive, send, disconnected)
@@ -0,0 +1,27 @@
+"""Import writer process: ``python -m src.import_writer <lock fd>``.
+
+Started by ``import_queue.kick()`` with the writer lock already held on the
+inherited descriptor; runs every queued import job, then exits. The serving
+process that started it has already prepared the schema, so the app is
+imported with APP_STARTUP=false and no caches are warmed here.
+"""
+import logging
+import os
+import sys
+
+os.environ['APP_STARTUP'] = 'false'
+
+from src.main import app  # noqa: E402
+from src.services.import_queue import WriterLock, import_queue
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [import-writer] %(levelname)s %(message)s')
+    with app.app_context():
+        import_queue.drain(WriterLock.inherited(int(argv[0])))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,9 +6,19 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
+from src.models.schema import configure_sqlite, upgrade_schema
+from src.models.state import ensure_database_id
 from src.routes.user import user_bp
 from src.routes.dashboard import dashboard_bp
 from src.routes.data_extraction import extraction_bp
+from src.routes.metrics import metrics_bp
+from src.services.ticket_snapshot import ticket_snapshots
+from src.services.outage_index import outage_index
+from src.services.search import ensure_search_index
+from src.services.ticket_archive import ticket_archive
+from src.services.import_queue import import_queue
+from src.services.request_metrics import request_metrics
+from src.services.profiling import slow_query_log, request_profiler
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -20,16 +30,89 @@ CORS(app)
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
 app.register_blueprint(extraction_bp, url_prefix='/api/extraction')
+app.register_blueprint(metrics_bp)
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Columnar analytics snapshot (requires numpy)
+app.config['ANALYTICS_SNAPSHOT'] = os.environ.get('ANALYTICS_SNAPSHOT', 'true').lower() == 'true'
+app.config['ANALYTICS_SNAPSHOT_DIR'] = os.environ.get(
+    'ANALYTICS_SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), 'database', 'snapshots')
+)
+
+# Freshdesk export file used by /api/extraction/import-freshdesk-data
+app.config['FRESHDESK_DATA_FILE'] = os.environ.get('FRESHDESK_DATA_FILE', '/home/ubuntu/raw_tickets_data.json')
+
+# Freshdesk API (FRESHDESK_BASE_URL overrides the domain, e.g. for a local stand-in)
+app.config['FRESHDESK_API_KEY'] = os.environ.get('FRESHDESK_API_KEY')
+app.config['FRESHDESK_BASE_URL'] = os.environ.get('FRESHDESK_BASE_URL') or (
+    f"https://{os.environ['FRESHDESK_DOMAIN']}" if os.environ.get('FRESHDESK_DOMAIN') else None
+)
+
+# Per-worker request metrics files, summed by /metrics (empty = this process only)
+app.config['METRICS_DIR'] = os.environ.get(
+    'METRICS_DIR', os.path.join(os.path.dirname(__file__), 'database', 'metrics')
+)
+
+# Statements slower than this are logged with their plan (0 disables)
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 250))
+
+# Requests presenting this token in the X-Profile-Token header return a sampled profile
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+
+# Closed tickets older than this move to monthly archive partitions (0 disables)
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 180))
+# SQLite file holding the archive partitions (default: <database>-archive.db next to the database)
+app.config['ARCHIVE_DATABASE'] = os.environ.get('ARCHIVE_DATABASE')
+
+# SQLite: WAL lets reads run during import commits; writers wait this long for the lock
+app.config['SQLITE_WAL'] = os.environ.get('SQLITE_WAL', 'true').lower() == 'true'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 30000))
+# File locked by the single import writer (default: <database>-import.lock next to the database)
+app.config['IMPORT_LOCK_FILE'] = os.environ.get('IMPORT_LOCK_FILE')
+# false: only connect on import, leaving schema checks and cache warming to the serving process
+app.config['APP_STARTUP'] = os.environ.get('APP_STARTUP', 'true').lower() == 'true'
+
+# How often /api/dashboard/events checks the data version (sync workers: the browser's retry delay)
+app.config['EVENTS_POLL_SECONDS'] = float(os.environ.get('EVENTS_POLL_SECONDS', 5))
+# Threads per worker running Flask requests when served through src/asgi.py
+app.config['ASGI_THREADS'] = int(os.environ.get('ASGI_THREADS', 8))
+
 # Initialize database
 db.init_app(app)
+request_metrics.init_app(app)
+slow_query_log.init_app(app)
+request_profiler.init_app(app)
+import_queue.init_app(app)
 
-with app.app_context():
+def prepare_database():
+    """Create missing tables and apply schema upgrades (idempotent)"""
     db.create_all()
+    upgrade_schema()
+    ticket_archive.ensure_schema()
+    ensure_search_index()
+    ensure_database_id()
+
+def warm_caches():
+    """Load the analytics snapshot and outage index before serving"""
+    ticket_snapshots.load()
+    outage_index.refresh()
+
+# Runs once per process that imports the app. Under gunicorn.conf.py the app
+# is preloaded, so this happens once in the master and forked workers inherit
+# the checked schema and warm caches (see post_fork there). The import writer
+# sets APP_STARTUP=false and only attaches the archive and configures SQLite.
+with app.app_context():
+    ticket_archive.init_app(app)
+    configure_sqlite(app)
+    if app.config['APP_STARTUP']:
+        prepare_database()
+        warm_caches()
+        import_queue.resume()
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
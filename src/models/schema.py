@@ -0,0 +1,116 @@
+import json
+import re
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.schema import CreateTable
+from src.models.user import db
+
+def configure_sqlite(app):
+    """Set journal mode and busy timeout on every new SQLite connection.
+    
+    In WAL mode dashboard reads keep running while the import writer
+    commits, and the busy timeout makes the occasional competing writer
+    wait instead of failing with "database is locked". Must run before the
+    engine opens its first connection.
+    """
+    if db.engine.dialect.name != 'sqlite' or db.engine.url.database in (None, '', ':memory:'):
+        return
+    wal = app.config.get('SQLITE_WAL', True)
+    busy_timeout_ms = int(app.config.get('SQLITE_BUSY_TIMEOUT_MS', 30000))
+    
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {busy_timeout_ms}')
+        if wal:
+            # Attached databases (the ticket archive) keep their own journal mode
+            for _, name, path in cursor.execute('PRAGMA database_list').fetchall():
+                if path:
+                    cursor.execute(f'PRAGMA {name}.journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.close()
+    
+    event.listen(db.engine, 'connect', set_pragmas)
+
+def upgrade_schema():
+    """Bring tables created by an older release up to the current models.
+    
+    db.create_all() only creates missing tables, so columns and indexes added
+    to existing models are applied here. New columns must be nullable or
+    have a server default. SQLite tables that now ask for AUTOINCREMENT are
+    rebuilt once with their rows and ids.
+    """
+    inspector = inspect(db.engine)
+    added = set()
+    
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    added.add((table.name, column.name))
+            
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        
+        if ('tickets', 'cf_customer_type') in added:
+            ticket_columns = {column['name'] for column in inspector.get_columns('tickets')}
+            if 'tags' in ticket_columns:
+                _split_ticket_attributes(conn)
+        
+        if db.engine.dialect.name == 'sqlite':
+            for table in db.metadata.sorted_tables:
+                if table.dialect_options['sqlite']['autoincrement'] and inspector.has_table(table.name):
+                    _enable_autoincrement(conn, table)
+
+def _enable_autoincrement(conn, table):
+    """Rebuild a SQLite table created without AUTOINCREMENT, keeping its rows and ids"""
+    ddl = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': table.name}).scalar()
+    if 'AUTOINCREMENT' in ddl.upper():
+        return
+    
+    rebuilt = f'{table.name}_rebuild'
+    create = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.execute(text(re.sub(rf'CREATE TABLE {table.name}\b', f'CREATE TABLE {rebuilt}', create, count=1)))
+    columns = ', '.join(column.name for column in table.columns)
+    # Explicit ids also advance sqlite_sequence to the current maximum
+    conn.execute(text(f'INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table.name}'))
+    # Dropping the table drops its triggers too; ensure_search_index() recreates them
+    conn.execute(text(f'DROP TABLE {table.name}'))
+    conn.execute(text(f'ALTER TABLE {rebuilt} RENAME TO {table.name}'))
+    for index in table.indexes:
+        index.create(bind=conn)
+
+def _split_ticket_attributes(conn):
+    """Move JSON tags/custom fields of existing tickets into ticket_tags and the promoted columns"""
+    from src.models.ticket import PROMOTED_CUSTOM_FIELDS, normalize_tags, split_custom_fields
+    
+    rows = conn.execute(text(
+        'SELECT id, tags, custom_fields FROM tickets WHERE tags IS NOT NULL OR custom_fields IS NOT NULL'
+    )).fetchall()
+    
+    tag_rows = []
+    field_rows = []
+    for ticket_id, tags, custom_fields in rows:
+        for tag in normalize_tags(json.loads(tags or "[]")):
+            tag_rows.append({'ticket_id': ticket_id, 'tag': tag})
+        
+        promoted, extra = split_custom_fields(json.loads(custom_fields or '{}'))
+        field_rows.append({'id': ticket_id, **promoted, 'custom_fields': json.dumps(extra) if extra else None})
+    
+    if tag_rows:
+        conn.execute(text('INSERT INTO ticket_tags (ticket_id, tag) VALUES (:ticket_id, :tag)'), tag_rows)
+    if field_rows:
+        assignments = ', '.join(f'{attribute} = :{attribute}' for attribute in PROMOTED_CUSTOM_FIELDS.values())
+        conn.execute(text(
+            f'UPDATE tickets SET {assignments}, custom_fields = :custom_fields WHERE id = :id'
+        ), field_rows)
+    
+    # The legacy JSON column is no longer mapped; release its storage
+    conn.execute(text('UPDATE tickets SET tags = NULL'))
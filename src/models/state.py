@@ -0,0 +1,97 @@
+from src.models.user import db
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+import json
+import uuid
+
+DATA_VERSION_KEY = 'data_version'
+DATABASE_ID_KEY = 'database_id'
+
+class AppState(db.Model):
+    __tablename__ = 'app_state'
+
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'value': self.value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+def get_state(key, default=None):
+    """Read a value from the app_state table"""
+    value = db.session.query(AppState.value).filter(AppState.key == key).scalar()
+    return value if value is not None else default
+
+def set_state(key, value):
+    """Write a value to the app_state table (caller commits)"""
+    state = db.session.get(AppState, key)
+    if state is None:
+        state = AppState(key=key)
+        db.session.add(state)
+    state.value = str(value)
+
+def get_data_version():
+    """Version counter bumped whenever ticket data changes"""
+    return int(get_state(DATA_VERSION_KEY, 0))
+
+def bump_data_version():
+    """Mark ticket data as changed so analytics caches rebuild (caller commits)"""
+    version = get_data_version() + 1
+    set_state(DATA_VERSION_KEY, version)
+    return version
+
+def get_database_id():
+    """Random identity of this database, distinguishing it from a reset or swapped one"""
+    return get_state(DATABASE_ID_KEY)
+
+def ensure_database_id():
+    """Assign the database identity on first start (commits)"""
+    if get_database_id() is None:
+        db.session.add(AppState(key=DATABASE_ID_KEY, value=uuid.uuid4().hex))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another process assigned it first
+            db.session.rollback()
+    return get_database_id()
+
+class ImportJob(db.Model):
+    """A queued or finished import; see src/services/import_queue.py"""
+    __tablename__ = 'import_jobs'
+    __table_args__ = (
+        # At most one active job per source, so concurrent requests for the same source share it
+        db.Index('uq_import_jobs_active_source', 'source_key', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(50), nullable=False)  # handler name, e.g. file or freshdesk_sync
+    source_key = db.Column(db.String(500), nullable=False)
+    payload = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    requests = db.Column(db.Integer, nullable=False, default=1)  # submissions merged into this job
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'requests': self.requests,
+            'attempts': self.attempts,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
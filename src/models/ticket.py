@@ -2,11 +2,32 @@ from src.models.user import db
 from datetime import datetime
 import json
 
+# Freshdesk custom field name -> Ticket column
+PROMOTED_CUSTOM_FIELDS = {
+    'cf_customer_type': 'cf_customer_type',
+    'cf_customer_tier': 'cf_customer_tier',
+    'cf_product973573': 'cf_product'
+}
+
+def split_custom_fields(custom_fields):
+    """Return ({column: value} for promoted fields, remaining custom fields)"""
+    extra = dict(custom_fields or {})
+    promoted = {}
+    for field, attribute in PROMOTED_CUSTOM_FIELDS.items():
+        value = extra.get(field)
+        # Only plain string values fit the column; anything else stays in the JSON
+        promoted[attribute] = extra.pop(field, None) if value is None or isinstance(value, str) else None
+    return promoted, extra
+
+def normalize_tags(tags):
+    """Distinct non-empty tags in their original order, cut to the column width"""
+    return list(dict.fromkeys(str(tag)[:100] for tag in tags or [] if tag))
+
 class Customer(db.Model):
     __tablename__ = 'customers'
     
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(255), nullable=False)
+    name = db.Column(db.String(255), nullable=False, index=True)  # the importer resolves customers by name
     customer_type = db.Column(db.String(50), nullable=False)  # wholesale, enterprise, local_enterprise
     sla_tier = db.Column(db.String(50))
     geography = db.Column(db.String(100))
@@ -58,8 +79,40 @@ class Ticket(db.Model):
     
     # Additional fields
     requester_id = db.Column(db.String(100))
-    tags = db.Column(db.Text)  # JSON string
-    custom_fields = db.Column(db.Text)  # JSON string
+    custom_fields = db.Column(db.Text)  # JSON string of the custom fields not promoted below
+    content_hash = db.Column(db.String(64))  # SHA-256 of the raw Freshdesk record
+    
+    # Custom fields we filter on, promoted to indexed columns
+    cf_customer_type = db.Column(db.String(100), index=True)
+    cf_customer_tier = db.Column(db.String(100), index=True)
+    cf_product = db.Column(db.String(100), index=True)  # cf_product973573
+    
+    # Archived tickets keep their ids outside this table, so ids must never be reused
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    tag_links = db.relationship('TicketTag', lazy='selectin', cascade='all, delete-orphan',
+                                order_by='TicketTag.tag')
+    
+    def set_tags(self, tags):
+        """Replace the ticket's tags, keeping rows for tags that did not change"""
+        current = {link.tag: link for link in self.tag_links}
+        wanted = normalize_tags(tags)
+        self.tag_links = [current.get(tag) or TicketTag(tag=tag) for tag in wanted]
+    
+    def set_custom_fields(self, custom_fields):
+        """Store promoted custom fields in their columns and the rest as JSON"""
+        promoted, extra = split_custom_fields(custom_fields)
+        for attribute, value in promoted.items():
+            setattr(self, attribute, value)
+        self.custom_fields = json.dumps(extra) if extra else None
+    
+    def get_custom_fields(self):
+        custom_fields = json.loads(self.custom_fields) if self.custom_fields else {}
+        for field, attribute in PROMOTED_CUSTOM_FIELDS.items():
+            value = getattr(self, attribute)
+            if value is not None:
+                custom_fields[field] = value
+        return custom_fields
     
     def to_dict(self):
         return {
@@ -85,10 +138,20 @@ class Ticket(db.Model):
             'first_response_breach': self.first_response_breach,
             'resolution_breach': self.resolution_breach,
             'requester_id': self.requester_id,
-            'tags': json.loads(self.tags) if self.tags else [],
-            'custom_fields': json.loads(self.custom_fields) if self.custom_fields else {}
+            'tags': [link.tag for link in self.tag_links],
+            'custom_fields': self.get_custom_fields()
         }
 
+class TicketTag(db.Model):
+    __tablename__ = 'ticket_tags'
+    
+    ticket_id = db.Column(db.Integer, db.ForeignKey('tickets.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_ticket_tags_tag', 'tag', 'ticket_id'),
+    )
+
 class SLADefinition(db.Model):
     __tablename__ = 'sla_definitions'
     
@@ -121,6 +184,7 @@ class Outage(db.Model):
     end_time = db.Column(db.DateTime)
     severity = db.Column(db.String(20))  # low, medium, high, critical
     affected_customers = db.Column(db.Integer, default=0)
+    affected_tickets = db.Column(db.Integer, default=0)
     root_cause = db.Column(db.Text)
     resolution_summary = db.Column(db.Text)
     ticket_id = db.Column(db.Integer, db.ForeignKey('tickets.id'))
@@ -142,12 +206,24 @@ class Outage(db.Model):
             'duration_minutes': duration_minutes,
             'severity': self.severity,
             'affected_customers': self.affected_customers,
+            'affected_tickets': self.affected_tickets,
             'root_cause': self.root_cause,
             'resolution_summary': self.resolution_summary,
             'ticket_id': self.ticket_id,
             'is_ongoing': self.end_time is None
         }
 
+# Customer tickets attributed to an outage by the correlation sweep
+class OutageTicket(db.Model):
+    __tablename__ = 'outage_tickets'
+    
+    outage_id = db.Column(db.Integer, db.ForeignKey('outages.id', ondelete='CASCADE'), primary_key=True)
+    ticket_id = db.Column(db.Integer, primary_key=True)  # tickets.id, possibly an archived ticket
+    
+    __table_args__ = (
+        db.Index('ix_outage_tickets_ticket', 'ticket_id'),
+    )
+
 class PerformanceMetric(db.Model):
     __tablename__ = 'performance_metrics'
     
@@ -192,3 +268,56 @@ class PerformanceMetric(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+
+class LatencySketch(db.Model):
+    __tablename__ = 'latency_sketches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    customer_type = db.Column(db.String(50))
+    product_line = db.Column(db.String(100))
+    priority = db.Column(db.String(20))
+    metric = db.Column(db.String(20), nullable=False)  # response, resolution
+    count = db.Column(db.Integer, default=0)
+    sketch = db.Column(db.Text, nullable=False)  # JSON-encoded DDSketch
+    
+    __table_args__ = (
+        db.UniqueConstraint('date', 'customer_type', 'product_line', 'priority', 'metric',
+                            name='uq_latency_sketch_bucket'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'date': self.date.isoformat() if self.date else None,
+            'customer_type': self.customer_type,
+            'product_line': self.product_line,
+            'priority': self.priority,
+            'metric': self.metric,
+            'count': self.count,
+            'sketch': json.loads(self.sketch) if self.sketch else {}
+        }
+
+class HourlyTicketCount(db.Model):
+    __tablename__ = 'hourly_ticket_counts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    customer_type = db.Column(db.String(50))
+    priority = db.Column(db.String(20))
+    tickets = db.Column(db.Text, nullable=False)  # JSON list: tickets created in each UTC hour 0-23
+    breaches = db.Column(db.Text, nullable=False)  # JSON list: of those, tickets breaching SLA
+    
+    __table_args__ = (
+        db.UniqueConstraint('date', 'customer_type', 'priority', name='uq_hourly_ticket_count_bucket'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'date': self.date.isoformat() if self.date else None,
+            'customer_type': self.customer_type,
+            'priority': self.priority,
+            'tickets': json.loads(self.tickets),
+            'breaches': json.loads(self.breaches)
+        }
@@ -1,12 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from collections import namedtuple
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case, select
 from src.models.user import db
-from src.models.ticket import Ticket, Customer, SLADefinition, Outage, PerformanceMetric
+from src.models.ticket import Customer, SLADefinition, Outage, OutageTicket, PerformanceMetric, TicketTag
+from src.models.state import get_data_version
+from src.services.events import STREAM_HEADERS, format_event
+from src.services.export import FORMATS as EXPORT_FORMATS, export_stream, iter_tickets
+from src.services.outage_index import outage_index
+from src.services.outage_correlation import impact_window
+from src.services.heatmap import WEEKDAYS, hour_of_week, weekday_occurrences
+from src.services.scorecard import customer_scorecard, validate_page
+from src.services.search import apply_search
+from src.services.ticket_archive import ticket_archive
+from src.services.ticket_snapshot import ticket_snapshots
+from src.services.sketches import parse_percentiles, percentile_key, window_percentiles, daily_percentiles
 import json
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+IssueCount = namedtuple('IssueCount', ['issue_type', 'count'])
+OPEN_STATUSES = ['Open', 'Pending', 'Escalated']
+
 @dashboard_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -21,6 +36,10 @@ def get_sla_metrics():
         end_date = request.args.get('end_date')
         customer_type = request.args.get('customer_type', 'all')
         product_line = request.args.get('product_line', 'all')
+        try:
+            percentiles = parse_percentiles(request.args.get('percentiles'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Parse dates
         if start_date:
@@ -33,63 +52,29 @@ def get_sla_metrics():
         else:
             end_date = datetime.utcnow()
         
-        # Build query
-        query = db.session.query(Ticket).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date
-        )
-        
-        # Apply filters
-        if customer_type != 'all':
-            query = query.join(Customer).filter(Customer.customer_type == customer_type)
-        
-        if product_line != 'all':
-            query = query.filter(Ticket.product_line == product_line)
-        
-        tickets = query.all()
+        # Answer from the columnar snapshot when available
+        snapshot = ticket_snapshots.current()
+        if snapshot is not None:
+            stats = snapshot.sla_stats(start_date, end_date, customer_type, product_line)
+        else:
+            stats = _sla_stats_from_db(start_date, end_date, customer_type, product_line)
         
-        # Calculate metrics
-        total_tickets = len(tickets)
-        sla_breaches = len([t for t in tickets if t.sla_breach])
-        first_response_breaches = len([t for t in tickets if t.first_response_breach])
-        resolution_breaches = len([t for t in tickets if t.resolution_breach])
+        total_tickets = stats['total_tickets']
+        sla_breaches = stats['sla_breaches']
+        first_response_breaches = stats['first_response_breaches']
+        resolution_breaches = stats['resolution_breaches']
+        avg_response_time = stats['avg_response_time']
+        avg_resolution_time = stats['avg_resolution_time']
+        priority_breakdown = stats['priority_breakdown']
+        status_breakdown = stats['status_breakdown']
         
         # Calculate compliance rates
         sla_compliance_rate = ((total_tickets - sla_breaches) / total_tickets * 100) if total_tickets > 0 else 100
         first_response_compliance = ((total_tickets - first_response_breaches) / total_tickets * 100) if total_tickets > 0 else 100
         resolution_compliance = ((total_tickets - resolution_breaches) / total_tickets * 100) if total_tickets > 0 else 100
         
-        # Calculate average response and resolution times
-        response_times = []
-        resolution_times = []
-        
-        for ticket in tickets:
-            if ticket.first_response_at and ticket.created_at:
-                response_time = (ticket.first_response_at - ticket.created_at).total_seconds() / 3600
-                response_times.append(response_time)
-            
-            if ticket.resolved_at and ticket.created_at:
-                resolution_time = (ticket.resolved_at - ticket.created_at).total_seconds() / 3600
-                resolution_times.append(resolution_time)
-        
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        avg_resolution_time = sum(resolution_times) / len(resolution_times) if resolution_times else 0
-        
-        # Priority breakdown
-        priority_breakdown = {}
-        for ticket in tickets:
-            priority = ticket.priority or 'Unknown'
-            if priority not in priority_breakdown:
-                priority_breakdown[priority] = {'total': 0, 'breaches': 0}
-            priority_breakdown[priority]['total'] += 1
-            if ticket.sla_breach:
-                priority_breakdown[priority]['breaches'] += 1
-        
-        # Status breakdown
-        status_breakdown = {}
-        for ticket in tickets:
-            status = ticket.status or 'Unknown'
-            status_breakdown[status] = status_breakdown.get(status, 0) + 1
+        # Tail latencies from the pre-aggregated sketches
+        latency_percentiles = window_percentiles(start_date, end_date, percentiles, customer_type, product_line)
         
         return jsonify({
             'period': {
@@ -107,7 +92,9 @@ def get_sla_metrics():
                 'first_response_compliance': round(first_response_compliance, 2),
                 'resolution_compliance': round(resolution_compliance, 2),
                 'avg_response_time_hours': round(avg_response_time, 2),
-                'avg_resolution_time_hours': round(avg_resolution_time, 2)
+                'avg_resolution_time_hours': round(avg_resolution_time, 2),
+                'response_time_percentiles_hours': latency_percentiles['response'],
+                'resolution_time_percentiles_hours': latency_percentiles['resolution']
             },
             'breakdowns': {
                 'priority': priority_breakdown,
@@ -118,6 +105,71 @@ def get_sla_metrics():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _sla_stats_from_db(start_date, end_date, customer_type, product_line):
+    """SQL fallback for /sla-metrics when no analytics snapshot is loaded"""
+    # Build query over the hot table and any archived months in the window
+    tickets = ticket_archive.source(start_date, end_date)
+    query = db.session.query(tickets).filter(
+        tickets.created_at >= start_date,
+        tickets.created_at <= end_date
+    )
+    
+    # Apply filters
+    if customer_type != 'all':
+        query = query.join(Customer, tickets.customer_id == Customer.id).filter(Customer.customer_type == customer_type)
+    
+    if product_line != 'all':
+        query = query.filter(tickets.product_line == product_line)
+    
+    rows = query.all()
+    
+    # Calculate average response and resolution times
+    response_times = []
+    resolution_times = []
+    
+    for ticket in rows:
+        if ticket.first_response_at and ticket.created_at:
+            response_time = (ticket.first_response_at - ticket.created_at).total_seconds() / 3600
+            response_times.append(response_time)
+        
+        if ticket.resolved_at and ticket.created_at:
+            resolution_time = (ticket.resolved_at - ticket.created_at).total_seconds() / 3600
+            resolution_times.append(resolution_time)
+    
+    # Priority breakdown
+    priority_breakdown = {}
+    for ticket in rows:
+        priority = ticket.priority or 'Unknown'
+        if priority not in priority_breakdown:
+            priority_breakdown[priority] = {'total': 0, 'breaches': 0}
+        priority_breakdown[priority]['total'] += 1
+        if ticket.sla_breach:
+            priority_breakdown[priority]['breaches'] += 1
+    
+    # Status breakdown
+    status_breakdown = {}
+    for ticket in rows:
+        status = ticket.status or 'Unknown'
+        status_breakdown[status] = status_breakdown.get(status, 0) + 1
+    
+    return {
+        'total_tickets': len(rows),
+        'sla_breaches': len([t for t in rows if t.sla_breach]),
+        'first_response_breaches': len([t for t in rows if t.first_response_breach]),
+        'resolution_breaches': len([t for t in rows if t.resolution_breach]),
+        'avg_response_time': sum(response_times) / len(response_times) if response_times else 0,
+        'avg_resolution_time': sum(resolution_times) / len(resolution_times) if resolution_times else 0,
+        'priority_breakdown': priority_breakdown,
+        'status_breakdown': status_breakdown
+    }
+
+def _hours_between(later, earlier):
+    """SQL expression for the hours from ``earlier`` to ``later`` (NULL when either is NULL)"""
+    if db.engine.dialect.name == 'sqlite':
+        # SQLite stores datetimes as text; extract('epoch', a - b) there is not a duration
+        return (func.julianday(later) - func.julianday(earlier)) * 24
+    return func.extract('epoch', later - earlier) / 3600
+
 @dashboard_bp.route('/customer-segments', methods=['GET'])
 def get_customer_segments():
     """Get customer segment analysis"""
@@ -136,30 +188,33 @@ def get_customer_segments():
             end_date = datetime.utcnow()
         
         # Get customer segments data
-        segments = db.session.query(
-            Customer.customer_type,
-            func.count(Ticket.id).label('total_tickets'),
-            func.sum(func.cast(Ticket.sla_breach, db.Integer)).label('sla_breaches'),
-            func.avg(
-                func.extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600
-            ).label('avg_resolution_hours')
-        ).join(Ticket).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date
-        ).group_by(Customer.customer_type).all()
+        snapshot = ticket_snapshots.current()
+        if snapshot is not None:
+            segments = snapshot.customer_segments(start_date, end_date)
+        else:
+            tickets = ticket_archive.source(start_date, end_date)
+            segments = [segment._asdict() for segment in db.session.query(
+                Customer.customer_type,
+                func.count(tickets.id).label('total_tickets'),
+                func.sum(func.cast(tickets.sla_breach, db.Integer)).label('sla_breaches'),
+                func.avg(_hours_between(tickets.resolved_at, tickets.created_at)).label('avg_resolution_hours')
+            ).join(tickets, tickets.customer_id == Customer.id).filter(
+                tickets.created_at >= start_date,
+                tickets.created_at <= end_date
+            ).group_by(Customer.customer_type).order_by(Customer.customer_type).all()]
         
         segment_data = []
         for segment in segments:
             compliance_rate = 0
-            if segment.total_tickets > 0:
-                compliance_rate = ((segment.total_tickets - (segment.sla_breaches or 0)) / segment.total_tickets) * 100
+            if segment['total_tickets'] > 0:
+                compliance_rate = ((segment['total_tickets'] - (segment['sla_breaches'] or 0)) / segment['total_tickets']) * 100
             
             segment_data.append({
-                'customer_type': segment.customer_type,
-                'total_tickets': segment.total_tickets,
-                'sla_breaches': segment.sla_breaches or 0,
+                'customer_type': segment['customer_type'],
+                'total_tickets': segment['total_tickets'],
+                'sla_breaches': segment['sla_breaches'] or 0,
                 'sla_compliance_rate': round(compliance_rate, 2),
-                'avg_resolution_hours': round(segment.avg_resolution_hours or 0, 2)
+                'avg_resolution_hours': round(segment['avg_resolution_hours'] or 0, 2)
             })
         
         return jsonify({
@@ -173,6 +228,61 @@ def get_customer_segments():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@dashboard_bp.route('/customer-scorecard', methods=['GET'])
+def get_customer_scorecard():
+    """Get per-customer SLA scorecards, ranked and paginated"""
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        customer_type = request.args.get('customer_type', 'all')
+        sort = request.args.get('sort', 'breaches')
+        order = request.args.get('order', 'desc')
+        try:
+            page = int(request.args.get('page', 1))
+            per_page = int(request.args.get('per_page', 50))
+            min_tickets = int(request.args.get('min_tickets', 1))
+            validate_page(sort, page, per_page)
+            percentiles = parse_percentiles(request.args.get('percentiles'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if start_date:
+            start_date = datetime.fromisoformat(start_date.replace('Z', ''))
+        else:
+            start_date = datetime.utcnow() - timedelta(days=30)
+            
+        if end_date:
+            end_date = datetime.fromisoformat(end_date.replace('Z', ''))
+        else:
+            end_date = datetime.utcnow()
+        
+        customers, total = customer_scorecard(
+            start_date, end_date, percentiles, sort=sort, descending=order != 'asc', page=page,
+            per_page=per_page, customer_type=customer_type, min_tickets=min_tickets
+        )
+        pages = (total + per_page - 1) // per_page
+        
+        return jsonify({
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat()
+            },
+            'sort': sort,
+            'order': 'asc' if order == 'asc' else 'desc',
+            'customers': customers,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': pages,
+                'has_next': page < pages,
+                'has_prev': page > 1
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @dashboard_bp.route('/outages', methods=['GET'])
 def get_outages():
     """Get outage analysis"""
@@ -191,24 +301,24 @@ def get_outages():
         else:
             end_date = datetime.utcnow()
         
-        # Build query
-        query = db.session.query(Outage).filter(
-            Outage.start_time >= start_date,
-            Outage.start_time <= end_date
-        )
+        # Outages overlapping the window, not just those starting inside it
+        outage_index.refresh()
+        product_filter = None if product_line == 'all' else product_line
+        outage_ids = outage_index.overlapping(start_date, end_date, product_filter)
         
-        if product_line != 'all':
-            query = query.filter(Outage.product_line == product_line)
+        outages = []
+        if outage_ids:
+            outages = db.session.query(Outage).filter(
+                Outage.id.in_(outage_ids)
+            ).order_by(Outage.start_time).all()
         
-        outages = query.all()
+        # Downtime is clipped to the window (ongoing outages run until now)
+        downtime_end = min(end_date, datetime.utcnow())
         
         # Calculate metrics
         total_outages = len(outages)
         ongoing_outages = len([o for o in outages if o.end_time is None])
-        total_downtime_minutes = sum([
-            (o.end_time - o.start_time).total_seconds() / 60 
-            for o in outages if o.end_time
-        ])
+        total_downtime_minutes = outage_index.downtime_minutes(start_date, downtime_end, product_filter)
         
         # Severity breakdown
         severity_breakdown = {}
@@ -221,11 +331,11 @@ def get_outages():
         for outage in outages:
             product = outage.product_line or 'Unknown'
             if product not in product_breakdown:
-                product_breakdown[product] = {'count': 0, 'downtime_minutes': 0}
+                product_breakdown[product] = {
+                    'count': 0,
+                    'downtime_minutes': round(outage_index.downtime_minutes(start_date, downtime_end, product), 2)
+                }
             product_breakdown[product]['count'] += 1
-            if outage.end_time:
-                downtime = (outage.end_time - outage.start_time).total_seconds() / 60
-                product_breakdown[product]['downtime_minutes'] += downtime
         
         # MTTR calculation
         resolved_outages = [o for o in outages if o.end_time]
@@ -259,6 +369,46 @@ def get_outages():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@dashboard_bp.route('/outages/<int:outage_id>/tickets', methods=['GET'])
+def get_outage_tickets(outage_id):
+    """Get the customer tickets attributed to an outage"""
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 50))
+        
+        outage = db.session.get(Outage, outage_id)
+        if outage is None:
+            return jsonify({'error': 'Outage not found'}), 404
+        
+        # Attributed tickets were created inside the impact window, so only its partitions are read
+        window_start, window_end = impact_window(outage.start_time, outage.end_time)
+        tickets = ticket_archive.source(window_start, window_end)
+        query = db.session.query(tickets).join(
+            OutageTicket, OutageTicket.ticket_id == tickets.id
+        ).filter(OutageTicket.outage_id == outage_id).order_by(tickets.created_at)
+        
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'outage': outage.to_dict(),
+            'impact_window': {
+                'start': window_start.isoformat(),
+                'end': window_end.isoformat()
+            },
+            'tickets': [ticket.to_dict() for ticket in pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @dashboard_bp.route('/executive-summary', methods=['GET'])
 def get_executive_summary():
     """Generate executive summary"""
@@ -276,40 +426,40 @@ def get_executive_summary():
         else:
             end_date = datetime.utcnow()
         
-        # Get overall metrics
-        total_tickets = db.session.query(Ticket).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date
-        ).count()
-        
-        sla_breaches = db.session.query(Ticket).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date,
-            Ticket.sla_breach == True
-        ).count()
-        
-        total_outages = db.session.query(Outage).filter(
-            Outage.start_time >= start_date,
-            Outage.start_time <= end_date
-        ).count()
-        
-        open_tickets = db.session.query(Ticket).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date,
-            Ticket.status.in_(['Open', 'Pending', 'Escalated'])
-        ).count()
-        
-        # Calculate compliance rate
-        compliance_rate = ((total_tickets - sla_breaches) / total_tickets * 100) if total_tickets > 0 else 100
-        
-        # Get top issues
-        top_issues = db.session.query(
-            Ticket.issue_type,
-            func.count(Ticket.id).label('count')
-        ).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date
-        ).group_by(Ticket.issue_type).order_by(func.count(Ticket.id).desc()).limit(5).all()
+        # Previous window of the same length, [previous_start, start_date) in every path
+        previous_start = start_date - (end_date - start_date)
+        
+        snapshot = ticket_snapshots.current()
+        if snapshot is not None:
+            current = snapshot.executive_stats(start_date, end_date)
+            previous = snapshot.executive_stats(previous_start, start_date, include_end=False)
+            top_issues = [IssueCount(issue_type, count) for issue_type, count in current.pop('top_issues')]
+            previous.pop('top_issues')
+            current['total_outages'], previous['total_outages'] = db.session.query(
+                *_outage_window_counts(start_date, end_date, previous_start)
+            ).one()
+        else:
+            current, previous = _executive_stats_from_db(start_date, end_date, previous_start)
+            
+            # Get top issues
+            tickets = ticket_archive.source(start_date, end_date)
+            top_issues = db.session.query(
+                tickets.issue_type,
+                func.count(tickets.id).label('count')
+            ).filter(
+                tickets.created_at >= start_date,
+                tickets.created_at <= end_date
+            ).group_by(tickets.issue_type).order_by(func.count(tickets.id).desc(), tickets.issue_type).limit(5).all()
+        
+        total_tickets = current['total_tickets']
+        sla_breaches = current['sla_breaches']
+        open_tickets = current['open_tickets']
+        total_outages = current['total_outages']
+        
+        # Calculate compliance and breach rates
+        compliance_rate = _compliance_rate(current)
+        previous_compliance_rate = _compliance_rate(previous)
+        breach_rate = (sla_breaches / total_tickets * 100) if total_tickets > 0 else 0
         
         # Generate summary text
         period_days = (end_date - start_date).days
@@ -322,7 +472,7 @@ def get_executive_summary():
         • Currently open tickets: {open_tickets}
         
         Key Performance Indicators:
-        - SLA breaches: {sla_breaches} tickets ({(sla_breaches/total_tickets*100):.1f}% of total)
+        - SLA breaches: {sla_breaches} tickets ({breach_rate:.1f}% of total)
         - Service availability maintained above target levels
         - Response times within acceptable ranges for most customer segments
         
@@ -348,6 +498,22 @@ def get_executive_summary():
                 'total_outages': total_outages,
                 'open_tickets': open_tickets
             },
+            'previous_period': {
+                'start_date': previous_start.isoformat(),
+                'end_date': start_date.isoformat(),  # exclusive
+                'total_tickets': previous['total_tickets'],
+                'sla_compliance_rate': round(previous_compliance_rate, 2),
+                'sla_breaches': previous['sla_breaches'],
+                'total_outages': previous['total_outages'],
+                'open_tickets': previous['open_tickets']
+            },
+            'changes': {
+                'total_tickets': total_tickets - previous['total_tickets'],
+                'sla_compliance_rate': round(compliance_rate - previous_compliance_rate, 2),
+                'sla_breaches': sla_breaches - previous['sla_breaches'],
+                'total_outages': total_outages - previous['total_outages'],
+                'open_tickets': open_tickets - previous['open_tickets']
+            },
             'top_issues': [{'issue_type': issue.issue_type, 'count': issue.count} for issue in top_issues],
             'summary_text': summary_text.strip()
         })
@@ -355,6 +521,61 @@ def get_executive_summary():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _compliance_rate(stats):
+    total = stats['total_tickets']
+    return ((total - stats['sla_breaches']) / total * 100) if total > 0 else 100
+
+def _outage_window_counts(start_date, end_date, previous_start):
+    """Scalar subqueries counting outages overlapping [start_date, end_date] and [previous_start, start_date)"""
+    def overlapping(window_start, starts_in_window):
+        return select(func.count(Outage.id)).where(
+            starts_in_window,
+            or_(Outage.end_time.is_(None), Outage.end_time >= window_start)
+        ).scalar_subquery()
+    
+    return (
+        overlapping(start_date, Outage.start_time <= end_date).label('total_outages'),
+        overlapping(previous_start, Outage.start_time < start_date).label('previous_total_outages')
+    )
+
+def _executive_stats_from_db(start_date, end_date, previous_start):
+    """Current and previous window counts in a single conditional-aggregation pass"""
+    tickets = ticket_archive.source(previous_start, end_date)
+    in_current = tickets.created_at >= start_date
+    in_previous = tickets.created_at < start_date
+    is_breach = tickets.sla_breach == True
+    is_open = tickets.status.in_(OPEN_STATUSES)
+    
+    def count_where(*conditions):
+        return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+    
+    row = db.session.query(
+        count_where(in_current).label('total_tickets'),
+        count_where(in_current, is_breach).label('sla_breaches'),
+        count_where(in_current, is_open).label('open_tickets'),
+        count_where(in_previous).label('previous_total_tickets'),
+        count_where(in_previous, is_breach).label('previous_sla_breaches'),
+        count_where(in_previous, is_open).label('previous_open_tickets'),
+        *_outage_window_counts(start_date, end_date, previous_start)
+    ).filter(
+        tickets.created_at >= previous_start,
+        tickets.created_at <= end_date
+    ).one()
+    
+    current = {
+        'total_tickets': row.total_tickets,
+        'sla_breaches': row.sla_breaches,
+        'open_tickets': row.open_tickets,
+        'total_outages': row.total_outages
+    }
+    previous = {
+        'total_tickets': row.previous_total_tickets,
+        'sla_breaches': row.previous_sla_breaches,
+        'open_tickets': row.previous_open_tickets,
+        'total_outages': row.previous_total_outages
+    }
+    return current, previous
+
 @dashboard_bp.route('/trends', methods=['GET'])
 def get_trends():
     """Get trend analysis data"""
@@ -362,6 +583,10 @@ def get_trends():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         customer_type = request.args.get('customer_type', 'all')
+        try:
+            percentiles = parse_percentiles(request.args.get('percentiles'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         if start_date:
             start_date = datetime.fromisoformat(start_date.replace('Z', ''))
@@ -374,31 +599,41 @@ def get_trends():
             end_date = datetime.utcnow()
         
         # Get daily metrics
-        daily_metrics = db.session.query(
-            func.date(Ticket.created_at).label('date'),
-            func.count(Ticket.id).label('total_tickets'),
-            func.sum(func.cast(Ticket.sla_breach, db.Integer)).label('sla_breaches')
-        ).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date
-        )
-        
-        if customer_type != 'all':
-            daily_metrics = daily_metrics.join(Customer).filter(Customer.customer_type == customer_type)
-        
-        daily_metrics = daily_metrics.group_by(func.date(Ticket.created_at)).all()
+        snapshot = ticket_snapshots.current()
+        if snapshot is not None:
+            daily_metrics = snapshot.daily_trends(start_date, end_date, customer_type)
+        else:
+            tickets = ticket_archive.source(start_date, end_date)
+            daily_metrics = db.session.query(
+                func.date(tickets.created_at).label('date'),
+                func.count(tickets.id).label('total_tickets'),
+                func.sum(func.cast(tickets.sla_breach, db.Integer)).label('sla_breaches')
+            ).filter(
+                tickets.created_at >= start_date,
+                tickets.created_at <= end_date
+            )
+            
+            if customer_type != 'all':
+                daily_metrics = daily_metrics.join(Customer, tickets.customer_id == Customer.id).filter(Customer.customer_type == customer_type)
+            
+            daily_metrics = [metric._asdict() for metric in daily_metrics.group_by(func.date(tickets.created_at)).all()]
+        daily_latency = daily_percentiles(start_date, end_date, percentiles, customer_type)
+        empty_latency = {key: None for key in map(percentile_key, percentiles)}
         
         trend_data = []
         for metric in daily_metrics:
             compliance_rate = 0
-            if metric.total_tickets > 0:
-                compliance_rate = ((metric.total_tickets - (metric.sla_breaches or 0)) / metric.total_tickets) * 100
+            if metric['total_tickets'] > 0:
+                compliance_rate = ((metric['total_tickets'] - (metric['sla_breaches'] or 0)) / metric['total_tickets']) * 100
             
+            latency = daily_latency.get(str(metric['date']), {})
             trend_data.append({
-                'date': str(metric.date),
-                'total_tickets': metric.total_tickets,
-                'sla_breaches': metric.sla_breaches or 0,
-                'sla_compliance_rate': round(compliance_rate, 2)
+                'date': str(metric['date']),
+                'total_tickets': metric['total_tickets'],
+                'sla_breaches': metric['sla_breaches'] or 0,
+                'sla_compliance_rate': round(compliance_rate, 2),
+                'response_time_percentiles_hours': latency.get('response', empty_latency),
+                'resolution_time_percentiles_hours': latency.get('resolution', empty_latency)
             })
         
         return jsonify({
@@ -413,54 +648,143 @@ def get_trends():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@dashboard_bp.route('/tickets', methods=['GET'])
-def get_tickets():
-    """Get tickets with filtering and pagination"""
+@dashboard_bp.route('/heatmap', methods=['GET'])
+def get_heatmap():
+    """Get ticket volume and breach rate by day of week and hour of day"""
+    raw_offset = request.args.get('utc_offset', '0')
+    try:
+        utc_offset = int(raw_offset)
+        if not -12 <= utc_offset <= 14:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f"Invalid utc_offset '{raw_offset}', expected whole hours from -12 to 14"}), 400
+    
     try:
-        # Get query parameters
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 50))
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        customer_type = request.args.get('customer_type')
-        priority = request.args.get('priority')
-        status = request.args.get('status')
-        sla_breach = request.args.get('sla_breach')
-        
-        # Build query
-        query = db.session.query(Ticket)
+        customer_type = request.args.get('customer_type', 'all')
+        priority = request.args.get('priority', 'all')
         
-        # Apply date filters
         if start_date:
             start_date = datetime.fromisoformat(start_date.replace('Z', ''))
-            query = query.filter(Ticket.created_at >= start_date)
-        
+        else:
+            start_date = datetime.utcnow() - timedelta(days=90)
+            
         if end_date:
             end_date = datetime.fromisoformat(end_date.replace('Z', ''))
-            query = query.filter(Ticket.created_at <= end_date)
+        else:
+            end_date = datetime.utcnow()
         
-        # Apply other filters
-        if customer_type:
-            query = query.join(Customer).filter(Customer.customer_type == customer_type)
+        # Summed from the pre-bucketed hourly counters
+        tickets, breaches = hour_of_week(start_date, end_date, customer_type, priority, utc_offset)
+        occurrences = weekday_occurrences(start_date, end_date)
         
-        if priority:
-            query = query.filter(Ticket.priority == priority)
+        return jsonify({
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat()
+            },
+            'filters': {
+                'customer_type': customer_type,
+                'priority': priority,
+                'utc_offset': utc_offset
+            },
+            'days': list(WEEKDAYS),
+            'hours': list(range(24)),
+            'tickets': tickets,
+            'sla_breaches': breaches,
+            'breach_rate': [
+                [round(breach_count / ticket_count * 100, 2) if ticket_count else None
+                 for ticket_count, breach_count in zip(day_tickets, day_breaches)]
+                for day_tickets, day_breaches in zip(tickets, breaches)
+            ],
+            'avg_tickets_per_day': [
+                [round(ticket_count / occurrences[day], 2) if occurrences[day] else 0 for ticket_count in day_tickets]
+                for day, day_tickets in enumerate(tickets)
+            ]
+        })
         
-        if status:
-            query = query.filter(Ticket.status == status)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _filtered_tickets(args):
+    """Ticket query for the /tickets filters: (query, ticket entity, search rank or None)"""
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    customer_type = args.get('customer_type')
+    priority = args.get('priority')
+    status = args.get('status')
+    sla_breach = args.get('sla_breach')
+    search_text = args.get('q', '').strip()
+    tags = args.getlist('tag')
+    customer_tier = args.get('customer_tier')
+    
+    if start_date:
+        start_date = datetime.fromisoformat(start_date.replace('Z', ''))
+    
+    if end_date:
+        end_date = datetime.fromisoformat(end_date.replace('Z', ''))
+    
+    # Build query over the hot table and the archived months the dates reach
+    tickets = ticket_archive.source(start_date, end_date)
+    query = db.session.query(tickets)
+    
+    # Apply date filters
+    if start_date:
+        query = query.filter(tickets.created_at >= start_date)
+    
+    if end_date:
+        query = query.filter(tickets.created_at <= end_date)
+    
+    # Apply other filters
+    if customer_type:
+        query = query.join(Customer, tickets.customer_id == Customer.id).filter(Customer.customer_type == customer_type)
+    
+    if priority:
+        query = query.filter(tickets.priority == priority)
+    
+    if status:
+        query = query.filter(tickets.status == status)
+    
+    if sla_breach:
+        query = query.filter(tickets.sla_breach == (sla_breach.lower() == 'true'))
+    
+    if customer_tier:
+        query = query.filter(tickets.cf_customer_tier == customer_tier)
+    
+    # Every requested tag must be present (tag index lookups)
+    for tag in tags:
+        query = query.filter(tickets.id.in_(
+            db.session.query(TicketTag.ticket_id).filter(TicketTag.tag == tag)
+        ))
+    
+    # Full-text search
+    rank = None
+    if search_text:
+        query, rank = apply_search(query, search_text, tickets)
+    
+    return query, tickets, rank
+
+@dashboard_bp.route('/tickets', methods=['GET'])
+def get_tickets():
+    """Get tickets with filtering and pagination"""
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 50))
+        query, tickets, rank = _filtered_tickets(request.args)
         
-        if sla_breach:
-            query = query.filter(Ticket.sla_breach == (sla_breach.lower() == 'true'))
+        # Best search matches first
+        if rank is not None:
+            query = query.order_by(rank)
         
         # Order by creation date (newest first)
-        query = query.order_by(Ticket.created_at.desc())
+        query = query.order_by(tickets.created_at.desc())
         
         # Paginate
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        tickets = pagination.items
         
         return jsonify({
-            'tickets': [ticket.to_dict() for ticket in tickets],
+            'tickets': [ticket.to_dict() for ticket in pagination.items],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -474,3 +798,35 @@ def get_tickets():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+@dashboard_bp.route('/tickets/export', methods=['GET'])
+def export_tickets():
+    """Stream every ticket matching the /tickets filters as CSV or JSON"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unknown format '{export_format}', expected one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    try:
+        query, tickets, _ = _filtered_tickets(request.args)
+        body = export_stream(export_format, iter_tickets(query, tickets))
+        filename = f"sla-tickets-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/events', methods=['GET'])
+def data_version_events():
+    """Current data version as a server-sent event.
+
+    Returns at once with a retry delay, so under sync workers the browser
+    polls instead of pinning a worker; src/asgi.py serves this path as a
+    long-lived stream.
+    """
+    retry_ms = current_app.config['EVENTS_POLL_SECONDS'] * 1000
+    return Response(format_event(get_data_version(), retry_ms), mimetype='text/event-stream', headers=STREAM_HEADERS)
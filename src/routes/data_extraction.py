@@ -1,179 +1,368 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
 from src.models.user import db
-from src.models.ticket import Ticket, Customer, SLADefinition, Outage
+from src.models.ticket import Ticket, Customer, SLADefinition, Outage, HourlyTicketCount, normalize_tags, split_custom_fields
+from src.models.state import ImportJob, bump_data_version
+from src.services.outage_index import outage_index
+from src.services.customer_resolver import CustomerResolver
+from src.services.freshdesk_sync import FreshdeskClient, FreshdeskSync
+from src.services.sketches import refresh_latency_sketches, rebuild_all_latency_sketches, latency_sketches_backfilled
+from src.services.heatmap import refresh_hourly_counts, rebuild_all_hourly_counts
+from src.services.ticket_archive import ticket_archive
+from src.services.outage_correlation import correlate_outages
+from src.services.import_queue import import_queue
+from src.services.ticket_snapshot import ticket_snapshots
+import hashlib
 import json
+import logging
 import os
+import re
 
 extraction_bp = Blueprint('extraction', __name__)
+logger = logging.getLogger(__name__)
+
+# Known customer patterns
+KNOWN_CUSTOMERS = ['Biddex', 'Faysal', 'Tarabezah', 'InstaPrints', 'Intlaq', 'Majalat', 'Toobit', 'POLIGON']
+CUSTOMER_NAME_PATTERNS = [
+    re.compile(r'(\w+)\s*\|', re.IGNORECASE),  # Customer name before pipe
+    re.compile(r'\|\s*(\w+)', re.IGNORECASE),  # Customer name after pipe
+    re.compile(r'(\w+)\s*API', re.IGNORECASE),  # Customer name before API
+]
+HTML_TAG = re.compile('<.*?>')
+# Hashed into every ticket fingerprint; bump when the field mapping changes so
+# the next import re-maps records whose raw content has not changed
+FINGERPRINT_VERSION = 2
+# Columns an update leaves as the first import stored them
+CREATE_ONLY_COLUMNS = ('external_id', 'created_at', 'requester_id')
 
 @extraction_bp.route('/import-freshdesk-data', methods=['POST'])
 def import_freshdesk_data():
-    """Import Freshdesk ticket data into the dashboard database"""
+    """Queue an import of the Freshdesk export file (202 with the job to poll)"""
     try:
-        # Load the existing Freshdesk ticket data
-        data_file = '/home/ubuntu/raw_tickets_data.json'
+        data_file = current_app.config['FRESHDESK_DATA_FILE']
         
         if not os.path.exists(data_file):
             return jsonify({'error': 'Freshdesk data file not found'}), 404
         
-        with open(data_file, 'r') as f:
-            freshdesk_tickets = json.load(f)
-        
-        imported_count = 0
-        updated_count = 0
-        
-        for ticket_data in freshdesk_tickets:
-            try:
-                # Extract customer information
-                custom_fields = ticket_data.get('custom_fields', {})
-                customer_type_raw = custom_fields.get('cf_customer_type', 'Unknown')
-                
-                # Determine customer type
-                customer_type = 'unknown'
-                if 'Enterprise' in customer_type_raw:
-                    if 'Egypt' in customer_type_raw or 'KSA' in customer_type_raw or 'Pakistan' in customer_type_raw:
-                        customer_type = 'local_enterprise'
-                    else:
-                        customer_type = 'enterprise'
-                elif 'Wholesale' in customer_type_raw:
-                    customer_type = 'wholesale'
-                elif 'Internal' in customer_type_raw:
-                    customer_type = 'internal'
-                
-                # Extract customer name from subject
-                customer_name = extract_customer_name(ticket_data.get('subject', ''))
-                if not customer_name:
-                    customer_name = f"Customer_{ticket_data.get('requester_id', 'Unknown')}"
-                
-                # Get or create customer
-                customer = Customer.query.filter_by(name=customer_name).first()
-                if not customer:
-                    geography = 'Unknown'
-                    if 'Egypt' in customer_type_raw:
-                        geography = 'Egypt'
-                    elif 'KSA' in customer_type_raw or 'Saudi' in customer_type_raw:
-                        geography = 'KSA'
-                    elif 'Pakistan' in customer_type_raw:
-                        geography = 'Pakistan'
-                    
-                    customer = Customer(
-                        name=customer_name,
-                        customer_type=customer_type,
-                        geography=geography,
-                        sla_tier=custom_fields.get('cf_customer_tier', 'Standard'),
-                        contact_info=json.dumps({'requester_id': ticket_data.get('requester_id')})
-                    )
-                    db.session.add(customer)
-                    db.session.flush()  # Get the ID
-                
-                # Check if ticket already exists
-                existing_ticket = Ticket.query.filter_by(external_id=str(ticket_data['id'])).first()
-                
-                # Parse timestamps
-                created_at = datetime.fromisoformat(ticket_data['created_at'].replace('Z', '+00:00'))
-                updated_at = datetime.fromisoformat(ticket_data['updated_at'].replace('Z', '+00:00'))
-                
-                # Determine service type and issue type
-                subject = ticket_data.get('subject', '').lower()
-                service_type = determine_service_type(subject, custom_fields)
-                issue_type = determine_issue_type(subject)
-                
-                # Calculate SLA information
-                priority = map_priority(ticket_data.get('priority', 2))
-                sla_info = calculate_sla_info(created_at, updated_at, priority, customer_type)
-                
-                if existing_ticket:
-                    # Update existing ticket
-                    existing_ticket.customer_id = customer.id
-                    existing_ticket.product_line = custom_fields.get('cf_product973573', service_type)
-                    existing_ticket.priority = priority
-                    existing_ticket.status = map_status(ticket_data.get('status', 2))
-                    existing_ticket.subject = ticket_data.get('subject', '')
-                    existing_ticket.description = clean_html(ticket_data.get('description', ''))
-                    existing_ticket.issue_type = issue_type
-                    existing_ticket.service_type = service_type
-                    existing_ticket.updated_at = updated_at
-                    existing_ticket.first_response_due = sla_info['first_response_due']
-                    existing_ticket.resolution_due = sla_info['resolution_due']
-                    existing_ticket.sla_breach = sla_info['sla_breach']
-                    existing_ticket.first_response_breach = sla_info['first_response_breach']
-                    existing_ticket.resolution_breach = sla_info['resolution_breach']
-                    existing_ticket.tags = json.dumps(ticket_data.get('tags', []))
-                    existing_ticket.custom_fields = json.dumps(custom_fields)
-                    updated_count += 1
-                else:
-                    # Create new ticket
-                    new_ticket = Ticket(
-                        external_id=str(ticket_data['id']),
-                        customer_id=customer.id,
-                        product_line=custom_fields.get('cf_product973573', service_type),
-                        priority=priority,
-                        status=map_status(ticket_data.get('status', 2)),
-                        subject=ticket_data.get('subject', ''),
-                        description=clean_html(ticket_data.get('description', '')),
-                        issue_type=issue_type,
-                        service_type=service_type,
-                        created_at=created_at,
-                        updated_at=updated_at,
-                        first_response_due=sla_info['first_response_due'],
-                        resolution_due=sla_info['resolution_due'],
-                        sla_breach=sla_info['sla_breach'],
-                        first_response_breach=sla_info['first_response_breach'],
-                        resolution_breach=sla_info['resolution_breach'],
-                        requester_id=str(ticket_data.get('requester_id', '')),
-                        tags=json.dumps(ticket_data.get('tags', [])),
-                        custom_fields=json.dumps(custom_fields)
-                    )
-                    db.session.add(new_ticket)
-                    imported_count += 1
-                
-                # Create outage record if it's an outage
-                if is_outage_ticket(subject):
-                    create_outage_record(ticket_data, service_type)
-                
-            except Exception as e:
-                print(f"Error processing ticket {ticket_data.get('id')}: {str(e)}")
-                continue
-        
-        # Commit all changes
-        db.session.commit()
+        # Requests for the same file contents share one job
+        stat = os.stat(data_file)
+        job = import_queue.submit('file', f'file:{data_file}:{stat.st_size}:{stat.st_mtime_ns}', {'path': data_file})
+        return _accepted(job)
         
-        # Initialize SLA definitions if they don't exist
-        initialize_sla_definitions()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@extraction_bp.route('/sync-freshdesk', methods=['POST'])
+def sync_freshdesk():
+    """Queue a pull of tickets changed since the last sync from the Freshdesk API"""
+    try:
+        base_url = current_app.config.get('FRESHDESK_BASE_URL')
+        api_key = current_app.config.get('FRESHDESK_API_KEY')
+        if not base_url or not api_key:
+            return jsonify({'error': 'Freshdesk API is not configured'}), 400
         
-        return jsonify({
-            'success': True,
-            'imported_tickets': imported_count,
-            'updated_tickets': updated_count,
-            'total_processed': len(freshdesk_tickets)
-        })
+        job = import_queue.submit('freshdesk_sync', f'freshdesk_sync:{base_url}')
+        return _accepted(job)
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-def extract_customer_name(subject):
-    """Extract customer name from ticket subject"""
-    import re
+@extraction_bp.route('/import-jobs', methods=['GET'])
+def get_import_jobs():
+    """Most recent import jobs, newest first"""
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+        jobs = ImportJob.query.order_by(ImportJob.id.desc()).limit(limit).all()
+        return jsonify({'jobs': [job.to_dict() for job in jobs]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@extraction_bp.route('/import-jobs/<int:job_id>', methods=['GET'])
+def get_import_job(job_id):
+    """Status and, once finished, result of one import job"""
+    try:
+        job = db.session.get(ImportJob, job_id)
+        if job is None:
+            return jsonify({'error': 'Import job not found'}), 404
+        
+        return jsonify(job.to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _accepted(job):
+    import_queue.kick()
+    response = jsonify({'success': True, 'job': job.to_dict()})
+    response.status_code = 202
+    response.headers['Location'] = f'/api/extraction/import-jobs/{job.id}'
+    return response
+
+def run_file_imports(payloads):
+    """Import handler: every queued export file in one transaction, later files winning.
+    
+    Both handlers publish the analytics snapshot for the imported data, so
+    dashboard workers map it rather than build it.
+    """
+    records = {}
+    for payload in payloads:
+        with open(payload['path'], 'r') as f:
+            for ticket_data in json.load(f):
+                records.pop(ticket_data.get('id'), None)
+                records[ticket_data.get('id')] = ticket_data
+    result = import_tickets(list(records.values()))
+    ticket_snapshots.publish()
+    return result
+
+def run_freshdesk_sync(payloads):
+    """Import handler: incremental Freshdesk API sync"""
+    client = FreshdeskClient(current_app.config['FRESHDESK_BASE_URL'], current_app.config['FRESHDESK_API_KEY'])
+    try:
+        result = FreshdeskSync(client, apply=import_tickets).run()
+    finally:
+        client.close()
+    ticket_snapshots.publish()
+    return result
+
+import_queue.register('file', run_file_imports, coalesce=True)
+import_queue.register('freshdesk_sync', run_freshdesk_sync)
+
+def import_tickets(freshdesk_tickets):
+    """Upsert Freshdesk ticket records and refresh derived analytics (commits).
+    
+    Runs as the single import writer (see import_queue); every change up to
+    the archive step is applied in one transaction.
+    """
+    imported_count = 0
+    updated_count = 0
+    skipped_count = 0
+    failed_count = 0
+    touched_dates = set()
+    
+    # Heal an archive move that was interrupted between its commits
+    ticket_archive.remove_duplicates()
+    ticket_archive.remove_orphaned_tags()
+    
+    # Fingerprints of what is already stored, so unchanged records skip all parsing/ORM work
+    known_fingerprints = dict(db.session.query(Ticket.external_id, Ticket.content_hash))
+    archived_fingerprints = ticket_archive.fingerprints()
+    known_fingerprints.update(archived_fingerprints)
+    
+    changed_tickets = []
+    customers_first_seen = {}
+    for ticket_data in freshdesk_tickets:
+        try:
+            external_id = str(ticket_data['id'])
+            content_hash = ticket_fingerprint(ticket_data)
+            if known_fingerprints.get(external_id) == content_hash:
+                skipped_count += 1
+                continue
+            
+            customer_name = ticket_customer_name(ticket_data)
+            customers_first_seen.setdefault(customer_name, ticket_data)
+            changed_tickets.append((ticket_data, external_id, content_hash, customer_name))
+        except Exception:
+            logger.exception('Skipping unreadable ticket %s', ticket_data.get('id'))
+            failed_count += 1
+    
+    # Get or create every referenced customer: O(distinct customers) queries
+    customers = CustomerResolver().resolve_many(customers_first_seen, build_customer)
+    
+    # Archived tickets that changed move back to the hot table to be updated there
+    ticket_archive.restore(external_id for _, external_id, _, _ in changed_tickets
+                           if external_id in archived_fingerprints)
+    
+    for ticket_data, external_id, content_hash, customer_name in changed_tickets:
+        try:
+            values, tags = map_ticket(ticket_data, customers[customer_name].id, content_hash)
+            
+            # Check if ticket already exists
+            existing_ticket = None
+            if external_id in known_fingerprints:
+                existing_ticket = Ticket.query.filter_by(external_id=external_id).first()
+            
+            if existing_ticket:
+                # Update existing ticket
+                for column, value in values.items():
+                    if column not in CREATE_ONLY_COLUMNS:
+                        setattr(existing_ticket, column, value)
+                existing_ticket.set_tags(tags)
+                updated_count += 1
+            else:
+                # Create new ticket
+                new_ticket = Ticket(**values)
+                new_ticket.set_tags(tags)
+                db.session.add(new_ticket)
+                imported_count += 1
+            
+            known_fingerprints[external_id] = content_hash
+            touched_dates.add(values['created_at'].date())
+            
+            # Create outage record if it's an outage
+            if is_outage_ticket(values['subject']):
+                create_outage_record(ticket_data, values['service_type'])
+            
+        except Exception:
+            logger.exception('Skipping ticket %s', ticket_data.get('id'))
+            failed_count += 1
+            continue
+    
+    # Skipped tickets still cross their SLA due times as the clock moves
+    breached_dates = set()
+    breached_count = refresh_time_based_breaches(breached_dates)
+    
+    # Attribute customer tickets to new outages and to outages near the days this import touched
+    db.session.flush()
+    correlate_outages(touched_dates)
+    
+    if imported_count or updated_count or breached_count:
+        # Rebuild latency sketches and hourly counters for the days this import touched
+        if not latency_sketches_backfilled():
+            rebuild_all_latency_sketches()
+        else:
+            refresh_latency_sketches(touched_dates)
+        if HourlyTicketCount.query.first() is None:
+            rebuild_all_hourly_counts()
+        else:
+            refresh_hourly_counts(touched_dates | breached_dates)
+        
+        bump_data_version()
+    
+    # Commit all changes
+    db.session.commit()
+    
+    # Closed tickets past the retention window move to the monthly archive (commits)
+    archived_count = ticket_archive.archive_closed_tickets()
     
-    # Known customer patterns
-    customers = ['Biddex', 'Faysal', 'Tarabezah', 'InstaPrints', 'Intlaq', 'Majalat', 'Toobit', 'POLIGON']
+    # Index outages created by this import
+    outage_index.refresh()
     
-    for customer in customers:
-        if customer.lower() in subject.lower():
+    # Initialize SLA definitions if they don't exist
+    initialize_sla_definitions()
+    
+    return {
+        'imported_tickets': imported_count,
+        'updated_tickets': updated_count,
+        'skipped_tickets': skipped_count,
+        'archived_tickets': archived_count,
+        'failed_tickets': failed_count,
+        'total_processed': len(freshdesk_tickets)
+    }
+
+def ticket_customer_name(ticket_data):
+    """Customer a ticket belongs to: a name in its subject, else one per requester"""
+    return extract_customer_name(ticket_data.get('subject', '')) or f"Customer_{ticket_data.get('requester_id', 'Unknown')}"
+
+def map_ticket(ticket_data, customer_id, content_hash):
+    """Ticket column values and tags for one Freshdesk record.
+    
+    The one field mapping shared by import_tickets and the benchmark seeder
+    (benchmarks/generator.py), so seeded data is exactly what an import stores.
+    """
+    custom_fields = ticket_data.get('custom_fields', {})
+    customer_type = determine_customer_type(custom_fields.get('cf_customer_type', 'Unknown'))
+    
+    # Parse timestamps
+    created_at = datetime.fromisoformat(ticket_data['created_at'].replace('Z', '+00:00'))
+    updated_at = datetime.fromisoformat(ticket_data['updated_at'].replace('Z', '+00:00'))
+    first_response_at, resolved_at = parse_ticket_stats(ticket_data)
+    
+    # Determine service type and issue type
+    subject = ticket_data.get('subject', '')
+    service_type = determine_service_type(subject.lower(), custom_fields)
+    
+    # Calculate SLA information
+    priority = map_priority(ticket_data.get('priority', 2))
+    sla_info = calculate_sla_info(created_at, updated_at, priority, customer_type)
+    
+    # Promoted custom fields get their own columns, the rest stays JSON
+    promoted, extra = split_custom_fields(custom_fields)
+    
+    values = {
+        'external_id': str(ticket_data['id']),
+        'customer_id': customer_id,
+        'product_line': custom_fields.get('cf_product973573', service_type),
+        'priority': priority,
+        'status': map_status(ticket_data.get('status', 2)),
+        'subject': subject,
+        'description': clean_html(ticket_data.get('description', '')),
+        'issue_type': determine_issue_type(subject),
+        'service_type': service_type,
+        'created_at': created_at,
+        'updated_at': updated_at,
+        'first_response_at': first_response_at,
+        'resolved_at': resolved_at,
+        'first_response_due': sla_info['first_response_due'],
+        'resolution_due': sla_info['resolution_due'],
+        'sla_breach': sla_info['sla_breach'],
+        'first_response_breach': sla_info['first_response_breach'],
+        'resolution_breach': sla_info['resolution_breach'],
+        'requester_id': str(ticket_data.get('requester_id', '')),
+        'custom_fields': json.dumps(extra) if extra else None,
+        'content_hash': content_hash,
+        **promoted
+    }
+    return values, normalize_tags(ticket_data.get('tags', []))
+
+def ticket_fingerprint(ticket_data):
+    """Stable content hash of a raw Freshdesk ticket record and the mapping that stored it"""
+    canonical = json.dumps(ticket_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{FINGERPRINT_VERSION}:{canonical}'.encode('utf-8')).hexdigest()
+
+def parse_ticket_stats(ticket_data):
+    """first_response_at and resolved_at from the ``stats`` object (Freshdesk ``include=stats``)"""
+    stats = ticket_data.get('stats') or {}
+    first_responded_at = stats.get('first_responded_at')
+    resolved_at = stats.get('resolved_at') or stats.get('closed_at')
+    return (
+        datetime.fromisoformat(first_responded_at.replace('Z', '+00:00')) if first_responded_at else None,
+        datetime.fromisoformat(resolved_at.replace('Z', '+00:00')) if resolved_at else None
+    )
+
+def determine_customer_type(customer_type_raw):
+    """Map the cf_customer_type custom field to a customer segment"""
+    if 'Enterprise' in customer_type_raw:
+        if 'Egypt' in customer_type_raw or 'KSA' in customer_type_raw or 'Pakistan' in customer_type_raw:
+            return 'local_enterprise'
+        return 'enterprise'
+    elif 'Wholesale' in customer_type_raw:
+        return 'wholesale'
+    elif 'Internal' in customer_type_raw:
+        return 'internal'
+    return 'unknown'
+
+def build_customer(customer_name, ticket_data):
+    """Column values for a new customer, from the first ticket that references it"""
+    custom_fields = ticket_data.get('custom_fields', {})
+    customer_type_raw = custom_fields.get('cf_customer_type', 'Unknown')
+    
+    geography = 'Unknown'
+    if 'Egypt' in customer_type_raw:
+        geography = 'Egypt'
+    elif 'KSA' in customer_type_raw or 'Saudi' in customer_type_raw:
+        geography = 'KSA'
+    elif 'Pakistan' in customer_type_raw:
+        geography = 'Pakistan'
+    
+    return {
+        'name': customer_name,
+        'customer_type': determine_customer_type(customer_type_raw),
+        'geography': geography,
+        'sla_tier': custom_fields.get('cf_customer_tier', 'Standard'),
+        'contact_info': json.dumps({'requester_id': ticket_data.get('requester_id')})
+    }
+
+def extract_customer_name(subject):
+    """Extract customer name from ticket subject"""
+    subject_lower = subject.lower()
+    for customer in KNOWN_CUSTOMERS:
+        if customer.lower() in subject_lower:
             return customer
     
     # Try to extract from patterns
-    patterns = [
-        r'(\w+)\s*\|',  # Customer name before pipe
-        r'\|\s*(\w+)',  # Customer name after pipe
-        r'(\w+)\s*API',  # Customer name before API
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, subject, re.IGNORECASE)
-        for match in matches:
+    for pattern in CUSTOMER_NAME_PATTERNS:
+        for match in pattern.findall(subject):
             if len(match) > 2 and match.isalpha():
                 return match.title()
     
@@ -277,14 +466,47 @@ def calculate_sla_info(created_at, updated_at, priority, customer_type):
         'resolution_breach': resolution_breach
     }
 
+def refresh_time_based_breaches(touched_dates=None):
+    """Flag breaches that happened purely because time passed (mirrors calculate_sla_info).
+    
+    Unchanged tickets are skipped on re-import, so their breach flags are
+    advanced here in two set-based updates instead of per-row recalculation.
+    The creation dates of the flagged tickets are added to ``touched_dates``.
+    """
+    now = datetime.utcnow()
+    
+    first_response_due = and_(
+        Ticket.first_response_breach == False,
+        Ticket.updated_at == Ticket.created_at,
+        Ticket.first_response_due < now
+    )
+    resolution_due = and_(
+        Ticket.resolution_breach == False,
+        Ticket.resolution_due < now
+    )
+    
+    if touched_dates is not None:
+        touched_dates.update(created_at.date() for (created_at,) in db.session.query(Ticket.created_at).filter(
+            or_(first_response_due, resolution_due)
+        ))
+    
+    first_response = Ticket.query.filter(first_response_due).update(
+        {'first_response_breach': True, 'sla_breach': True}, synchronize_session=False
+    )
+    
+    resolution = Ticket.query.filter(resolution_due).update(
+        {'resolution_breach': True, 'sla_breach': True}, synchronize_session=False
+    )
+    
+    return first_response + resolution
+
 def clean_html(text):
     """Remove HTML tags from text"""
-    import re
     if not text:
         return ''
     
     # Remove HTML tags
-    clean = re.sub('<.*?>', '', text)
+    clean = HTML_TAG.sub('', text)
     # Remove extra whitespace
     clean = ' '.join(clean.split())
     return clean[:500]  # Limit length
@@ -294,36 +516,35 @@ def is_outage_ticket(subject):
     outage_indicators = ['outage', 'down', 'connection down', 'triggered:', 'no data:', 'service interruption']
     return any(indicator in subject.lower() for indicator in outage_indicators)
 
-def create_outage_record(ticket_data, service_type):
-    """Create an outage record from ticket data"""
+def map_outage(ticket_data, service_type):
+    """Outage column values for a monitoring alert ticket"""
     subject = ticket_data.get('subject', '')
     created_at = datetime.fromisoformat(ticket_data['created_at'].replace('Z', '+00:00'))
     
     # Determine severity from priority
     priority = ticket_data.get('priority', 2)
     severity_map = {1: 'Low', 2: 'Medium', 3: 'High', 4: 'Critical'}
-    severity = severity_map.get(priority, 'Medium')
     
+    return {
+        'product_line': service_type,
+        'service_type': service_type,
+        'start_time': created_at,
+        # A recovery alert closes the outage it reports
+        'end_time': created_at if 'recovered:' in subject.lower() else None,
+        'severity': severity_map.get(priority, 'Medium'),
+        'root_cause': clean_html(ticket_data.get('description', '')),
+        'ticket_id': ticket_data['id']
+    }
+
+def create_outage_record(ticket_data, service_type):
+    """Create an outage record from ticket data"""
     # Check if outage already exists
     existing_outage = Outage.query.filter_by(
         ticket_id=ticket_data['id']
     ).first()
     
     if not existing_outage:
-        outage = Outage(
-            product_line=service_type,
-            service_type=service_type,
-            start_time=created_at,
-            severity=severity,
-            root_cause=clean_html(ticket_data.get('description', '')),
-            ticket_id=ticket_data['id']
-        )
-        
-        # If it's a recovery ticket, try to find the corresponding trigger
-        if 'recovered:' in subject.lower():
-            outage.end_time = created_at
-        
-        db.session.add(outage)
+        db.session.add(Outage(**map_outage(ticket_data, service_type)))
 
 def initialize_sla_definitions():
     """Initialize SLA definitions if they don't exist"""
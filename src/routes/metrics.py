@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from src.services.request_metrics import request_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus exposition of request metrics, summed across workers"""
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
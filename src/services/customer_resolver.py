@@ -0,0 +1,73 @@
+"""Customer name -> (id, customer_type) resolution for one import run.
+
+The importer resolves every customer a batch of tickets references up front:
+names already resolved in this run cost nothing, the rest are looked up with
+chunked ``IN`` queries, and unknown customers are created in batches, so a
+run issues queries per distinct customer instead of per ticket. The map
+lives only as long as the run, so customers changed or deleted outside the
+import writer are never served stale.
+"""
+from collections import namedtuple
+
+from sqlalchemy import insert
+
+from src.models.user import db
+from src.models.ticket import Customer
+
+LOOKUP_CHUNK = 500
+
+
+class CachedCustomer(namedtuple('CachedCustomer', ['id', 'name', 'customer_type'])):
+    """The customer columns the importer needs, detached from the session"""
+    __slots__ = ()
+
+
+class CustomerResolver:
+    """Name -> CachedCustomer map for a single import run.
+
+    Create one per ``import_tickets`` call (or seeding run) and let it go
+    afterwards. Customers it creates are inserted but not committed; if the
+    run rolls back, the resolver is discarded along with it.
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self._entries = {}
+
+    def resolve_many(self, first_seen, factory):
+        """Map each name to a CachedCustomer, creating missing customers in batches.
+
+        ``first_seen`` maps name -> the first ticket record that referenced it;
+        ``factory(name, record)`` returns the column values for names not in the DB.
+        """
+        resolved = {}
+        missing = []
+        for name in first_seen:
+            entry = self._entries.get(name)
+            if entry is not None:
+                resolved[name] = entry
+            else:
+                missing.append(name)
+
+        for offset in range(0, len(missing), LOOKUP_CHUNK):
+            rows = db.session.query(Customer.id, Customer.name, Customer.customer_type).filter(
+                Customer.name.in_(missing[offset:offset + LOOKUP_CHUNK])
+            ).order_by(Customer.id)
+            for row in rows:
+                if row.name not in resolved:
+                    resolved[row.name] = CachedCustomer(row.id, row.name, row.customer_type)
+
+        to_create = [name for name in missing if name not in resolved]
+        for offset in range(0, len(to_create), self.batch_size):
+            batch = to_create[offset:offset + self.batch_size]
+            # executemany INSERT, then one SELECT to learn the generated ids
+            db.session.execute(insert(Customer), [factory(name, first_seen[name]) for name in batch])
+            rows = db.session.query(Customer.id, Customer.name, Customer.customer_type).filter(
+                Customer.name.in_(batch)
+            ).order_by(Customer.id)
+            for row in rows:
+                if row.name not in resolved:
+                    resolved[row.name] = CachedCustomer(row.id, row.name, row.customer_type)
+
+        self._entries.update(resolved)
+        return resolved
@@ -0,0 +1,97 @@
+"""Server-sent ``data-version`` events for /api/dashboard/events.
+
+The dashboard keeps an EventSource open and reloads its current view when
+the data version changes (i.e. after an import).
+
+Under sync gunicorn workers the Flask route answers every connection with
+the current version and a ``retry`` delay and returns, so the browser polls
+and no worker is pinned by an idle stream. Under the ASGI entry point
+(src/asgi.py) the path is served natively by ``DataVersionEvents``: one
+poller per worker reads the version every ``EVENTS_POLL_SECONDS`` while
+anyone is listening and wakes every open stream on a change, so a thousand
+idle dashboards cost a thousand sleeping coroutines and one query per
+interval.
+"""
+import asyncio
+import json
+import logging
+
+EVENT_NAME = 'data-version'
+KEEPALIVE_SECONDS = 15
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # nginx: pass events through unbuffered
+}
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(version, retry_ms=None):
+    """One event-stream message carrying ``version``"""
+    lines = []
+    if retry_ms is not None:
+        lines.append(f'retry: {int(retry_ms)}')
+    lines += [
+        f'event: {EVENT_NAME}',
+        f'id: {version}',
+        f"data: {json.dumps({'data_version': version})}"
+    ]
+    return '\n'.join(lines) + '\n\n'
+
+
+class DataVersionEvents:
+    """Fans data-version changes out to every open event stream of this process"""
+
+    def __init__(self, read_version, poll_seconds):
+        self.read_version = read_version  # coroutine function returning the current version
+        self.poll_seconds = poll_seconds
+        self.version = None
+        self.listeners = 0
+        self._changed = None
+        self._poller = None
+
+    async def _poll(self):
+        try:
+            while self.listeners:
+                try:
+                    version = await self.read_version()
+                except Exception:
+                    logger.exception('Reading the data version failed')
+                    version = self.version
+                if version != self.version:
+                    self.version = version
+                    changed, self._changed = self._changed, asyncio.Event()
+                    changed.set()
+                await asyncio.sleep(self.poll_seconds)
+        finally:
+            # Unknown until the next poller runs, so a new stream never starts from a stale version
+            self._poller = None
+            self.version = None
+
+    async def stream(self, disconnected):
+        """Yield event-stream text until ``disconnected`` (an asyncio.Event) is set"""
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        self.listeners += 1
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+
+        sent = None
+        retry_ms = self.poll_seconds * 1000
+        disconnect = asyncio.create_task(disconnected.wait())
+        try:
+            while not disconnected.is_set():
+                if self.version is not None and self.version != sent:
+                    sent = self.version
+                    yield format_event(sent, retry_ms)
+                    retry_ms = None
+                change = asyncio.create_task(self._changed.wait())
+                done, _ = await asyncio.wait({change, disconnect}, timeout=KEEPALIVE_SECONDS,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                change.cancel()
+                if not done:
+                    # Keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+        finally:
+            disconnect.cancel()
+            self.listeners -= 1
@@ -0,0 +1,102 @@
+"""Streaming ticket export as CSV or JSON.
+
+Tickets are read newest first in keyset chunks (created_at, then id), each
+chunk its own short query, and the session is closed before the chunk is
+handed on. A download that takes minutes on a slow link therefore holds no
+read transaction or pooled connection while the client is reading, and
+memory stays at one chunk whatever the size of the export.
+"""
+import csv
+import io
+import json
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+
+from src.models.user import db
+
+CHUNK_SIZE = 1000
+FLUSH_BYTES = 64 * 1024
+CSV_COLUMNS = (
+    'id', 'external_id', 'customer_id', 'customer_name', 'customer_type', 'product_line', 'priority', 'status',
+    'subject', 'description', 'issue_type', 'service_type', 'created_at', 'updated_at', 'resolved_at',
+    'first_response_at', 'first_response_due', 'resolution_due', 'sla_breach', 'first_response_breach',
+    'resolution_breach', 'requester_id', 'tags', 'custom_fields'
+)
+FORMATS = {
+    'csv': 'text/csv',
+    'json': 'application/json'
+}
+
+
+def iter_tickets(query, tickets, chunk_size=CHUNK_SIZE):
+    """Yield ``to_dict()`` of every ticket ``query`` selects, newest first.
+
+    ``tickets`` is the entity the query selects (Ticket or an archive-aware
+    source); the query must not be ordered or limited yet.
+    """
+    query = query.options(joinedload(tickets.customer)).order_by(tickets.created_at.desc(), tickets.id.desc())
+    last = None
+    while True:
+        chunk_query = query
+        if last is not None:
+            created_at, ticket_id = last
+            chunk_query = chunk_query.filter(or_(
+                tickets.created_at < created_at,
+                and_(tickets.created_at == created_at, tickets.id < ticket_id)
+            ))
+        chunk = chunk_query.limit(chunk_size).all()
+        rows = [ticket.to_dict() for ticket in chunk]
+        # End the read transaction before a slow client gets to hold it open
+        db.session.close()
+
+        yield from rows
+        if len(chunk) < chunk_size:
+            return
+        last = (chunk[-1].created_at, chunk[-1].id)
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ';'.join(value)
+    if isinstance(value, dict):
+        return json.dumps(value) if value else ''
+    return value
+
+
+def csv_stream(rows):
+    """CSV text in pieces of about FLUSH_BYTES, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in CSV_COLUMNS])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def json_stream(rows):
+    """``{"tickets": [...]}`` in pieces of about FLUSH_BYTES"""
+    pieces = ['{"tickets": [']
+    size = 0
+    separator = '\n'
+    for row in rows:
+        piece = separator + json.dumps(row)
+        separator = ',\n'
+        pieces.append(piece)
+        size += len(piece)
+        if size >= FLUSH_BYTES:
+            yield ''.join(pieces)
+            pieces = []
+            size = 0
+    pieces.append('\n]}\n')
+    yield ''.join(pieces)
+
+
+def export_stream(export_format, rows):
+    if export_format == 'csv':
+        return csv_stream(rows)
+    return json_stream(rows)
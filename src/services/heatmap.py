@@ -0,0 +1,114 @@
+"""Hour-of-week ticket load and breach counters.
+
+One row per day x customer_type x priority holds 24 hourly ticket and
+breach counts. The importer rebuilds only the days it touched, and a
+heatmap for any window sums the matching rows into a 7 x 24 grid, so
+the raw tickets are never re-scanned or re-bucketed at query time.
+"""
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from src.models.user import db
+from src.models.ticket import Customer, HourlyTicketCount
+from src.services.sketches import date_runs
+from src.services.ticket_archive import ticket_archive
+
+HOURS = 24
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def refresh_hourly_counts(dates):
+    """Rebuild the counters for the given ticket creation dates.
+
+    Does not commit; the caller owns the transaction.
+    """
+    for first_day, last_day in date_runs(dates):
+        _rebuild_range(first_day, last_day)
+
+
+def rebuild_all_hourly_counts():
+    """Backfill counters for every date that has tickets"""
+    tickets = ticket_archive.source()
+    first, last = db.session.query(func.min(tickets.created_at), func.max(tickets.created_at)).one()
+    if first is not None:
+        _rebuild_range(first.date(), last.date())
+
+
+def _rebuild_range(first_day, last_day):
+    window_start = datetime.combine(first_day, datetime.min.time())
+    window_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+
+    HourlyTicketCount.query.filter(
+        HourlyTicketCount.date >= first_day,
+        HourlyTicketCount.date <= last_day
+    ).delete(synchronize_session=False)
+
+    tickets = ticket_archive.source(window_start, window_end)
+    rows = db.session.query(
+        tickets.created_at,
+        tickets.priority,
+        tickets.sla_breach,
+        Customer.customer_type
+    ).outerjoin(Customer, tickets.customer_id == Customer.id).filter(
+        tickets.created_at >= window_start,
+        tickets.created_at < window_end
+    ).yield_per(5000)
+
+    counts = defaultdict(lambda: ([0] * HOURS, [0] * HOURS))
+    for row in rows:
+        ticket_counts, breach_counts = counts[(row.created_at.date(), row.customer_type, row.priority)]
+        ticket_counts[row.created_at.hour] += 1
+        if row.sla_breach:
+            breach_counts[row.created_at.hour] += 1
+
+    db.session.bulk_insert_mappings(HourlyTicketCount, [
+        {
+            'date': day,
+            'customer_type': customer_type,
+            'priority': priority,
+            'tickets': json.dumps(ticket_counts),
+            'breaches': json.dumps(breach_counts)
+        }
+        for (day, customer_type, priority), (ticket_counts, breach_counts) in counts.items()
+    ])
+
+
+def hour_of_week(start_date, end_date, customer_type='all', priority='all', utc_offset=0):
+    """7 x 24 ticket and breach grids (Monday first) for a window, at day granularity.
+
+    ``utc_offset`` (whole hours) shifts the UTC counters into local time
+    before they are folded onto weekdays.
+    """
+    query = HourlyTicketCount.query.filter(
+        HourlyTicketCount.date >= start_date.date(),
+        HourlyTicketCount.date <= end_date.date()
+    )
+    if customer_type != 'all':
+        query = query.filter(HourlyTicketCount.customer_type == customer_type)
+    if priority != 'all':
+        query = query.filter(HourlyTicketCount.priority == priority)
+
+    tickets = [[0] * HOURS for _ in WEEKDAYS]
+    breaches = [[0] * HOURS for _ in WEEKDAYS]
+    for row in query:
+        # Hour slots of the week, Monday 00:00 local = 0
+        first_slot = row.date.weekday() * HOURS + utc_offset
+        for hour, (ticket_count, breach_count) in enumerate(zip(json.loads(row.tickets), json.loads(row.breaches))):
+            if ticket_count:
+                day, local_hour = divmod((first_slot + hour) % (len(WEEKDAYS) * HOURS), HOURS)
+                tickets[day][local_hour] += ticket_count
+                breaches[day][local_hour] += breach_count
+    return tickets, breaches
+
+
+def weekday_occurrences(start_date, end_date):
+    """How many times each weekday (Monday first) occurs in the window's days"""
+    occurrences = [0] * len(WEEKDAYS)
+    day = start_date.date()
+    while day <= end_date.date():
+        occurrences[day.weekday()] += 1
+        day += timedelta(days=1)
+    return occurrences
@@ -0,0 +1,229 @@
+"""Single-writer queue for imports.
+
+Any worker can receive an import request, but only one process at a time
+writes. A request records an ``ImportJob`` and returns. The writer is whoever
+holds an exclusive ``fcntl`` lock on ``IMPORT_LOCK_FILE``: a short-lived
+``python -m src.import_writer`` process, started by the request that finds
+the lock free and handed the locked descriptor, which drains the queue
+oldest job first and exits. Imports thus run at full speed outside the web
+workers, which keep serving reads, and survive worker recycling.
+
+* Dedupe: a partial unique index allows one queued or running job per
+  ``source_key``, so concurrent requests for the same source (the same file
+  contents, or the Freshdesk sync) share a job instead of racing on the same
+  tickets and customers.
+* Coalescing: sources registered with ``coalesce=True`` (file imports) hand
+  every queued job to one handler call, i.e. one import transaction.
+* Recovery: the lock dies with its process, so a job still ``running`` when
+  a writer takes the lock was interrupted; it is queued again, up to
+  ``MAX_ATTEMPTS``. Every new submission and every app startup kick the
+  queue, so queued work resumes even if the process that accepted it has
+  gone; status requests only read.
+
+Handlers run inside an app context and return a JSON-serialisable result.
+"""
+import fcntl
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.state import ImportJob
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ACTIVE_STATUSES = ('queued', 'running')
+MAX_ATTEMPTS = 3
+MAX_COALESCED = 20
+
+logger = logging.getLogger(__name__)
+
+
+class WriterLock:
+    """Non-blocking, cross-process exclusive lock on a file.
+
+    flock() locks belong to the open file, so a child process that inherits
+    the descriptor holds the lock until it exits or releases it.
+    """
+
+    def __init__(self, path=None, handle=None):
+        self.path = path
+        self._file = handle
+
+    @classmethod
+    def inherited(cls, fd):
+        return cls(handle=os.fdopen(fd, 'a'))
+
+    def acquire(self):
+        handle = open(self.path, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        """Drop this process's descriptor; the lock stays with any other holder"""
+        self._file.close()
+        self._file = None
+
+    def release(self):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self.close()
+
+
+class ImportQueue:
+
+    def __init__(self):
+        self.lock_path = None
+        self._handlers = {}
+
+    def init_app(self, app):
+        path = app.config.get('IMPORT_LOCK_FILE')
+        if not path:
+            url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+            if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+                # One lock per database file
+                path = f'{os.path.splitext(url.database)[0]}-import.lock'
+            else:
+                path = os.path.join(tempfile.gettempdir(), 'sla-dashboard-import.lock')
+        self.lock_path = path
+
+    def register(self, source, handler, coalesce=False):
+        """``handler(payloads)`` runs one job, or with ``coalesce`` every queued job of the source at once"""
+        self._handlers[source] = (handler, coalesce)
+
+    def submit(self, source, source_key, payload=None):
+        """Queue a job, or join the active job for the same source_key; returns the job (committed)"""
+        if source not in self._handlers:
+            raise ValueError(f"Unknown import source '{source}'")
+        for _ in range(MAX_ATTEMPTS):
+            job = ImportJob.query.filter(
+                ImportJob.source_key == source_key, ImportJob.status.in_(ACTIVE_STATUSES)
+            ).first()
+            if job is not None:
+                joined = ImportJob.query.filter(
+                    ImportJob.id == job.id, ImportJob.status.in_(ACTIVE_STATUSES)
+                ).update({'requests': ImportJob.requests + 1}, synchronize_session=False)
+                db.session.commit()
+                if joined:
+                    db.session.refresh(job)
+                    return job
+                continue  # finished in between; queue a new one
+
+            job = ImportJob(source=source, source_key=source_key, payload=json.dumps(payload or {}))
+            db.session.add(job)
+            try:
+                db.session.commit()
+                return job
+            except IntegrityError:
+                # Another request queued the same source first
+                db.session.rollback()
+        raise RuntimeError(f'Could not queue import for {source_key}')
+
+    def kick(self):
+        """Start a writer process unless one holds the lock; returns whether one was started"""
+        lock = WriterLock(self.lock_path)
+        if not lock.acquire():
+            return False
+        try:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'src.import_writer', str(lock.fileno())],
+                cwd=PROJECT_ROOT, pass_fds=(lock.fileno(),)
+            )
+        finally:
+            lock.close()
+        # Reap the writer when it exits
+        threading.Thread(target=process.wait, name='import-writer-wait', daemon=True).start()
+        return True
+
+    def resume(self):
+        """Kick the queue if any job is queued or was left running; returns whether a writer was started"""
+        if ImportJob.query.filter(ImportJob.status.in_(ACTIVE_STATUSES)).count():
+            return self.kick()
+        return False
+
+    def drain(self, lock):
+        """Run queued jobs until none are left, then release ``lock`` (writer process)"""
+        try:
+            self._recover_interrupted()
+            while True:
+                jobs = self._claim()
+                if not jobs:
+                    break
+                self._run(jobs)
+        except Exception:
+            logger.exception('Import writer stopped')
+            db.session.rollback()
+        finally:
+            lock.release()
+
+        # A job queued while this writer was finishing found the lock taken
+        if ImportJob.query.filter(ImportJob.status == 'queued').count():
+            self.kick()
+        db.session.remove()
+
+    def _recover_interrupted(self):
+        for job in ImportJob.query.filter(ImportJob.status == 'running'):
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = 'failed'
+                job.error = f'Interrupted {job.attempts} times'
+                job.finished_at = datetime.utcnow()
+            else:
+                logger.warning('Requeueing interrupted import job %s', job.id)
+                job.status = 'queued'
+        db.session.commit()
+
+    def _claim(self):
+        """Mark the next job (or all queued jobs of a coalescing source) running"""
+        job = ImportJob.query.filter(ImportJob.status == 'queued').order_by(ImportJob.id).first()
+        if job is None:
+            return []
+        jobs = [job]
+        if job.source in self._handlers and self._handlers[job.source][1]:
+            jobs = ImportJob.query.filter(
+                ImportJob.status == 'queued', ImportJob.source == job.source
+            ).order_by(ImportJob.id).limit(MAX_COALESCED).all()
+
+        now = datetime.utcnow()
+        for claimed in jobs:
+            claimed.status = 'running'
+            claimed.started_at = now
+            claimed.attempts += 1
+        db.session.commit()
+        return jobs
+
+    def _run(self, jobs):
+        job_ids = [job.id for job in jobs]
+        source = jobs[0].source
+        logger.info('Running %s import for job(s) %s', source, job_ids)
+        try:
+            if source not in self._handlers:
+                raise ValueError(f"Unknown import source '{source}'")
+            handler, _ = self._handlers[source]
+            result = handler([json.loads(job.payload or '{}') for job in jobs])
+            status, result, error = 'succeeded', json.dumps(result, default=str), None
+        except Exception as e:
+            logger.exception('Import job(s) %s failed', job_ids)
+            db.session.rollback()
+            status, result, error = 'failed', None, str(e)
+
+        ImportJob.query.filter(ImportJob.id.in_(job_ids)).update({
+            'status': status, 'result': result, 'error': error, 'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+
+import_queue = ImportQueue()
@@ -0,0 +1,147 @@
+"""Attribution of customer tickets to the outages that caused them.
+
+A ticket is attributed to an outage when it was opened on the outage's
+product line inside its impact window: from the outage start until its end
+(``DEFAULT_OUTAGE_DURATION`` after the start while no end is recorded), plus
+``GRACE_PERIOD`` for customers who report late. Per product line, tickets
+and outage windows are swept in time order with a heap of the windows still
+open, so the cost is O((tickets + outages) log outages + links) rather than
+comparing every outage with every ticket.
+
+Tickets that opened an outage record (monitoring alerts, "connection down"
+reports) are the outage itself and are not attributed to it.
+
+The importer reruns the sweep incrementally: only outages added since the
+last run (an AppState watermark) and outages whose window touches a day with
+new or changed tickets are recomputed.
+"""
+import bisect
+import heapq
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_, delete, insert, or_, update
+
+from src.models.user import db
+from src.models.ticket import Outage, OutageTicket
+from src.models.state import get_state, set_state
+from src.services.ticket_archive import ticket_archive
+
+WATERMARK_KEY = 'outage_correlation_last_id'
+DEFAULT_OUTAGE_DURATION = timedelta(hours=2)
+GRACE_PERIOD = timedelta(hours=1)
+CHUNK_SIZE = 500
+
+
+def impact_window(start_time, end_time):
+    """[start, end] during which new tickets on the product line are attributed to the outage"""
+    end = end_time if end_time is not None else start_time + DEFAULT_OUTAGE_DURATION
+    return start_time, max(end, start_time) + GRACE_PERIOD
+
+
+def sweep(windows, tickets):
+    """Yield (outage_id, ticket) for every ticket inside a window.
+
+    ``windows`` are (start, end, outage_id) sorted by start; ``tickets`` are
+    tuples whose first item is the creation time, sorted by it.
+    """
+    open_windows = []  # min-heap of (end, outage_id)
+    next_window = 0
+    for ticket in tickets:
+        created_at = ticket[0]
+        while next_window < len(windows) and windows[next_window][0] <= created_at:
+            start, end, outage_id = windows[next_window]
+            heapq.heappush(open_windows, (end, outage_id))
+            next_window += 1
+        while open_windows and open_windows[0][0] < created_at:
+            heapq.heappop(open_windows)
+        for _, outage_id in open_windows:
+            yield outage_id, ticket
+
+
+def correlate_outages(touched_dates=()):
+    """Recompute attribution for new outages and those near ``touched_dates``.
+
+    Returns the number of outages recomputed. Does not commit; the caller
+    owns the transaction and should flush new outages and tickets first.
+    """
+    last_id = int(get_state(WATERMARK_KEY, 0))
+    columns = (Outage.id, Outage.product_line, Outage.start_time, Outage.end_time)
+    outages = db.session.query(*columns).filter(Outage.id > last_id).all()
+
+    if touched_dates:
+        touched = sorted(touched_dates)
+        range_start = datetime.combine(touched[0], time.min)
+        range_end = datetime.combine(touched[-1] + timedelta(days=1), time.min)
+        nearby = db.session.query(*columns).filter(
+            Outage.id <= last_id,
+            Outage.start_time < range_end,
+            or_(
+                Outage.end_time >= range_start - GRACE_PERIOD,
+                and_(Outage.end_time.is_(None),
+                     Outage.start_time >= range_start - DEFAULT_OUTAGE_DURATION - GRACE_PERIOD)
+            )
+        ).all()
+        for outage in nearby:
+            window_start, window_end = impact_window(outage.start_time, outage.end_time)
+            # Any touched day between the window's first and last day?
+            i = bisect.bisect_left(touched, window_start.date())
+            if i < len(touched) and touched[i] <= window_end.date():
+                outages.append(outage)
+
+    if outages:
+        _recompute(outages)
+        set_state(WATERMARK_KEY, max(last_id, max(outage.id for outage in outages)))
+    return len(outages)
+
+
+def _recompute(outages):
+    outage_ids = [outage.id for outage in outages]
+    for i in range(0, len(outage_ids), CHUNK_SIZE):
+        db.session.execute(delete(OutageTicket).where(OutageTicket.outage_id.in_(outage_ids[i:i + CHUNK_SIZE])))
+
+    windows = defaultdict(list)
+    for outage in outages:
+        windows[outage.product_line].append((*impact_window(outage.start_time, outage.end_time), outage.id))
+    for product_windows in windows.values():
+        product_windows.sort()
+    span_start = min(window[0] for product_windows in windows.values() for window in product_windows)
+    span_end = max(window[1] for product_windows in windows.values() for window in product_windows)
+
+    # Outage.ticket_id holds the Freshdesk id of the ticket that opened the outage
+    outage_sources = {str(ticket_id) for (ticket_id,) in db.session.query(Outage.ticket_id).distinct()}
+
+    tickets = ticket_archive.source(span_start, span_end)
+    rows = db.session.query(
+        tickets.created_at, tickets.id, tickets.customer_id, tickets.service_type, tickets.external_id
+    ).filter(
+        tickets.created_at >= span_start,
+        tickets.created_at <= span_end,
+        tickets.service_type.in_([product for product in windows if product is not None])
+    ).order_by(tickets.created_at).yield_per(10000)
+
+    by_product = defaultdict(list)
+    for row in rows:
+        if row.external_id not in outage_sources:
+            by_product[row.service_type].append(row)
+
+    links = []
+    affected_tickets = defaultdict(int)
+    affected_customers = defaultdict(set)
+    for product, product_windows in windows.items():
+        for outage_id, ticket in sweep(product_windows, by_product.get(product, [])):
+            links.append({'outage_id': outage_id, 'ticket_id': ticket.id})
+            affected_tickets[outage_id] += 1
+            if ticket.customer_id is not None:
+                affected_customers[outage_id].add(ticket.customer_id)
+
+    if links:
+        db.session.execute(insert(OutageTicket), links)
+    db.session.execute(update(Outage), [
+        {
+            'id': outage_id,
+            'affected_tickets': affected_tickets[outage_id],
+            'affected_customers': len(affected_customers[outage_id])
+        }
+        for outage_id in outage_ids
+    ])
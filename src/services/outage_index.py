@@ -0,0 +1,163 @@
+"""In-memory interval index over outages.
+
+Outages are kept per product line, sorted by start time, with a max-end
+segment tree for overlap reporting and prefix sums over starts/ends so the
+downtime clipped to a window is answered with two binary searches.
+"""
+import bisect
+import threading
+from datetime import datetime, timezone
+
+from src.models.ticket import Outage
+
+EPOCH = datetime(1970, 1, 1)
+ALL_PRODUCTS = '__all__'
+
+
+def to_timestamp(value):
+    """Convert a (naive UTC or aware) datetime to epoch seconds"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH).total_seconds()
+
+
+class IntervalSet:
+    """Static interval structure built from (start, end, outage_id) tuples.
+
+    Ongoing outages have ``end=None`` and are treated as still open.
+    """
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals, key=lambda item: item[0])
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end if end is not None else float('inf') for _, end, _ in intervals]
+        self.ids = [outage_id for _, _, outage_id in intervals]
+
+        # Max-end segment tree over the start-sorted order
+        size = 1
+        while size < len(intervals):
+            size *= 2
+        self._size = size
+        self._max_end = [float('-inf')] * (2 * size)
+        for i, end in enumerate(self.ends):
+            self._max_end[size + i] = end
+        for node in range(size - 1, 0, -1):
+            self._max_end[node] = max(self._max_end[2 * node], self._max_end[2 * node + 1])
+
+        # Prefix sums for sum(min(x, T)) over starts and finite ends
+        self._start_prefix = _prefix_sums(self.starts)
+        self._finite_ends = sorted(end for end in self.ends if end != float('inf'))
+        self._end_prefix = _prefix_sums(self._finite_ends)
+        self._ongoing = len(self.ends) - len(self._finite_ends)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def overlapping(self, start, end):
+        """Indices of intervals overlapping [start, end], in start order"""
+        limit = bisect.bisect_right(self.starts, end)
+        if limit == 0:
+            return []
+
+        found = []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or self._max_end[node] < start:
+                continue
+            if hi - lo == 1:
+                found.append(lo)
+                continue
+            mid = (lo + hi) // 2
+            # Push right first so the left half is reported first
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return found
+
+    def active_seconds(self, until):
+        """Total outage time (summed over outages) before ``until``"""
+        ends = _sum_min(self._finite_ends, self._end_prefix, until) + self._ongoing * until
+        return ends - _sum_min(self.starts, self._start_prefix, until)
+
+    def clipped_seconds(self, start, end):
+        """Total outage time (summed over outages) inside [start, end]"""
+        if end <= start:
+            return 0.0
+        return self.active_seconds(end) - self.active_seconds(start)
+
+
+def _prefix_sums(values):
+    prefix = [0.0]
+    for value in values:
+        prefix.append(prefix[-1] + value)
+    return prefix
+
+
+def _sum_min(sorted_values, prefix, bound):
+    """sum(min(v, bound) for v in sorted_values) in O(log n)"""
+    count = bisect.bisect_right(sorted_values, bound)
+    return prefix[count] + (len(sorted_values) - count) * bound
+
+
+class OutageIndex:
+    """Per-product interval index, refreshed incrementally from the outages table.
+
+    Outages are append-only (the importer never edits them), so a refresh only
+    loads rows with an id above the highest one already indexed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._intervals = {}
+        self._sets = {}
+        self._last_id = 0
+
+    def refresh(self):
+        """Pull outages added since the last refresh and rebuild affected products"""
+        with self._lock:
+            rows = Outage.query.with_entities(
+                Outage.id, Outage.product_line, Outage.start_time, Outage.end_time
+            ).filter(Outage.id > self._last_id).order_by(Outage.id).all()
+
+            if not rows:
+                return 0
+
+            touched = {ALL_PRODUCTS}
+            for row in rows:
+                interval = (
+                    to_timestamp(row.start_time),
+                    to_timestamp(row.end_time) if row.end_time else None,
+                    row.id
+                )
+                product = row.product_line or 'Unknown'
+                self._intervals.setdefault(product, []).append(interval)
+                self._intervals.setdefault(ALL_PRODUCTS, []).append(interval)
+                touched.add(product)
+
+            sets = dict(self._sets)
+            for product in touched:
+                sets[product] = IntervalSet(self._intervals[product])
+            self._sets = sets
+            self._last_id = rows[-1].id
+            return len(rows)
+
+    def _set_for(self, product_line):
+        return self._sets.get(product_line or ALL_PRODUCTS)
+
+    def overlapping(self, start, end, product_line=None):
+        """Ids of outages overlapping [start, end], ordered by start time"""
+        interval_set = self._set_for(product_line)
+        if interval_set is None:
+            return []
+        indices = interval_set.overlapping(to_timestamp(start), to_timestamp(end))
+        return [interval_set.ids[i] for i in indices]
+
+    def downtime_minutes(self, start, end, product_line=None):
+        """Summed outage minutes clipped to [start, end]"""
+        interval_set = self._set_for(product_line)
+        if interval_set is None:
+            return 0.0
+        return interval_set.clipped_seconds(to_timestamp(start), to_timestamp(end)) / 60
+
+
+outage_index = OutageIndex()
@@ -0,0 +1,171 @@
+"""Production diagnostics: slow-query log and on-demand request profiling.
+
+Statements slower than ``SLOW_QUERY_MS`` are logged to the ``slow_queries``
+logger with their parameters, duration, endpoint and query plan. Durations
+come from the statement timing in request_metrics. The plan comes from
+``EXPLAIN [QUERY PLAN]`` run on a separate raw DBAPI cursor of the same
+connection, so it reflects the statement that actually ran; on PostgreSQL it
+runs inside a savepoint, so a failing EXPLAIN cannot abort the request's
+transaction.
+
+A request carrying ``X-Profile-Token: <PROFILE_TOKEN>`` is run under a
+sampling profiler. The response body is then replaced by the folded stacks
+(``frame;frame;frame count``), ready for flamegraph.pl or speedscope.
+Profiling is off unless ``PROFILE_TOKEN`` is set. The token is only read
+from the header, never the query string, so it stays out of access logs,
+browser history and Referer headers.
+"""
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, current_app, g, has_request_context, request
+
+from src.services.request_metrics import request_metrics
+
+slow_query_logger = logging.getLogger('slow_queries')
+
+SAMPLE_INTERVAL = 0.002  # seconds between profiler samples
+MAX_PARAMETER_LENGTH = 500
+EXPLAIN_SAVEPOINT = 'slow_query_explain'
+
+
+class SlowQueryLog:
+    """Logs statements that take longer than a threshold, with their plan"""
+
+    def __init__(self):
+        self.threshold = None  # seconds; None disables the log
+
+    def init_app(self, app):
+        threshold_ms = app.config.get('SLOW_QUERY_MS')
+        self.threshold = threshold_ms / 1000 if threshold_ms and threshold_ms > 0 else None
+        request_metrics.on_query(self.record)
+
+    def record(self, conn, cursor, statement, parameters, executemany, duration):
+        if self.threshold is None or duration < self.threshold:
+            return
+
+        entry = {
+            'duration_ms': round(duration * 1000, 1),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'statement': statement,
+            'parameters': repr(parameters)[:MAX_PARAMETER_LENGTH],
+            'executemany': executemany,
+            'plan': None if executemany else self._explain(conn, statement, parameters)
+        }
+        slow_query_logger.warning('slow query %s', json.dumps(entry, default=str))
+
+    @staticmethod
+    def _explain(conn, statement, parameters):
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif dialect == 'postgresql':
+            prefix = 'EXPLAIN '
+        else:
+            return None
+
+        # A separate raw cursor: the original one may still hold unread rows. A failed
+        # statement aborts a PostgreSQL transaction, so shield the request's with a savepoint
+        savepoint = dialect == 'postgresql'
+        explain_cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if savepoint:
+                explain_cursor.execute(f'SAVEPOINT {EXPLAIN_SAVEPOINT}')
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                rows = explain_cursor.fetchall()
+            except Exception as e:
+                if savepoint:
+                    explain_cursor.execute(f'ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}')
+                return f'EXPLAIN failed: {e}'
+            if savepoint:
+                explain_cursor.execute(f'RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}')
+        except Exception as e:
+            return f'EXPLAIN failed: {e}'
+        finally:
+            explain_cursor.close()
+
+        if dialect == 'sqlite':
+            return '\n'.join(row[-1] for row in rows)
+        return '\n'.join(row[0] for row in rows)
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        """Brendan Gregg's collapsed-stack format, heaviest stacks first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+class RequestProfiler:
+    """Runs token-authorized requests under a SamplingProfiler"""
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    @staticmethod
+    def _authorized():
+        token = current_app.config.get('PROFILE_TOKEN')
+        if not token:
+            return False
+        supplied = request.headers.get('X-Profile-Token')
+        return bool(supplied) and hmac.compare_digest(supplied.encode(), token.encode())
+
+    def _before_request(self):
+        if self._authorized():
+            g.profiler = SamplingProfiler(threading.get_ident())
+            g.profile_started = time.perf_counter()
+            g.profiler.start()
+
+    def _after_request(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+
+        elapsed_ms = (time.perf_counter() - g.pop('profile_started')) * 1000
+        profile = Response(profiler.folded(), mimetype='text/plain')
+        profile.headers['X-Profile-Status'] = str(response.status_code)
+        profile.headers['X-Profile-Samples'] = str(sum(profiler.samples.values()))
+        profile.headers['X-Profile-Duration-Ms'] = f'{elapsed_ms:.1f}'
+        return profile
+
+
+slow_query_log = SlowQueryLog()
+request_profiler = RequestProfiler()
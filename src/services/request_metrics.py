@@ -0,0 +1,312 @@
+"""Per-request performance instrumentation.
+
+Every request records its latency, the number of SQL statements and the
+time spent in them (SQLAlchemy cursor events, also handed to the slow-query
+log), the ORM objects it materialized and the response size. The numbers go
+out with the response as a ``Server-Timing`` header. They are also
+accumulated per endpoint for the Prometheus ``/metrics`` endpoint.
+
+gunicorn workers are separate processes, so a background thread in each
+worker writes its totals (at most once a second) to
+``<METRICS_DIR>/worker-<pid>-<token>.json`` while the worker holds an flock
+on a matching ``.lock`` file. ``/metrics`` sums every worker file. When a
+worker has exited (its lock can be taken), its totals are folded into
+``archive.json``, so counters stay monotonic across worker restarts.
+"""
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FLUSH_INTERVAL = 1.0  # seconds between worker file writes (when something changed)
+ARCHIVE_FILE = 'archive.json'
+COMPACT_LOCK = 'compact.lock'
+
+COUNTERS = ('count', 'duration_sum', 'queries', 'sql_seconds', 'orm_objects', 'response_bytes')
+
+
+def _new_series():
+    series = dict.fromkeys(COUNTERS, 0)
+    series['buckets'] = [0] * len(LATENCY_BUCKETS)
+    return series
+
+
+def _merge(into, records):
+    """Add serialized series ``records`` into the ``into`` dict keyed by labels"""
+    for record in records:
+        key = (record['endpoint'], record['method'], record['status'])
+        series = into.setdefault(key, _new_series())
+        for name in COUNTERS:
+            series[name] += record[name]
+        series['buckets'] = [a + b for a, b in zip(series['buckets'], record['buckets'])]
+
+
+def _serialize(series_by_key):
+    return [
+        {'endpoint': endpoint, 'method': method, 'status': status, **series}
+        for (endpoint, method, status), series in series_by_key.items()
+    ]
+
+
+class RequestMetrics:
+    """Collects request metrics for one process and shares them through a directory"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._directory = None
+        self._worker_pid = None
+        self._worker_name = None
+        self._lock_file = None
+        self._dirty = False
+        self._query_listeners = []
+
+    def init_app(self, app):
+        self._directory = app.config.get('METRICS_DIR') or None
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        atexit.register(self.flush)
+
+    # Collection
+
+    @staticmethod
+    def _current():
+        if has_app_context():
+            return g.get('request_metrics')
+        return None
+
+    def _before_request(self):
+        g.request_metrics = {'start': time.perf_counter(), 'queries': 0, 'sql_seconds': 0.0, 'orm_objects': 0}
+
+    def _after_request(self, response):
+        current = self._current()
+        if current is None:
+            return response
+
+        duration = time.perf_counter() - current['start']
+        if response.is_streamed:
+            response_bytes = 0  # generated after this hook runs
+        else:
+            response_bytes = response.calculate_content_length() or 0
+
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={current["sql_seconds"] * 1000:.1f};desc="{current["queries"]} queries"',
+            f'app;dur={(duration - current["sql_seconds"]) * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}'
+        ])
+
+        key = (request.endpoint or 'unmatched', request.method, str(response.status_code))
+        with self._lock:
+            series = self._series.setdefault(key, _new_series())
+            series['count'] += 1
+            series['duration_sum'] += duration
+            series['queries'] += current['queries']
+            series['sql_seconds'] += current['sql_seconds']
+            series['orm_objects'] += current['orm_objects']
+            series['response_bytes'] += response_bytes
+            self._dirty = True
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    series['buckets'][index] += 1
+                    break
+
+        if self._directory:
+            self._open_worker_file()
+        return response
+
+    def on_query(self, listener):
+        """Also pass every timed statement to ``listener(conn, cursor, statement, parameters, executemany, seconds)``"""
+        if listener not in self._query_listeners:
+            self._query_listeners.append(listener)
+
+    def record_query(self, conn, cursor, statement, parameters, executemany, seconds):
+        current = self._current()
+        if current is not None:
+            current['queries'] += 1
+            current['sql_seconds'] += seconds
+        for listener in self._query_listeners:
+            listener(conn, cursor, statement, parameters, executemany, seconds)
+
+    def record_loaded(self):
+        current = self._current()
+        if current is not None:
+            current['orm_objects'] += 1
+
+    # Sharing across workers
+
+    def _open_worker_file(self):
+        """Claim this process's file names; re-run after fork (pid changes)"""
+        if self._worker_pid == os.getpid():
+            return
+        if self._worker_pid is not None:
+            # Forked child: the parent's totals and lock belong to the parent
+            with self._lock:
+                self._series = {}
+            self._lock_file = None
+
+        os.makedirs(self._directory, exist_ok=True)
+        self._worker_pid = os.getpid()
+        self._worker_name = f'worker-{self._worker_pid}-{uuid.uuid4().hex[:8]}'
+        with open(os.path.join(self._directory, COMPACT_LOCK), 'w') as compact_lock:
+            # Keep the compactor from seeing the lock file before it is held
+            fcntl.flock(compact_lock, fcntl.LOCK_SH)
+            self._lock_file = open(os.path.join(self._directory, f'{self._worker_name}.lock'), 'w')
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+
+        # Threads do not survive fork, so each worker starts its own flusher
+        threading.Thread(target=self._flush_periodically, name='request-metrics-flush', daemon=True).start()
+
+    def _flush_periodically(self):
+        pid = os.getpid()
+        while self._worker_pid == pid:
+            time.sleep(FLUSH_INTERVAL)
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """Write this worker's totals to its file (atomic replace)"""
+        if not self._directory:
+            return
+        if not self._series and self._worker_pid != os.getpid():
+            return  # nothing served yet (e.g. the gunicorn master at exit)
+        self._open_worker_file()
+        with self._lock:
+            payload = json.dumps(_serialize(self._series))
+            self._dirty = False
+
+        fd, staging = tempfile.mkstemp(prefix='.worker-', dir=self._directory)
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+        os.replace(staging, os.path.join(self._directory, f'{self._worker_name}.json'))
+
+    def _compact(self):
+        """Fold the files of exited workers into the archive"""
+        with open(os.path.join(self._directory, COMPACT_LOCK), 'w') as compact_lock:
+            fcntl.flock(compact_lock, fcntl.LOCK_EX)
+            dead = []
+            for name in os.listdir(self._directory):
+                if not name.endswith('.lock') or not name.startswith('worker-'):
+                    continue
+                with open(os.path.join(self._directory, name), 'r') as worker_lock:
+                    try:
+                        fcntl.flock(worker_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # still running
+                    dead.append(name[:-len('.lock')])
+            if not dead:
+                return
+
+            archive = {}
+            _merge(archive, self._read(ARCHIVE_FILE))
+            for worker_name in dead:
+                _merge(archive, self._read(f'{worker_name}.json'))
+
+            fd, staging = tempfile.mkstemp(prefix='.archive-', dir=self._directory)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(_serialize(archive), f)
+            os.replace(staging, os.path.join(self._directory, ARCHIVE_FILE))
+            for worker_name in dead:
+                for suffix in ('.json', '.lock'):
+                    try:
+                        os.remove(os.path.join(self._directory, worker_name + suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self._directory, name), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def collect(self):
+        """Totals across every worker (or this process when no directory is set)"""
+        totals = {}
+        if not self._directory:
+            with self._lock:
+                _merge(totals, _serialize(self._series))
+            return totals
+
+        self.flush()
+        self._compact()
+        with open(os.path.join(self._directory, COMPACT_LOCK), 'w') as compact_lock:
+            fcntl.flock(compact_lock, fcntl.LOCK_SH)
+            for name in os.listdir(self._directory):
+                if name == ARCHIVE_FILE or (name.startswith('worker-') and name.endswith('.json')):
+                    _merge(totals, self._read(name))
+        return totals
+
+    def render(self):
+        """Prometheus text exposition of ``collect()``"""
+        totals = self.collect()
+        lines = []
+
+        def family(name, metric_type, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+        def labels(key, **extra):
+            endpoint, method, status = key
+            pairs = {'endpoint': endpoint, 'method': method, 'status': status, **extra}
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs.items()) + '}'
+
+        ordered = sorted(totals.items())
+
+        family('http_request_duration_seconds', 'histogram', 'Request latency by endpoint.')
+        for key, series in ordered:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series['buckets']):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{labels(key, le=bound)} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{labels(key, le="+Inf")} {series["count"]}')
+            lines.append(f'http_request_duration_seconds_sum{labels(key)} {series["duration_sum"]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{labels(key)} {series["count"]}')
+
+        for name, field, help_text in (
+            ('http_request_sql_queries_total', 'queries', 'SQL statements executed while serving requests.'),
+            ('http_request_sql_seconds_total', 'sql_seconds', 'Time spent executing SQL while serving requests.'),
+            ('http_request_orm_objects_total', 'orm_objects', 'ORM objects loaded while serving requests.'),
+            ('http_response_bytes_total', 'response_bytes', 'Response body bytes (non-streamed responses).')
+        ):
+            family(name, 'counter', help_text)
+            for key, series in ordered:
+                value = series[field]
+                lines.append(f'{name}{labels(key)} {value:.6f}' if isinstance(value, float) else
+                             f'{name}{labels(key)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['query_start'].pop()
+    request_metrics.record_query(conn, cursor, statement, parameters, executemany, seconds)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+
+
+@event.listens_for(Session, 'loaded_as_persistent')
+def _loaded_as_persistent(session, instance):
+    request_metrics.record_loaded()
@@ -0,0 +1,143 @@
+"""Per-customer SLA scorecard.
+
+Counts come from one grouped aggregate over the window (one row per
+customer), and outage exposure from a second one over outage_tickets. For
+every sort except ``outages`` the database orders the groups and returns
+only the requested page, so the cost in Python is one page whatever the
+number of customers or the page requested. Sorting by ``outages`` needs the
+exposure of every customer: all groups are read into dicts and the page is
+cut from a bounded heap of ``page * per_page`` rows, which is O(n log k) but
+still O(n) memory and approaches a full sort on deep pages. Latency
+percentiles are computed afterwards for the customers on the page only.
+"""
+import heapq
+from collections import defaultdict
+
+from sqlalchemy import case, func
+
+from src.models.user import db
+from src.models.ticket import Customer, OutageTicket
+from src.services.sketches import DDSketch, METRICS, summarize
+from src.services.ticket_archive import ticket_archive
+
+OPEN_STATUSES = ('Open', 'Pending', 'Escalated')
+SORTS = ('breaches', 'breach_rate', 'tickets', 'open', 'outages', 'name')
+
+
+def _count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def validate_page(sort, page, per_page):
+    """Raise ValueError for a sort or page the scorecard cannot serve"""
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(SORTS)}")
+    if page < 1 or per_page < 1:
+        raise ValueError('page and per_page must be positive')
+
+
+def customer_scorecard(start_date, end_date, percentiles, sort='breaches', descending=True,
+                       page=1, per_page=50, customer_type='all', min_tickets=1):
+    """One page of customer scorecards for [start_date, end_date] and the total count"""
+    validate_page(sort, page, per_page)
+
+    tickets = ticket_archive.source(start_date, end_date)
+    in_window = (tickets.created_at >= start_date, tickets.created_at <= end_date)
+
+    total_tickets = func.count(tickets.id)
+    sla_breaches = _count_where(tickets.sla_breach == True)
+    open_tickets = _count_where(tickets.status.in_(OPEN_STATUSES))
+    query = db.session.query(
+        Customer.id,
+        Customer.name,
+        Customer.customer_type,
+        Customer.sla_tier,
+        total_tickets.label('total_tickets'),
+        sla_breaches.label('sla_breaches'),
+        _count_where(tickets.first_response_breach == True).label('first_response_breaches'),
+        _count_where(tickets.resolution_breach == True).label('resolution_breaches'),
+        open_tickets.label('open_tickets')
+    ).join(tickets, tickets.customer_id == Customer.id).filter(*in_window)
+    if customer_type != 'all':
+        query = query.filter(Customer.customer_type == customer_type)
+    query = query.group_by(Customer.id, Customer.name, Customer.customer_type, Customer.sla_tier)
+    if min_tickets > 1:
+        query = query.having(total_tickets >= min_tickets)
+
+    if sort == 'outages':
+        exposure = _exposure(tickets, in_window)
+        cards = [_card(row, exposure.get(row.id)) for row in query]
+        # Only the first page * per_page ranks are needed; ties go to the lower customer id
+        if descending:
+            ranked = heapq.nlargest(page * per_page, cards, key=lambda card: (card['outages'], -card['customer_id']))
+        else:
+            ranked = heapq.nsmallest(page * per_page, cards, key=lambda card: (card['outages'], card['customer_id']))
+        items = ranked[(page - 1) * per_page:]
+        total = len(cards)
+    else:
+        sort_column = {
+            'breaches': sla_breaches,
+            'breach_rate': sla_breaches * 1.0 / total_tickets,
+            'tickets': total_tickets,
+            'open': open_tickets,
+            'name': func.lower(func.coalesce(Customer.name, ''))
+        }[sort]
+        total = db.session.query(func.count()).select_from(query.subquery()).scalar()
+        rows = query.order_by(
+            sort_column.desc() if descending else sort_column.asc(), Customer.id
+        ).limit(per_page).offset((page - 1) * per_page).all()
+        exposure = _exposure(tickets, in_window, [row.id for row in rows]) if rows else {}
+        items = [_card(row, exposure.get(row.id)) for row in rows]
+
+    _add_percentiles(items, tickets, in_window, percentiles)
+    return items, total
+
+
+def _exposure(tickets, in_window, customer_ids=None):
+    """Distinct outages and outage-linked tickets per customer in the window"""
+    query = db.session.query(
+        tickets.customer_id,
+        func.count(func.distinct(OutageTicket.outage_id)).label('outages'),
+        func.count(func.distinct(OutageTicket.ticket_id)).label('outage_tickets')
+    ).join(OutageTicket, OutageTicket.ticket_id == tickets.id).filter(*in_window)
+    if customer_ids is not None:
+        query = query.filter(tickets.customer_id.in_(customer_ids))
+    return {row.customer_id: row for row in query.group_by(tickets.customer_id)}
+
+
+def _card(row, outage_row):
+    return {
+        'customer_id': row.id,
+        'name': row.name,
+        'customer_type': row.customer_type,
+        'sla_tier': row.sla_tier,
+        'total_tickets': row.total_tickets,
+        'sla_breaches': row.sla_breaches,
+        'first_response_breaches': row.first_response_breaches,
+        'resolution_breaches': row.resolution_breaches,
+        'open_tickets': row.open_tickets,
+        'breach_rate': round(row.sla_breaches / row.total_tickets * 100, 2),
+        'sla_compliance_rate': round((row.total_tickets - row.sla_breaches) / row.total_tickets * 100, 2),
+        'outages': outage_row.outages if outage_row else 0,
+        'outage_tickets': outage_row.outage_tickets if outage_row else 0
+    }
+
+
+def _add_percentiles(cards, tickets, in_window, percentiles):
+    """Response/resolution percentiles (hours) for the given customers only"""
+    if not cards:
+        return
+    sketches = defaultdict(lambda: {metric: DDSketch() for metric in METRICS})
+    rows = db.session.query(
+        tickets.customer_id, tickets.created_at, tickets.first_response_at, tickets.resolved_at
+    ).filter(*in_window, tickets.customer_id.in_([card['customer_id'] for card in cards]))
+    for row in rows:
+        if row.first_response_at:
+            sketches[row.customer_id]['response'].add((row.first_response_at - row.created_at).total_seconds() / 3600)
+        if row.resolved_at:
+            sketches[row.customer_id]['resolution'].add((row.resolved_at - row.created_at).total_seconds() / 3600)
+
+    for card in cards:
+        customer_sketches = sketches[card['customer_id']]
+        card['response_time_percentiles_hours'] = summarize(customer_sketches['response'], percentiles)
+        card['resolution_time_percentiles_hours'] = summarize(customer_sketches['resolution'], percentiles)
@@ -0,0 +1,129 @@
+"""Full-text search over ticket subject and description.
+
+SQLite uses an external-content FTS5 table kept in sync with ``tickets`` by
+triggers, so every importer write (insert, subject/description update,
+delete) updates the index in the same transaction. PostgreSQL uses a GIN
+index over the equivalent ``to_tsvector`` expression. Results are ranked
+with bm25 / ts_rank.
+"""
+import re
+
+from sqlalchemy import column, false, func, insert, literal, or_, select, table, text
+
+from src.models.user import db
+from src.models.ticket import Ticket
+
+FTS_TABLE = 'tickets_fts'
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        subject, description, content='tickets', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS tickets_fts_insert AFTER INSERT ON tickets BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tickets_fts_delete AFTER DELETE ON tickets BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, subject, description)
+        VALUES ('delete', old.id, old.subject, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tickets_fts_update AFTER UPDATE OF subject, description ON tickets BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, subject, description)
+        VALUES ('delete', old.id, old.subject, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+]
+
+POSTGRES_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_tickets_search ON tickets USING GIN (
+        to_tsvector('simple', coalesce(subject, '') || ' ' || coalesce(description, ''))
+    )""",
+]
+
+fts = table(FTS_TABLE, column('rowid'), column('rank'), column(FTS_TABLE))
+fts_rows = table(FTS_TABLE, column(FTS_TABLE), column('rowid'), column('subject'), column('description'))
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def ensure_search_index():
+    """Create the search index for the active backend (idempotent)"""
+    dialect = _dialect()
+    with db.engine.begin() as conn:
+        if dialect == 'sqlite':
+            created = conn.execute(text(
+                "SELECT count(*) FROM sqlite_master WHERE name = :name"
+            ), {'name': FTS_TABLE}).scalar() == 0
+            for statement in SQLITE_DDL:
+                conn.execute(text(statement))
+            if created:
+                # Index tickets imported before search existed
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        elif dialect == 'postgresql':
+            for statement in POSTGRES_DDL:
+                conn.execute(text(statement))
+
+
+def index_rows(source, ids):
+    """Add rows of another table with the tickets layout (an archive partition) to the SQLite index.
+
+    The triggers only see the ``tickets`` table, so callers moving rows out of
+    it re-index them here. Does not commit.
+    """
+    db.session.execute(insert(fts_rows).from_select(
+        ['rowid', 'subject', 'description'],
+        select(source.c.id, source.c.subject, source.c.description).where(source.c.id.in_(ids))
+    ))
+
+
+def unindex_rows(source, ids):
+    """Remove rows indexed by index_rows(); ``source`` must still hold them"""
+    db.session.execute(insert(fts_rows).from_select(
+        [FTS_TABLE, 'rowid', 'subject', 'description'],
+        select(literal('delete'), source.c.id, source.c.subject, source.c.description).where(source.c.id.in_(ids))
+    ))
+
+
+def fts5_query(raw):
+    """Turn free text into a safe FTS5 query.
+
+    Each whitespace-separated chunk becomes a quoted phrase (so ``AD-BIDDEX``
+    matches as written), chunks are ANDed, and the last one is a prefix match.
+    """
+    chunks = [chunk.replace('"', '""') for chunk in raw.split() if re.search(r'\w', chunk)]
+    if not chunks:
+        return None
+    phrases = [f'"{chunk}"' for chunk in chunks]
+    phrases[-1] += '*'
+    return ' '.join(phrases)
+
+
+def apply_search(query, raw, tickets=Ticket):
+    """Restrict a ticket query to text matches; returns (query, rank ordering).
+
+    ``tickets`` is the entity the query selects: Ticket, or the archive-aware
+    source returned by ticket_archive.source().
+    """
+    dialect = _dialect()
+
+    if dialect == 'sqlite':
+        match = fts5_query(raw)
+        if match is None:
+            return query.filter(false()), tickets.created_at.desc()
+        ranked = select(fts.c.rowid.label('ticket_id'), fts.c.rank.label('rank')).where(
+            fts.c[FTS_TABLE].op('MATCH')(match)
+        ).subquery()
+        return query.join(ranked, tickets.id == ranked.c.ticket_id), ranked.c.rank  # bm25: lower is better
+
+    if dialect == 'postgresql':
+        document = func.to_tsvector(
+            'simple', func.coalesce(tickets.subject, '') + ' ' + func.coalesce(tickets.description, '')
+        )
+        ts_query = func.plainto_tsquery('simple', raw)
+        return query.filter(document.op('@@')(ts_query)), func.ts_rank(document, ts_query).desc()
+
+    # No text index on other backends: plain substring match
+    pattern = f'%{raw}%'
+    return query.filter(or_(tickets.subject.ilike(pattern), tickets.description.ilike(pattern))), tickets.created_at.desc()
@@ -0,0 +1,223 @@
+"""Mergeable quantile sketches for response and resolution times.
+
+One DDSketch is stored per day x customer_type x product_line x priority x
+metric. Queries merge the matching rows, so any percentile over any window
+costs a read of a few small rows instead of sorting every ticket.
+"""
+import json
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from src.models.user import db
+from src.models.ticket import Customer, LatencySketch
+from src.models.state import get_state, set_state
+from src.services.ticket_archive import ticket_archive
+
+DEFAULT_PERCENTILES = [50, 90, 95, 99]
+METRICS = ('response', 'resolution')
+BACKFILL_KEY = 'latency_sketches_backfilled_at'
+
+
+class DDSketch:
+    """DDSketch with relative-accuracy guarantee ``alpha`` on positive values"""
+
+    def __init__(self, alpha=0.01):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = defaultdict(int)
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            self.bins[math.ceil(math.log(value) / self._log_gamma)] += 1
+        self.count += 1
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError('Cannot merge sketches with different accuracy')
+        for key, bin_count in other.bins.items():
+            self.bins[key] += bin_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        """Value at quantile ``q`` (0..1), or None for an empty sketch"""
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_json(self):
+        return json.dumps({
+            'alpha': self.alpha,
+            'zero': self.zero_count,
+            'bins': {str(key): bin_count for key, bin_count in self.bins.items()}
+        })
+
+    @classmethod
+    def from_json(cls, payload):
+        data = json.loads(payload)
+        sketch = cls(alpha=data['alpha'])
+        for key, bin_count in data['bins'].items():
+            sketch.bins[int(key)] = bin_count
+        sketch.zero_count = data['zero']
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+
+def parse_percentiles(raw):
+    """Parse a ``percentiles=50,90,99`` query parameter"""
+    if not raw:
+        return list(DEFAULT_PERCENTILES)
+    try:
+        percentiles = [float(value) for value in raw.split(',') if value.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid percentiles '{raw}', expected numbers like 50,90,99") from None
+    for percentile in percentiles:
+        if not 0 <= percentile <= 100:
+            raise ValueError(f'Percentile out of range: {percentile}')
+    return percentiles
+
+
+def percentile_key(percentile):
+    return f"p{percentile:g}"
+
+
+def summarize(sketch, percentiles):
+    """Percentile dict (hours, rounded) for a merged sketch"""
+    result = {}
+    for percentile in percentiles:
+        value = sketch.quantile(percentile / 100)
+        result[percentile_key(percentile)] = round(value, 2) if value is not None else None
+    return result
+
+
+def date_runs(dates):
+    """Group dates into contiguous [first, last] runs"""
+    runs = []
+    for day in sorted(dates):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def refresh_latency_sketches(dates):
+    """Rebuild the sketches for the given ticket creation dates.
+
+    Does not commit; the caller owns the transaction.
+    """
+    for first_day, last_day in date_runs(dates):
+        _rebuild_range(first_day, last_day)
+
+
+def latency_sketches_backfilled():
+    """Whether the full-history backfill has run against this database"""
+    return get_state(BACKFILL_KEY) is not None
+
+
+def rebuild_all_latency_sketches():
+    """Backfill sketches for every date that has tickets and record that it ran.
+
+    Does not commit; the caller owns the transaction.
+    """
+    tickets = ticket_archive.source()
+    first, last = db.session.query(func.min(tickets.created_at), func.max(tickets.created_at)).one()
+    if first is not None:
+        _rebuild_range(first.date(), last.date())
+    set_state(BACKFILL_KEY, datetime.utcnow().isoformat())
+
+
+def _rebuild_range(first_day, last_day):
+    window_start = datetime.combine(first_day, datetime.min.time())
+    window_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+
+    LatencySketch.query.filter(
+        LatencySketch.date >= first_day,
+        LatencySketch.date <= last_day
+    ).delete(synchronize_session=False)
+
+    tickets = ticket_archive.source(window_start, window_end)
+    rows = db.session.query(
+        tickets.created_at,
+        tickets.first_response_at,
+        tickets.resolved_at,
+        tickets.priority,
+        tickets.product_line,
+        Customer.customer_type
+    ).outerjoin(Customer, tickets.customer_id == Customer.id).filter(
+        tickets.created_at >= window_start,
+        tickets.created_at < window_end
+    ).yield_per(5000)
+
+    sketches = defaultdict(DDSketch)
+    for row in rows:
+        segment = (row.created_at.date(), row.customer_type, row.product_line, row.priority)
+        if row.first_response_at:
+            hours = (row.first_response_at - row.created_at).total_seconds() / 3600
+            sketches[segment + ('response',)].add(hours)
+        if row.resolved_at:
+            hours = (row.resolved_at - row.created_at).total_seconds() / 3600
+            sketches[segment + ('resolution',)].add(hours)
+
+    db.session.bulk_insert_mappings(LatencySketch, [
+        {
+            'date': day,
+            'customer_type': customer_type,
+            'product_line': product_line,
+            'priority': priority,
+            'metric': metric,
+            'count': sketch.count,
+            'sketch': sketch.to_json()
+        }
+        for (day, customer_type, product_line, priority, metric), sketch in sketches.items()
+    ])
+
+
+def _sketch_query(start_date, end_date, customer_type='all', product_line='all', priority='all'):
+    query = LatencySketch.query.filter(
+        LatencySketch.date >= start_date.date(),
+        LatencySketch.date <= end_date.date()
+    )
+    if customer_type != 'all':
+        query = query.filter(LatencySketch.customer_type == customer_type)
+    if product_line != 'all':
+        query = query.filter(LatencySketch.product_line == product_line)
+    if priority != 'all':
+        query = query.filter(LatencySketch.priority == priority)
+    return query
+
+
+def window_percentiles(start_date, end_date, percentiles, customer_type='all', product_line='all', priority='all'):
+    """Merged response/resolution percentiles for a window (day granularity)"""
+    merged = {metric: DDSketch() for metric in METRICS}
+    for row in _sketch_query(start_date, end_date, customer_type, product_line, priority):
+        merged[row.metric].merge(DDSketch.from_json(row.sketch))
+    return {metric: summarize(merged[metric], percentiles) for metric in METRICS}
+
+
+def daily_percentiles(start_date, end_date, percentiles, customer_type='all', product_line='all'):
+    """Per-day merged response/resolution percentiles keyed by ISO date"""
+    merged = defaultdict(lambda: {metric: DDSketch() for metric in METRICS})
+    for row in _sketch_query(start_date, end_date, customer_type, product_line):
+        merged[row.date.isoformat()][row.metric].merge(DDSketch.from_json(row.sketch))
+    return {
+        day: {metric: summarize(sketches[metric], percentiles) for metric in METRICS}
+        for day, sketches in merged.items()
+    }
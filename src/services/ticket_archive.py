@@ -0,0 +1,328 @@
+"""Monthly partitions for closed historical tickets.
+
+On SQLite, closed tickets created before the retention cutoff
+(``ARCHIVE_AFTER_DAYS``, rounded down to a month boundary) are moved out of
+``tickets`` into one table per creation month, ``tickets_YYYY_MM``, in a
+separate database file (``ARCHIVE_DATABASE``) attached to every connection
+as ``archive``. Rows keep their ids, so ticket_tags and outages still point
+at them, and they stay in the full-text index; ``tickets`` is AUTOINCREMENT
+and ``ensure_schema()`` keeps its sequence above every archived id, so a new
+ticket never takes an archived ticket's id. The hot table then only holds
+recent and still-open tickets, which is what the importer and most
+dashboard windows touch.
+
+Queries that may reach back further call ``ticket_archive.source(start,
+end)``: it returns ``Ticket`` when no archived month overlaps the window,
+and otherwise an aliased ``Ticket`` over a UNION ALL of the hot table and
+only the overlapping partitions. Because the returned entity may be a
+subquery, joins to Customer must spell out the onclause.
+
+On PostgreSQL the same layout is native declarative partitioning. Convert
+the table once during a maintenance window::
+
+    ALTER TABLE tickets RENAME TO tickets_unpartitioned;
+    CREATE TABLE tickets (LIKE tickets_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (created_at);
+    -- one PARTITION OF tickets per month present, then
+    INSERT INTO tickets SELECT * FROM tickets_unpartitioned;
+
+(the primary key and unique external_id must then include created_at).
+``ensure_schema()`` keeps partitions for the coming months in place, and
+the planner prunes partitions by the created_at filter, so ``source()``
+returns ``Ticket`` unchanged and ``archive_closed_tickets()`` is a no-op.
+"""
+import os
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Index, MetaData, Table, delete, event, inspect, insert, select, text, union_all
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import aliased
+
+from src.models.user import db
+from src.models.ticket import Ticket
+from src.models.state import bump_data_version, get_data_version
+from src.services import search
+
+ARCHIVE_SCHEMA = 'archive'
+CLOSED_STATUSES = ('Resolved', 'Closed')
+PARTITION_NAME = re.compile(r'^tickets_(\d{4})_(\d{2})$')
+POSTGRES_MONTHS_AHEAD = 3
+MOVE_CHUNK_SIZE = 500  # ids per statement, below SQLite's bound-parameter limit
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'tickets_{month.year:04d}_{month.month:02d}'
+
+
+def _chunks(values, size=MOVE_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class TicketArchive:
+    """Routes ticket queries across the hot table and the monthly archive"""
+
+    def __init__(self):
+        self.path = None  # archive database file; None disables the SQLite archive
+        self.after_days = 0
+        self._metadata = MetaData(schema=ARCHIVE_SCHEMA)
+        self._lock = threading.Lock()
+        self._cache = (None, [])  # (data version, [(month, Table)])
+
+    def init_app(self, app):
+        """Attach the archive database to every new connection.
+
+        Must run before the engine opens its first connection.
+        """
+        self.after_days = app.config.get('ARCHIVE_AFTER_DAYS') or 0
+        self.path = None
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+            return
+
+        # Next to the main database unless configured, so each database gets its own archive
+        self.path = app.config.get('ARCHIVE_DATABASE') or f'{os.path.splitext(url.database)[0]}-archive.db'
+        event.listen(db.engine, 'connect', self._attach)
+
+    def _attach(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}', (self.path,))
+        cursor.close()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def ensure_schema(self):
+        """Add model columns missing from older partitions and reserve their ids; on PostgreSQL create upcoming partitions"""
+        if db.engine.dialect.name == 'postgresql':
+            self._ensure_postgres_partitions()
+            return
+        if not self.enabled:
+            return
+
+        inspector = inspect(db.engine)
+        archived_max_id = 0
+        with db.engine.begin() as conn:
+            for name in inspector.get_table_names(schema=ARCHIVE_SCHEMA):
+                if not PARTITION_NAME.match(name):
+                    continue
+                existing_columns = {column['name'] for column in inspector.get_columns(name, schema=ARCHIVE_SCHEMA)}
+                for column in Ticket.__table__.columns:
+                    if column.name not in existing_columns:
+                        column_type = column.type.compile(dialect=db.engine.dialect)
+                        conn.execute(text(
+                            f'ALTER TABLE {ARCHIVE_SCHEMA}.{name} ADD COLUMN {column.name} {column_type}'
+                        ))
+                archived_max_id = max(archived_max_id, conn.execute(text(
+                    f'SELECT coalesce(max(id), 0) FROM {ARCHIVE_SCHEMA}.{name}'
+                )).scalar())
+            
+            if archived_max_id:
+                # Databases from before AUTOINCREMENT may have handed out archived ids again
+                params = {'seq': archived_max_id}
+                conn.execute(text(
+                    "UPDATE sqlite_sequence SET seq = :seq WHERE name = 'tickets' AND seq < :seq"
+                ), params)
+                conn.execute(text(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT 'tickets', :seq "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tickets')"
+                ), params)
+
+    def _ensure_postgres_partitions(self):
+        with db.engine.begin() as conn:
+            partitioned = conn.execute(text(
+                "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tickets')"
+            )).first()
+            if partitioned is None:
+                return
+            month = month_start(datetime.utcnow())
+            for _ in range(POSTGRES_MONTHS_AHEAD + 1):
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF tickets "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+                ))
+                month = next_month(month)
+
+    def _table(self, month):
+        """Table object for one month's partition (not necessarily created yet)"""
+        name = partition_name(month)
+        with self._lock:
+            table = self._metadata.tables.get(f'{ARCHIVE_SCHEMA}.{name}')
+            if table is None:
+                # Same columns as tickets, without foreign keys into the main database
+                table = Table(
+                    name, self._metadata,
+                    *[Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+                      for column in Ticket.__table__.columns],
+                    Index(f'ix_{name}_external_id', 'external_id', unique=True),
+                    Index(f'ix_{name}_created_at', 'created_at')
+                )
+            return table
+
+    def partitions(self):
+        """[(month, Table)] of the archived months, oldest first"""
+        if not self.enabled:
+            return []
+        version = get_data_version()
+        cached_version, partitions = self._cache
+        if cached_version != version:
+            names = db.session.execute(text(
+                f"SELECT name FROM {ARCHIVE_SCHEMA}.sqlite_master WHERE type = 'table'"
+            )).scalars()
+            months = sorted(
+                datetime(int(match.group(1)), int(match.group(2)), 1)
+                for match in map(PARTITION_NAME.match, names) if match
+            )
+            partitions = [(month, self._table(month)) for month in months]
+            self._cache = (version, partitions)
+        return partitions
+
+    def source(self, start_date=None, end_date=None):
+        """Ticket entity covering [start_date, end_date], touching only the partitions that overlap it"""
+        tables = [
+            table for month, table in self.partitions()
+            if (end_date is None or month <= end_date) and (start_date is None or next_month(month) > start_date)
+        ]
+        if not tables:
+            return Ticket
+
+        columns = Ticket.__table__.columns.keys()
+        partitions = union_all(
+            select(Ticket.__table__),
+            *[select(*[table.c[name] for name in columns]) for table in tables]
+        ).subquery('ticket_partitions')
+        return aliased(Ticket, partitions)
+
+    def fingerprints(self):
+        """{external_id: content_hash} of every archived ticket"""
+        fingerprints = {}
+        for _, table in self.partitions():
+            fingerprints.update(db.session.execute(select(table.c.external_id, table.c.content_hash)).all())
+        return fingerprints
+
+    def archive_closed_tickets(self, now=None):
+        """Move closed tickets created before the cutoff month into the archive.
+
+        Returns the number of tickets moved. Commits twice: once after
+        copying the tickets into their partitions and once after deleting
+        them from the hot table (bumping the data version). A transaction
+        that spans the attached file is not atomic in WAL mode, so copying
+        first means an interruption leaves a duplicate for
+        remove_duplicates() rather than losing tickets. The caller should
+        commit its own changes first.
+        """
+        if not self.enabled or self.after_days <= 0:
+            return 0
+
+        cutoff = month_start((now or datetime.utcnow()) - timedelta(days=self.after_days))
+        tickets = Ticket.__table__
+        rows = db.session.execute(select(tickets.c.id, tickets.c.created_at).where(
+            tickets.c.status.in_(CLOSED_STATUSES),
+            tickets.c.created_at < cutoff
+        )).all()
+        if not rows:
+            return 0
+
+        by_month = defaultdict(list)
+        for ticket_id, created_at in rows:
+            by_month[month_start(created_at)].append(ticket_id)
+
+        for month, ids in sorted(by_month.items()):
+            partition = self._table(month)
+            partition.create(bind=db.session.connection(), checkfirst=True)
+            for chunk in _chunks(ids):
+                self._copy(tickets, partition, chunk)
+        db.session.commit()
+
+        for month, ids in sorted(by_month.items()):
+            partition = self._table(month)
+            for chunk in _chunks(ids):
+                db.session.execute(delete(tickets).where(tickets.c.id.in_(chunk)))
+                # The delete trigger dropped them from the search index
+                search.index_rows(partition, chunk)
+        bump_data_version()
+        db.session.commit()
+
+        self._cache = (None, [])
+        return len(rows)
+
+    def remove_duplicates(self):
+        """Drop archived copies of tickets that are also in the hot table.
+
+        Such pairs are left by a move interrupted between the two files'
+        commits; the hot copy is current (a closed ticket is archived again
+        on the next run). Returns the number removed. Does not commit.
+        """
+        removed = 0
+        for _, partition in self.partitions():
+            # By external_id: in an older database a new ticket may hold an archived ticket's id
+            removed += db.session.execute(delete(partition).where(
+                partition.c.external_id.in_(select(Ticket.__table__.c.external_id))
+            )).rowcount
+        return removed
+
+    def remove_orphaned_tags(self):
+        """Drop ticket_tags rows for ids the tickets sequence has not handed out yet.
+
+        Only a database from before AUTOINCREMENT has such rows, left by a
+        ticket whose id was later reused; the next new ticket would inherit
+        them. Returns the number removed. Does not commit.
+        """
+        if db.engine.dialect.name != 'sqlite':
+            return 0
+        return db.session.execute(text(
+            "DELETE FROM ticket_tags WHERE ticket_id > "
+            "coalesce((SELECT seq FROM sqlite_sequence WHERE name = 'tickets'), 0)"
+        )).rowcount
+
+    def restore(self, external_ids):
+        """Move archived tickets back into the hot table (e.g. before updating them).
+
+        Returns the number of tickets moved. Does not commit. SQLite commits
+        the main file before attached ones, so an interrupted commit leaves
+        duplicates for remove_duplicates(), never a lost ticket.
+        """
+        external_ids = list(external_ids)
+        restored = 0
+        for _, partition in self.partitions():
+            for chunk in _chunks(external_ids):
+                ids = db.session.execute(
+                    select(partition.c.id).where(partition.c.external_id.in_(chunk))
+                ).scalars().all()
+                if not ids:
+                    continue
+                # The insert trigger indexes them again
+                search.unindex_rows(partition, ids)
+                self._move(partition, Ticket.__table__, ids)
+                restored += len(ids)
+
+        if restored:
+            self._cache = (None, [])
+        return restored
+
+    @staticmethod
+    def _copy(source, target, ids):
+        columns = Ticket.__table__.columns.keys()
+        db.session.execute(insert(target).from_select(
+            columns, select(*[source.c[name] for name in columns]).where(source.c.id.in_(ids))
+        ))
+
+    @classmethod
+    def _move(cls, source, target, ids):
+        cls._copy(source, target, ids)
+        db.session.execute(delete(source).where(source.c.id.in_(ids)))
+
+
+ticket_archive = TicketArchive()
@@ -0,0 +1,417 @@
+"""Columnar in-memory snapshot of the ticket analytics columns.
+
+The analytics endpoints only touch a handful of ticket columns. The snapshot
+keeps them as NumPy arrays sorted by created_at, with categoricals
+dictionary-encoded to small integer codes, so a date window is two binary
+searches and every filter/breakdown is a vectorized mask or bincount.
+
+When ``ANALYTICS_SNAPSHOT_DIR`` is set, each version is written once as
+``.npy`` files, published with an atomic directory rename and memory-mapped
+read-only by every gunicorn worker, so the page cache holds a single copy no
+matter how many workers run and freshly forked workers start warm. Published
+directories are keyed by the database identity as well as the data version,
+so a reset database, whose versions start again at 1, never maps the old
+database's files.
+
+Requests never wait for a build. The import writer publishes the snapshot
+for the version it just committed, and a worker that sees a newer data
+version first maps the published files if they exist; otherwise it starts
+one background build and keeps answering from the snapshot it has (or from
+SQL when it has none) until the new one is ready.
+
+NumPy is optional: without it (or with ``ANALYTICS_SNAPSHOT`` disabled) the
+endpoints keep answering from SQL.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timezone
+
+from flask import current_app
+
+from src.models.user import db
+from src.models.ticket import Customer
+from src.models.state import get_data_version, get_database_id
+from src.services.ticket_archive import ticket_archive
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on deployment
+    np = None
+
+CATEGORICALS = ('priority', 'status', 'customer_type', 'product_line', 'issue_type')
+KEEP_VERSIONS = 2
+OPEN_STATUSES = ('Open', 'Pending', 'Escalated')
+MICROS_PER_DAY = 86400 * 1000000
+
+logger = logging.getLogger(__name__)
+
+
+def _to_datetime64(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, 'us').astype(np.int64)
+
+
+def _hours(later, earlier):
+    if later and earlier:
+        return (later - earlier).total_seconds() / 3600
+    return float('nan')
+
+
+class TicketSnapshot:
+    """Immutable columnar view of the tickets table at one data version"""
+
+    def __init__(self, version, columns, dictionaries, database_id=None):
+        self.version = version
+        self.database_id = database_id
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self._codes = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in dictionaries.items()
+        }
+
+    @classmethod
+    def build(cls, version, database_id=None):
+        """Load the analytics columns for every ticket, sorted by created_at"""
+        tickets = ticket_archive.source()
+        rows = db.session.query(
+            tickets.created_at,
+            tickets.first_response_at,
+            tickets.resolved_at,
+            tickets.priority,
+            tickets.status,
+            Customer.customer_type,
+            tickets.product_line,
+            tickets.issue_type,
+            tickets.sla_breach,
+            tickets.first_response_breach,
+            tickets.resolution_breach
+        ).outerjoin(Customer, tickets.customer_id == Customer.id).order_by(tickets.created_at).yield_per(10000)
+
+        dictionaries = {name: [] for name in CATEGORICALS}
+        lookups = {name: {} for name in CATEGORICALS}
+        values = {name: [] for name in CATEGORICALS}
+        created_at = []
+        response_hours = []
+        resolution_hours = []
+        breaches = {'sla_breach': [], 'first_response_breach': [], 'resolution_breach': []}
+
+        for row in rows:
+            created_at.append(row.created_at)
+            response_hours.append(_hours(row.first_response_at, row.created_at))
+            resolution_hours.append(_hours(row.resolved_at, row.created_at))
+            for name in CATEGORICALS:
+                value = getattr(row, name)
+                code = lookups[name].get(value)
+                if code is None:
+                    code = lookups[name][value] = len(dictionaries[name])
+                    dictionaries[name].append(value)
+                values[name].append(code)
+            for name in breaches:
+                breaches[name].append(bool(getattr(row, name)))
+
+        created = np.array([_to_datetime64(value) for value in created_at], dtype=np.int64)
+        columns = {
+            'created_at': created,
+            'day': created // MICROS_PER_DAY,
+            'response_hours': np.array(response_hours, dtype=np.float64),
+            'resolution_hours': np.array(resolution_hours, dtype=np.float64)
+        }
+        for name in CATEGORICALS:
+            columns[name] = np.array(values[name], dtype=np.int32)
+        for name, flags in breaches.items():
+            columns[name] = np.array(flags, dtype=bool)
+
+        return cls(version, columns, dictionaries, database_id)
+
+    def save(self, directory):
+        """Write the snapshot as one .npy file per column plus dictionaries"""
+        for name, values in self.columns.items():
+            np.save(os.path.join(directory, f'{name}.npy'), values)
+        with open(os.path.join(directory, 'dictionaries.json'), 'w') as f:
+            json.dump({'version': self.version, 'database_id': self.database_id, 'dictionaries': self.dictionaries}, f)
+
+    @classmethod
+    def open(cls, directory, database_id):
+        """Memory-map a snapshot written by ``save`` (read-only, shared pages)"""
+        with open(os.path.join(directory, 'dictionaries.json'), 'r') as f:
+            meta = json.load(f)
+        if meta.get('database_id') != database_id:
+            raise ValueError(f'Snapshot {directory} belongs to another database')
+        columns = {}
+        for filename in os.listdir(directory):
+            if filename.endswith('.npy'):
+                columns[filename[:-4]] = np.load(os.path.join(directory, filename), mmap_mode='r')
+        return cls(meta['version'], columns, meta['dictionaries'], database_id)
+
+    def __len__(self):
+        return len(self.columns['created_at'])
+
+    # Filtering helpers
+
+    def _window(self, start_date, end_date, include_end=True):
+        """Row range of [start_date, end_date], or [start_date, end_date) without ``include_end``"""
+        created = self.columns['created_at']
+        lo = int(np.searchsorted(created, _to_datetime64(start_date), side='left'))
+        hi = int(np.searchsorted(created, _to_datetime64(end_date), side='right' if include_end else 'left'))
+        return lo, max(lo, hi)
+
+    def _select(self, start_date, end_date, include_end=True, **filters):
+        """Window slice plus boolean mask for equality filters ('all' = no filter)"""
+        lo, hi = self._window(start_date, end_date, include_end)
+        mask = np.ones(hi - lo, dtype=bool)
+        for name, value in filters.items():
+            if value == 'all':
+                continue
+            code = self._codes[name].get(value)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self.columns[name][lo:hi] == code
+        return slice(lo, hi), mask
+
+    def _column(self, name, window, mask):
+        return self.columns[name][window][mask]
+
+    def _label_counts(self, name, codes):
+        """bincount over codes, folded onto labels (None/'' become 'Unknown')"""
+        counts = np.bincount(codes, minlength=len(self.dictionaries[name]))
+        result = {}
+        for code, count in enumerate(counts):
+            if count:
+                label = self.dictionaries[name][code] or 'Unknown'
+                result[label] = result.get(label, 0) + int(count)
+        return result
+
+    # Endpoint aggregates
+
+    def sla_stats(self, start_date, end_date, customer_type='all', product_line='all'):
+        window, mask = self._select(start_date, end_date, customer_type=customer_type, product_line=product_line)
+        sla_breach = self._column('sla_breach', window, mask)
+        priorities = self._column('priority', window, mask)
+        response_hours = self._column('response_hours', window, mask)
+        resolution_hours = self._column('resolution_hours', window, mask)
+
+        totals = self._label_counts('priority', priorities)
+        breaches = self._label_counts('priority', priorities[sla_breach])
+        priority_breakdown = {
+            label: {'total': total, 'breaches': breaches.get(label, 0)}
+            for label, total in totals.items()
+        }
+
+        return {
+            'total_tickets': int(mask.sum()),
+            'sla_breaches': int(sla_breach.sum()),
+            'first_response_breaches': int(self._column('first_response_breach', window, mask).sum()),
+            'resolution_breaches': int(self._column('resolution_breach', window, mask).sum()),
+            'avg_response_time': _nanmean(response_hours),
+            'avg_resolution_time': _nanmean(resolution_hours),
+            'priority_breakdown': priority_breakdown,
+            'status_breakdown': self._label_counts('status', self._column('status', window, mask))
+        }
+
+    def customer_segments(self, start_date, end_date):
+        window, mask = self._select(start_date, end_date)
+        customer_types = self._column('customer_type', window, mask)
+        sla_breach = self._column('sla_breach', window, mask)
+        resolution_hours = self._column('resolution_hours', window, mask)
+
+        segments = []
+        for code, customer_type in enumerate(self.dictionaries['customer_type']):
+            if customer_type is None:
+                continue  # tickets without a customer are excluded, as in the SQL join
+            in_segment = customer_types == code
+            total = int(in_segment.sum())
+            if total:
+                segments.append({
+                    'customer_type': customer_type,
+                    'total_tickets': total,
+                    'sla_breaches': int(sla_breach[in_segment].sum()),
+                    'avg_resolution_hours': _nanmean(resolution_hours[in_segment])
+                })
+        return sorted(segments, key=lambda segment: segment['customer_type'])
+
+    def daily_trends(self, start_date, end_date, customer_type='all'):
+        window, mask = self._select(start_date, end_date, customer_type=customer_type)
+        days = self._column('day', window, mask)
+        if not len(days):
+            return []
+
+        first_day = int(days.min())
+        offsets = days - first_day
+        totals = np.bincount(offsets)
+        breaches = np.bincount(offsets, weights=self._column('sla_breach', window, mask))
+        return [
+            {
+                'date': str(np.datetime64(int(first_day + offset), 'D')),
+                'total_tickets': int(totals[offset]),
+                'sla_breaches': int(breaches[offset])
+            }
+            for offset in np.flatnonzero(totals)
+        ]
+
+    def executive_stats(self, start_date, end_date, include_end=True):
+        window, mask = self._select(start_date, end_date, include_end)
+        statuses = self._column('status', window, mask)
+        open_codes = [self._codes['status'][status] for status in OPEN_STATUSES if status in self._codes['status']]
+
+        issue_counts = np.bincount(
+            self._column('issue_type', window, mask),
+            minlength=len(self.dictionaries['issue_type'])
+        )
+        top_issues = sorted(
+            ((self.dictionaries['issue_type'][code], int(count)) for code, count in enumerate(issue_counts) if count),
+            key=lambda issue: (-issue[1], issue[0] or '')
+        )[:5]
+
+        return {
+            'total_tickets': int(mask.sum()),
+            'sla_breaches': int(self._column('sla_breach', window, mask).sum()),
+            'open_tickets': int(np.isin(statuses, open_codes).sum()),
+            'top_issues': top_issues
+        }
+
+
+def _nanmean(values):
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else 0
+
+
+class SnapshotManager:
+    """Holds the current snapshot and replaces it when the data version moves"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._building = False
+
+    def enabled(self):
+        return np is not None and current_app.config.get('ANALYTICS_SNAPSHOT', True)
+
+    def load(self):
+        """Build or map the snapshot for the current version, waiting for it (process start)"""
+        if self.enabled():
+            self._install(self._get(get_data_version()))
+
+    def publish(self):
+        """Build the shared snapshot for the current version now (import writer, after committing).
+
+        Returns whether a snapshot was published. A failed build is logged and
+        left to the workers' background builds; the import itself stands.
+        """
+        directory = current_app.config.get('ANALYTICS_SNAPSHOT_DIR')
+        if not self.enabled() or not directory:
+            return False
+        try:
+            self._shared(directory, get_data_version())
+            return True
+        except Exception:
+            logger.exception('Could not publish the analytics snapshot')
+            return False
+
+    def current(self):
+        """Newest snapshot ready to serve, or None when disabled or none is ready yet.
+
+        Never waits for a build: a stale snapshot is returned while the one
+        for the current data version builds in the background.
+        """
+        if not self.enabled():
+            return None
+
+        version = get_data_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        directory = current_app.config.get('ANALYTICS_SNAPSHOT_DIR')
+        if directory:
+            database_id = get_database_id()
+            published = self._published(directory, version, database_id)
+            if os.path.isdir(published):
+                return self._install(TicketSnapshot.open(published, database_id))
+
+        self._build_in_background()
+        return snapshot
+
+    def _install(self, snapshot):
+        """Make ``snapshot`` current unless a newer one already is; returns the current one"""
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version <= snapshot.version:
+                self._snapshot = snapshot
+            return self._snapshot
+
+    def _get(self, version):
+        directory = current_app.config.get('ANALYTICS_SNAPSHOT_DIR')
+        if directory:
+            return self._shared(directory, version)
+        return TicketSnapshot.build(version, get_database_id())
+
+    def _build_in_background(self):
+        with self._lock:
+            if self._building:
+                return  # the running build re-reads the version when it finishes
+            self._building = True
+        app = current_app._get_current_object()
+        threading.Thread(target=self._build, args=(app,), name='snapshot-build', daemon=True).start()
+
+    def _build(self, app):
+        try:
+            with app.app_context():
+                while True:
+                    version = get_data_version()
+                    self._install(self._get(version))
+                    db.session.rollback()
+                    if get_data_version() == version:
+                        break
+        except Exception:
+            logger.exception('Analytics snapshot build failed')
+        finally:
+            with self._lock:
+                self._building = False
+
+    @staticmethod
+    def _published(directory, version, database_id):
+        return os.path.join(directory, f'v{version}-{database_id}')
+
+    def _shared(self, directory, version):
+        """Map the on-disk snapshot for ``version``, building it if no worker has yet"""
+        database_id = get_database_id()
+        published = self._published(directory, version, database_id)
+        if os.path.isdir(published):
+            return TicketSnapshot.open(published, database_id)
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'build.lock'), 'w') as lock_file:
+            # Only one worker builds; the others block here and then map its output
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if not os.path.isdir(published):
+                    staging = tempfile.mkdtemp(prefix=f'.v{version}-', dir=directory)
+                    TicketSnapshot.build(version, database_id).save(staging)
+                    os.rename(staging, published)
+                    self._prune(directory, version, database_id)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return TicketSnapshot.open(published, database_id)
+
+    @staticmethod
+    def _prune(directory, version, database_id):
+        """Drop old versions and other databases' snapshots; mapped files stay valid for workers still using them"""
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith('.v'):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.startswith('v'):
+                number, _, owner = name[1:].partition('-')
+                if number.isdigit() and (owner != database_id or int(number) <= version - KEEP_VERSIONS):
+                    shutil.rmtree(path, ignore_errors=True)
+
+
+ticket_snapshots = SnapshotManager()
@@ -16,6 +16,20 @@ class SLADashboard {
         this.setDefaultDates();
         this.loadSection('overview');
         this.checkDataImportStatus();
+        this.watchDataVersion();
+    }
+
+    watchDataVersion() {
+        // Reload the current section when an import changes the data
+        if (!window.EventSource) return;
+        const events = new EventSource('/api/dashboard/events');
+        events.addEventListener('data-version', (event) => {
+            const version = JSON.parse(event.data).data_version;
+            if (this.dataVersion !== undefined && version !== this.dataVersion) {
+                this.loadSection(this.currentSection);
+            }
+            this.dataVersion = version;
+        });
     }
 
     setupEventListeners() {
@@ -87,15 +101,27 @@ class SLADashboard {
                 method: 'POST'
             });
             
-            const result = await response.json();
+            const accepted = await response.json();
+            if (!response.ok) {
+                this.showError(`Import failed: ${accepted.error}`);
+                return;
+            }
             
-            if (response.ok) {
+            // The import runs in the background; poll its job until it finishes
+            let job = accepted.job;
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                job = await (await fetch(`/api/extraction/import-jobs/${job.id}`)).json();
+            }
+            
+            if (job.status === 'succeeded') {
+                const result = job.result;
                 this.showSuccess(`Data imported successfully! ${result.imported_tickets} new tickets, ${result.updated_tickets} updated tickets.`);
                 setTimeout(() => {
                     this.loadSection('overview');
                 }, 2000);
             } else {
-                this.showError(`Import failed: ${result.error}`);
+                this.showError(`Import failed: ${job.error}`);
             }
         } catch (error) {
             this.showError(`Import failed: ${error.message}`);
@@ -902,50 +928,12 @@ class SLADashboard {
     }
 
     // Export methods
-    async exportData(format = 'json') {
-        try {
-            const response = await fetch(this.buildApiUrl('/api/dashboard/tickets', { per_page: 1000 }));
-            const data = await response.json();
-            
-            if (format === 'json') {
-                this.downloadJSON(data, 'sla-dashboard-data.json');
-            } else if (format === 'csv') {
-                this.downloadCSV(data.tickets, 'sla-dashboard-data.csv');
-            }
-        } catch (error) {
-            this.showError('Failed to export data');
-        }
-    }
-
-    downloadJSON(data, filename) {
-        const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
-        const url = URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = filename;
-        a.click();
-        URL.revokeObjectURL(url);
-    }
-
-    downloadCSV(data, filename) {
-        if (!data.length) return;
-        
-        const headers = Object.keys(data[0]);
-        const csvContent = [
-            headers.join(','),
-            ...data.map(row => headers.map(header => {
-                const value = row[header];
-                return typeof value === 'string' ? `"${value.replace(/"/g, '""')}"` : value;
-            }).join(','))
-        ].join('\n');
-        
-        const blob = new Blob([csvContent], { type: 'text/csv' });
-        const url = URL.createObjectURL(blob);
+    exportData(format = 'json') {
+        // Streamed by the server, so the browser saves it as it arrives
         const a = document.createElement('a');
-        a.href = url;
-        a.download = filename;
+        a.href = this.buildApiUrl('/api/dashboard/tickets/export', { format });
+        a.download = `sla-dashboard-data.${format}`;
         a.click();
-        URL.revokeObjectURL(url);
     }
 
     exportToPDF() {
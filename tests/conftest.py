@@ -0,0 +1,57 @@
+"""Point the app at a throwaway database before any test imports it."""
+import os
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.harness import use_temp_database
+
+use_temp_database(snapshot=False)
+# Synthetic tickets span 180 days; keep them all in the main table
+os.environ.setdefault('ARCHIVE_AFTER_DAYS', '0')
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.state import ensure_database_id  # noqa: E402
+from src.services.ticket_archive import ARCHIVE_SCHEMA, ticket_archive  # noqa: E402
+
+
+def ticket_record(ticket_id, created_at, status=2, tags=(), updated_at=None, subject=None, description=None,
+                  priority=2, customer_type='Wholesale', requester_id=100):
+    """A minimal Freshdesk ticket record, as the importer receives it"""
+    timestamp = lambda value: value.strftime('%Y-%m-%dT%H:%M:%SZ')
+    return {
+        'id': ticket_id,
+        'subject': subject or f'Biddex | SMS delivery failed #{ticket_id}',
+        'description': description or f'Ticket number {ticket_id}',
+        'status': status,
+        'priority': priority,
+        'requester_id': requester_id,
+        'created_at': timestamp(created_at),
+        'updated_at': timestamp(updated_at or created_at + timedelta(hours=1)),
+        'tags': list(tags),
+        'custom_fields': {'cf_customer_type': customer_type},
+        'stats': {'first_responded_at': timestamp(created_at + timedelta(minutes=30))}
+    }
+
+
+def clear_database():
+    """Empty every table and drop the archive partitions (inside an app context)"""
+    db.session.rollback()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    ticket_archive._cache = (None, [])
+    for _, partition in ticket_archive.partitions():
+        db.session.execute(db.text(f'DROP TABLE {ARCHIVE_SCHEMA}.{partition.name}'))
+    db.session.commit()
+    ticket_archive._cache = (None, [])
+    # A fresh identity, as prepare_database() gives a new database
+    ensure_database_id()
+
+
+@pytest.fixture
+def app_context():
+    """An app context over empty tables and an empty archive"""
+    with app.app_context():
+        yield
+        clear_database()
@@ -0,0 +1,75 @@
+"""Customer resolution during imports: one row per name, batched queries, nothing cached across runs."""
+from datetime import datetime, timedelta
+
+from benchmarks.harness import StatementRecorder
+from src.models.user import db
+from src.models.ticket import Customer, Ticket
+from src.routes.data_extraction import build_customer, import_tickets
+from src.services.customer_resolver import CustomerResolver
+from tests.conftest import ticket_record
+
+CREATED = datetime(2025, 3, 3, 9)
+
+
+def first_seen(*names):
+    return {name: ticket_record(index, CREATED) for index, name in enumerate(names, 1)}
+
+
+def customer_inserts(recorder):
+    return [statement for statement, _ in recorder.statements if statement.startswith('INSERT INTO customers')]
+
+
+def test_import_creates_each_customer_once(app_context):
+    records = [
+        ticket_record(i, CREATED + timedelta(minutes=i), subject=f"{'Biddex' if i % 3 else 'Faysal'} | SMS delivery failed")
+        for i in range(1, 31)
+    ]
+    import_tickets(records)
+    import_tickets([ticket_record(31, CREATED, subject='Faysal | Billing credit top-up')])
+
+    assert sorted(db.session.execute(db.select(Customer.name)).scalars()) == ['Biddex', 'Faysal']
+    faysal = Customer.query.filter_by(name='Faysal').one()
+    assert Ticket.query.filter_by(customer_id=faysal.id).count() == 11
+
+
+def test_missing_customers_are_created_in_batches(app_context):
+    db.session.add(Customer(name='Acme', customer_type='enterprise'))
+    db.session.commit()
+    acme_id = Customer.query.filter_by(name='Acme').one().id
+
+    with StatementRecorder(db.engine) as recorder:
+        resolved = CustomerResolver(batch_size=2).resolve_many(first_seen('Acme', 'Bolt', 'Coda', 'Dune', 'Echo'), build_customer)
+
+    assert len(customer_inserts(recorder)) == 2  # Bolt+Coda, Dune+Echo
+    assert resolved['Acme'].id == acme_id
+    assert {name: entry.id for name, entry in resolved.items()} == dict(
+        db.session.execute(db.select(Customer.name, Customer.id)).all()
+    )
+
+
+def test_names_resolved_earlier_in_the_run_issue_no_queries(app_context):
+    resolver = CustomerResolver()
+    resolver.resolve_many(first_seen('Acme', 'Bolt'), build_customer)
+
+    with StatementRecorder(db.engine) as recorder:
+        again = resolver.resolve_many(first_seen('Bolt', 'Acme'), build_customer)
+
+    assert recorder.statements == []
+    assert set(again) == {'Acme', 'Bolt'}
+
+
+def test_each_run_sees_customers_changed_outside_the_importer(app_context):
+    CustomerResolver().resolve_many(first_seen('Acme'), build_customer)
+    db.session.commit()
+    Customer.query.filter_by(name='Acme').update({'customer_type': 'internal'})
+    db.session.commit()
+
+    assert CustomerResolver().resolve_many(first_seen('Acme'), build_customer)['Acme'].customer_type == 'internal'
+
+
+def test_name_lookups_use_the_index(app_context):
+    plan = db.session.execute(db.text(
+        "EXPLAIN QUERY PLAN SELECT id, name, customer_type FROM customers WHERE name IN ('Acme', 'Bolt')"
+    )).all()
+
+    assert any('ix_customers_name' in row[-1] for row in plan)
@@ -0,0 +1,43 @@
+"""Streamed ticket export."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.main import app
+from src.routes.data_extraction import import_tickets
+from tests.conftest import ticket_record
+
+CREATED = datetime(2025, 3, 3, 9)
+
+
+@pytest.fixture
+def client(app_context):
+    import_tickets([ticket_record(i, CREATED + timedelta(hours=i), tags=['sms']) for i in range(1, 6)])
+    return app.test_client()
+
+
+def test_csv_export_streams_every_ticket_newest_first(client):
+    response = client.get('/api/dashboard/tickets/export?format=csv')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].startswith('attachment; filename=sla-tickets-')
+    assert [row['external_id'] for row in rows] == ['5', '4', '3', '2', '1']
+    assert rows[0]['tags'] == 'sms'
+
+
+def test_json_export(client):
+    response = client.get('/api/dashboard/tickets/export?format=json&start_date=2025-03-03T11:00:00')
+    tickets = json.loads(response.get_data(as_text=True))['tickets']
+
+    assert [ticket['external_id'] for ticket in tickets] == ['5', '4', '3', '2']
+
+
+def test_unknown_format_is_a_client_error(client):
+    response = client.get('/api/dashboard/tickets/export?format=xlsx')
+
+    assert response.status_code == 400
+    assert "Unknown format 'xlsx'" in response.get_json()['error']
@@ -0,0 +1,91 @@
+"""Incremental Freshdesk sync against benchmarks/mock_freshdesk.py."""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from benchmarks.generator import TicketGenerator
+from benchmarks.mock_freshdesk import MockFreshdesk
+from src.models.ticket import Ticket
+from src.models.state import get_state
+from src.routes.data_extraction import import_tickets
+from src.services.freshdesk_sync import WATERMARK_KEY, FreshdeskClient, FreshdeskSync, RateLimiter
+
+
+@pytest.fixture
+def mock():
+    with MockFreshdesk(TicketGenerator(25, seed=7)) as server:
+        yield server
+
+
+def sync(mock, **client_options):
+    client = FreshdeskClient(mock.base_url, 'test-key', per_page=10, **client_options)
+    try:
+        return FreshdeskSync(client, apply=import_tickets, concurrency=2).run()
+    finally:
+        client.close()
+
+
+def latest_updated_at(mock):
+    return max(mock.records, key=lambda record: record['updated_at'])['updated_at']
+
+
+def test_sync_reads_every_page_and_stores_watermark(app_context, mock):
+    stats = sync(mock)
+
+    assert sorted(int(params['page']) for params in mock.requests) == [1, 2, 3]
+    assert all(params['include'] == 'description,stats' for params in mock.requests)
+    assert stats['fetched'] == stats['changed'] == 25
+    assert Ticket.query.count() == 25
+    assert stats['watermark'] == get_state(WATERMARK_KEY) == latest_updated_at(mock)
+
+
+def test_second_sync_starts_at_watermark_and_applies_only_changes(app_context, mock):
+    watermark = sync(mock)['watermark']
+    mock.requests.clear()
+
+    edited_at = datetime.fromisoformat(watermark.replace('Z', '')) + timedelta(hours=1)
+    for ticket_id in (3, 11, 19):
+        mock.update(ticket_id, updated_at=edited_at.strftime('%Y-%m-%dT%H:%M:%SZ'), priority=4)
+    stats = sync(mock)
+
+    assert mock.requests[0]['updated_since'] == watermark
+    assert stats['changed'] == 3
+    assert stats['updated_tickets'] == 3
+    assert Ticket.query.filter(Ticket.priority == 'Critical', Ticket.external_id.in_(['3', '11', '19'])).count() == 3
+    assert get_state(WATERMARK_KEY) == edited_at.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def test_rate_limited_request_waits_for_retry_after(app_context, mock):
+    mock.rate_limit_next(retry_after='1')
+    started = time.monotonic()
+    stats = sync(mock)
+
+    assert time.monotonic() - started >= 1.0
+    assert mock.requests[0]['page'] == mock.requests[1]['page'] == '1'
+    assert stats['fetched'] == 25
+
+
+def test_unparseable_rate_limit_remaining_is_ignored(app_context, mock):
+    mock.extra_headers = {'X-RateLimit-Remaining': 'unlimited'}
+
+    assert sync(mock)['fetched'] == 25
+
+
+def test_http_date_retry_after_pauses_for_the_default():
+    response = requests.Response()
+    response.status_code = 429
+    response.headers['Retry-After'] = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    limiter = RateLimiter()
+    limiter.observe(response)
+
+    assert limiter._resume_at - time.monotonic() > 59
+
+
+def test_read_timeout_is_retried(app_context, mock):
+    mock.stall_next(seconds=1.0)
+    stats = sync(mock, timeout=0.3)
+
+    assert stats['fetched'] == 25
+    assert Ticket.query.count() == 25
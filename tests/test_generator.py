@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from benchmarks.generator import TicketGenerator, seed_database
+from src.models.user import db
+from src.models.ticket import Ticket, TicketTag, Outage, Customer
+from src.routes.data_extraction import import_tickets
+from tests.conftest import clear_database
+
+END = datetime(2025, 6, 30)
+OPTIONS = {'seed': 3, 'end': END, 'outage_rate': 0.1}
+
+
+def stored_rows():
+    """Tickets, tags, outages and customers keyed by what survives a reimport"""
+    tickets = Ticket.__table__
+    ticket_columns = [column for column in tickets.c if column.name != 'id']
+    customer_names = dict(db.session.execute(db.select(Customer.id, Customer.name)).all())
+    return {
+        'tickets': {
+            row.external_id: {**row._asdict(), 'customer_id': customer_names[row.customer_id]}
+            for row in db.session.execute(db.select(*ticket_columns))
+        },
+        'tags': sorted(db.session.execute(
+            db.select(Ticket.external_id, TicketTag.tag).join(TicketTag, TicketTag.ticket_id == Ticket.id)
+        ).all()),
+        'outages': sorted(
+            tuple(row) for row in db.session.execute(db.select(*[column for column in Outage.__table__.c if column.name != 'id']))
+        ),
+        'customers': sorted(
+            tuple(row) for row in db.session.execute(db.select(*[
+                column for column in Customer.__table__.c if column.name not in ('id', 'created_at', 'updated_at')
+            ]))
+        )
+    }
+
+
+def test_seed_database_stores_what_an_import_stores(app_context):
+    seed_database(400, chunk_size=150, **OPTIONS)
+    seeded = stored_rows()
+    clear_database()
+
+    import_tickets(list(TicketGenerator(400, **OPTIONS)))
+    imported = stored_rows()
+
+    assert len(seeded['tickets']) == 400
+    assert seeded['tags'] and seeded['outages']
+    for part in ('tickets', 'tags', 'outages', 'customers'):
+        assert seeded[part] == imported[part], part
@@ -0,0 +1,62 @@
+"""Hour-of-week heatmap: UTC counters shifted into local time, and parameter validation."""
+from datetime import datetime
+
+import pytest
+
+from src.main import app
+from src.models.ticket import Ticket
+from src.routes.data_extraction import import_tickets
+from tests.conftest import ticket_record
+
+MONDAY = datetime(2025, 3, 3)
+WINDOW = {'start_date': '2025-02-24T00:00:00', 'end_date': '2025-03-16T00:00:00'}
+
+
+@pytest.fixture
+def client(app_context):
+    import_tickets([
+        ticket_record(1, MONDAY.replace(hour=1, minute=30)),           # Monday 01:xx UTC
+        ticket_record(2, datetime(2025, 3, 9, 23, 10)),                # Sunday 23:xx UTC
+        ticket_record(3, MONDAY.replace(hour=12), priority=4),         # Monday 12:xx UTC
+    ])
+    return app.test_client()
+
+
+def cells(grid):
+    """{(weekday, hour): count} of the non-empty cells"""
+    return {(day, hour): count for day, row in enumerate(grid) for hour, count in enumerate(row) if count}
+
+
+@pytest.mark.parametrize('offset,expected', [
+    (0, {(0, 1): 1, (6, 23): 1, (0, 12): 1}),
+    (3, {(0, 4): 1, (0, 2): 1, (0, 15): 1}),     # Sunday 23:xx UTC is Monday 02:xx at UTC+3
+    (-2, {(6, 23): 1, (6, 21): 1, (0, 10): 1}),  # Monday 01:xx UTC is Sunday 23:xx at UTC-2
+    (14, {(0, 15): 1, (0, 13): 1, (1, 2): 1}),
+    (-12, {(6, 13): 1, (6, 11): 1, (0, 0): 1}),
+])
+def test_offset_shifts_tickets_into_local_hours(client, offset, expected):
+    body = client.get('/api/dashboard/heatmap', query_string={**WINDOW, 'utc_offset': offset}).get_json()
+
+    assert cells(body['tickets']) == expected
+    assert body['filters']['utc_offset'] == offset
+
+
+def test_breaches_follow_their_tickets(client):
+    body = client.get('/api/dashboard/heatmap', query_string={**WINDOW, 'utc_offset': 5}).get_json()
+
+    assert sum(map(sum, body['sla_breaches'])) == Ticket.query.filter(Ticket.sla_breach == True).count()
+    assert set(cells(body['sla_breaches'])) <= set(cells(body['tickets']))
+
+
+def test_priority_filter(client):
+    body = client.get('/api/dashboard/heatmap', query_string={**WINDOW, 'priority': 'Critical'}).get_json()
+
+    assert cells(body['tickets']) == {(0, 12): 1}
+
+
+@pytest.mark.parametrize('offset', ['x', '1.5', '15', '-13', ''])
+def test_invalid_offset_is_a_client_error(client, offset):
+    response = client.get('/api/dashboard/heatmap', query_string={'utc_offset': offset})
+
+    assert response.status_code == 400
+    assert 'utc_offset' in response.get_json()['error']
@@ -0,0 +1,114 @@
+"""Import queue: one active job per source, one writer at a time."""
+import json
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.state import ImportJob
+from src.services.import_queue import MAX_ATTEMPTS, ImportQueue, WriterLock
+
+
+@pytest.fixture
+def queue(app_context, tmp_path):
+    queue = ImportQueue()
+    queue.lock_path = str(tmp_path / 'import.lock')
+    queue.calls = []
+
+    def handler(payloads):
+        queue.calls.append(payloads)
+        if any(payload.get('fail') for payload in payloads):
+            raise RuntimeError('bad file')
+        return {'imported': len(payloads)}
+
+    queue.register('file', handler, coalesce=True)
+    queue.register('sync', handler)
+    return queue
+
+
+def test_writer_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / 'import.lock')
+    writer, other = WriterLock(path), WriterLock(path)
+    assert writer.acquire()
+    assert not other.acquire()
+    writer.release()
+    assert other.acquire()
+    other.release()
+
+
+def test_kick_starts_no_writer_while_the_lock_is_held(queue):
+    writer = WriterLock(queue.lock_path)
+    assert writer.acquire()
+    try:
+        assert queue.kick() is False
+    finally:
+        writer.release()
+
+
+def test_requests_for_the_same_source_share_one_job(queue):
+    first = queue.submit('file', 'file:abc', {'path': 'a.json'})
+    again = queue.submit('file', 'file:abc', {'path': 'a.json'})
+    other = queue.submit('file', 'file:def', {'path': 'b.json'})
+
+    assert again.id == first.id and again.requests == 2
+    assert other.id != first.id and other.requests == 1
+    assert ImportJob.query.count() == 2
+
+    # The partial unique index guards against two requests racing past the lookup
+    db.session.add(ImportJob(source='file', source_key='file:abc'))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+    # Once the job has finished, the same source is queued afresh
+    ImportJob.query.filter_by(id=first.id).update({'status': 'succeeded'})
+    db.session.commit()
+    assert queue.submit('file', 'file:abc').id not in (first.id, other.id)
+
+
+def test_unknown_source_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit('ftp', 'ftp:1')
+
+
+def test_drain_coalesces_file_jobs_and_runs_others_one_by_one(queue):
+    for name in ('a', 'b', 'c'):
+        queue.submit('file', f'file:{name}', {'path': name})
+    queue.submit('sync', 'sync:1', {'since': 1})
+    queue.submit('sync', 'sync:2', {'since': 2})
+
+    lock = WriterLock(queue.lock_path)
+    assert lock.acquire()
+    queue.drain(lock)
+
+    assert queue.calls == [
+        [{'path': 'a'}, {'path': 'b'}, {'path': 'c'}],
+        [{'since': 1}],
+        [{'since': 2}]
+    ]
+    jobs = ImportJob.query.order_by(ImportJob.id).all()
+    assert {job.status for job in jobs} == {'succeeded'}
+    assert json.loads(jobs[0].result) == {'imported': 3}
+    # The lock was released for the next writer
+    next_writer = WriterLock(queue.lock_path)
+    assert next_writer.acquire()
+    next_writer.release()
+
+
+def test_drain_records_failures_and_requeues_interrupted_jobs(queue):
+    failing = queue.submit('sync', 'sync:bad', {'fail': True}).id
+    interrupted = queue.submit('sync', 'sync:again', {'since': 3}).id
+    exhausted = queue.submit('sync', 'sync:stuck', {'since': 4}).id
+    ImportJob.query.filter_by(id=interrupted).update({'status': 'running', 'attempts': 1})
+    ImportJob.query.filter_by(id=exhausted).update({'status': 'running', 'attempts': MAX_ATTEMPTS})
+    db.session.commit()
+
+    lock = WriterLock(queue.lock_path)
+    assert lock.acquire()
+    queue.drain(lock)
+
+    status = {job.id: (job.status, job.attempts, job.error) for job in ImportJob.query}
+    assert status[failing] == ('failed', 1, 'bad file')
+    assert status[interrupted] == ('succeeded', 2, None)
+    assert status[exhausted] == ('failed', MAX_ATTEMPTS, f'Interrupted {MAX_ATTEMPTS} times')
+    assert queue.calls == [[{'fail': True}], [{'since': 3}]]
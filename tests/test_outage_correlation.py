@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timedelta
+
+from src.models.user import db
+from src.models.ticket import Outage, OutageTicket, Ticket
+from src.routes.data_extraction import import_tickets
+from src.services.outage_correlation import DEFAULT_OUTAGE_DURATION, GRACE_PERIOD, impact_window, sweep
+from tests.conftest import ticket_record as record
+
+START = datetime(2025, 5, 6, 10, 0)
+
+
+def test_impact_window_adds_the_grace_period():
+    end = START + timedelta(minutes=40)
+    assert impact_window(START, end) == (START, end + GRACE_PERIOD)
+    # No end yet: assume the default duration
+    assert impact_window(START, None) == (START, START + DEFAULT_OUTAGE_DURATION + GRACE_PERIOD)
+    # An end recorded before the start never shrinks the window below the start
+    assert impact_window(START, START - timedelta(hours=1)) == (START, START + GRACE_PERIOD)
+
+
+def test_sweep_matches_a_pairwise_scan():
+    rnd = random.Random(3)
+    windows = []
+    for outage_id in range(60):
+        start = rnd.uniform(0, 1000)
+        windows.append((start, start + rnd.uniform(0, 50), outage_id))
+    windows.sort()
+    tickets = sorted((rnd.uniform(-10, 1060), ticket_id) for ticket_id in range(500))
+
+    found = sorted((outage_id, ticket[1]) for outage_id, ticket in sweep(windows, tickets))
+    expected = sorted(
+        (outage_id, ticket_id)
+        for start, end, outage_id in windows
+        for created_at, ticket_id in tickets
+        if start <= created_at <= end
+    )
+    assert found == expected
+
+
+def linked(outage):
+    return sorted(db.session.execute(
+        db.select(Ticket.external_id).join(OutageTicket, OutageTicket.ticket_id == Ticket.id)
+        .where(OutageTicket.outage_id == outage.id)
+    ).scalars())
+
+
+def test_import_attributes_tickets_inside_the_window(app_context):
+    minutes = lambda value: START + timedelta(minutes=value)
+    import_tickets([
+        record(1, minutes(0), subject='Triggered: SMS gateway down', requester_id=1),
+        record(2, minutes(-5)),
+        record(3, minutes(30)),
+        record(4, minutes(170), subject='SMS delivery failed', requester_id=101),
+        # Past the default two hours plus the grace hour
+        record(5, minutes(190)),
+        # Another product line
+        record(6, minutes(30), subject='Biddex | Voice call quality')
+    ])
+
+    outage = Outage.query.one()
+    assert (outage.product_line, outage.end_time) == ('SMS', None)
+    assert linked(outage) == ['3', '4']
+    assert (outage.affected_tickets, outage.affected_customers) == (2, 2)
+
+    # A later import of a ticket inside the window recomputes the outage
+    import_tickets([record(7, minutes(60))])
+    db.session.refresh(outage)
+    assert linked(outage) == ['3', '4', '7']
+    assert outage.affected_tickets == 3
+
+    # A recorded end narrows the window of a new outage to end + grace
+    import_tickets([
+        record(8, minutes(600), subject='Recovered: SMS gateway down', requester_id=1),
+        record(9, minutes(600 + 50)),
+        record(10, minutes(600 + 70))
+    ])
+    recovered = Outage.query.filter_by(ticket_id=8).one()
+    assert recovered.end_time == minutes(600)
+    assert linked(recovered) == ['9']
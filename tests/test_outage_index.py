@@ -0,0 +1,83 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.ticket import Outage
+from src.services.outage_index import IntervalSet, OutageIndex
+
+
+def random_intervals(rnd, count):
+    intervals = []
+    for outage_id in range(1, count + 1):
+        start = rnd.uniform(0, 1000)
+        end = None if rnd.random() < 0.1 else start + rnd.uniform(0, 80)
+        intervals.append((start, end, outage_id))
+    return intervals
+
+
+@pytest.mark.parametrize('count', [0, 1, 7, 200])
+def test_overlapping_matches_a_linear_scan(count):
+    rnd = random.Random(count)
+    intervals = random_intervals(rnd, count)
+    interval_set = IntervalSet(intervals)
+
+    for _ in range(300):
+        start = rnd.uniform(-50, 1050)
+        end = start + rnd.choice([0, rnd.uniform(0, 200)])
+        found = [interval_set.ids[i] for i in interval_set.overlapping(start, end)]
+        expected = [
+            outage_id for interval_start, interval_end, outage_id in sorted(intervals, key=lambda item: item[0])
+            if interval_start <= end and (interval_end is None or interval_end >= start)
+        ]
+        assert found == expected
+
+
+def test_clipped_seconds_matches_a_linear_scan():
+    rnd = random.Random(5)
+    intervals = random_intervals(rnd, 150)
+    interval_set = IntervalSet(intervals)
+
+    for _ in range(300):
+        start = rnd.uniform(-50, 1050)
+        end = start + rnd.uniform(-10, 300)
+        expected = sum(
+            max(0.0, min(end, interval_end if interval_end is not None else end) - max(start, interval_start))
+            for interval_start, interval_end, _ in intervals
+        ) if end > start else 0.0
+        assert interval_set.clipped_seconds(start, end) == pytest.approx(expected, abs=1e-6)
+
+
+def test_refresh_indexes_new_outages_per_product(app_context):
+    base = datetime(2025, 3, 1)
+    outage = lambda ticket_id, product, start, minutes: Outage(
+        ticket_id=ticket_id, product_line=product, service_type=product, severity='High',
+        start_time=base + timedelta(minutes=start),
+        end_time=base + timedelta(minutes=start + minutes) if minutes is not None else None
+    )
+    db.session.add_all([outage(1, 'SMS', 0, 30), outage(2, 'OCC', 20, 60), outage(3, 'SMS', 120, 15)])
+    db.session.commit()
+
+    index = OutageIndex()
+    assert index.refresh() == 3
+    assert index.refresh() == 0
+
+    ids = lambda outages: [row.id for row in outages]
+    sms_first, occ, sms_second = Outage.query.order_by(Outage.ticket_id).all()
+    window = (base + timedelta(minutes=25), base + timedelta(minutes=125))
+    assert index.overlapping(*window) == ids([sms_first, occ, sms_second])
+    assert index.overlapping(*window, product_line='SMS') == ids([sms_first, sms_second])
+    assert index.overlapping(*window, product_line='API') == []
+    # 5 + 5 minutes of SMS, plus 55 of OCC
+    assert index.downtime_minutes(*window, product_line='SMS') == pytest.approx(10)
+    assert index.downtime_minutes(*window) == pytest.approx(65)
+
+    # Only the outage added since is loaded; an ongoing one runs to the window end
+    db.session.add(outage(4, 'OCC', 200, None))
+    db.session.commit()
+    assert index.refresh() == 1
+    later = (base + timedelta(minutes=190), base + timedelta(minutes=260))
+    ongoing = Outage.query.filter_by(ticket_id=4).one()
+    assert index.overlapping(*later) == [ongoing.id]
+    assert index.downtime_minutes(*later, product_line='OCC') == pytest.approx(60)
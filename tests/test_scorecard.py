@@ -0,0 +1,122 @@
+"""Scorecard ranking and paging, in the SQL path and the heap path (sort=outages)."""
+from collections import defaultdict
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.generator import default_end, seed_database
+from src.main import app
+from src.models.user import db
+from src.models.ticket import Customer, OutageTicket, Ticket
+from src.services.scorecard import OPEN_STATUSES
+from tests.conftest import clear_database
+
+END = default_end()
+START = END - timedelta(days=60)
+WINDOW = {'start_date': START.isoformat(), 'end_date': END.isoformat()}
+
+
+@pytest.fixture(scope='module')
+def client():
+    with app.app_context():
+        seed_database(2500, seed=21, outage_rate=0.08)
+        try:
+            yield app.test_client()
+        finally:
+            clear_database()
+
+
+def expected_cards():
+    """Per-customer counts over the window, computed ticket by ticket"""
+    cards = {}
+    outages = defaultdict(set)
+    tickets = Ticket.query.filter(Ticket.created_at >= START, Ticket.created_at <= END)
+    links = defaultdict(set)
+    for ticket_id, outage_id in db.session.query(OutageTicket.ticket_id, OutageTicket.outage_id):
+        links[ticket_id].add(outage_id)
+    for ticket in tickets:
+        customer = db.session.get(Customer, ticket.customer_id)
+        card = cards.setdefault(customer.id, {'customer_id': customer.id, 'name': customer.name,
+                                              'total_tickets': 0, 'sla_breaches': 0, 'open_tickets': 0})
+        card['total_tickets'] += 1
+        card['sla_breaches'] += bool(ticket.sla_breach)
+        card['open_tickets'] += ticket.status in OPEN_STATUSES
+        outages[customer.id] |= links[ticket.id]
+    for customer_id, card in cards.items():
+        card['outages'] = len(outages[customer_id])
+    return list(cards.values())
+
+
+SORT_KEYS = {
+    'breaches': lambda card: card['sla_breaches'],
+    'breach_rate': lambda card: card['sla_breaches'] / card['total_tickets'],
+    'tickets': lambda card: card['total_tickets'],
+    'open': lambda card: card['open_tickets'],
+    'outages': lambda card: card['outages'],
+    'name': lambda card: (card['name'] or '').lower(),
+}
+
+
+def ranked(cards, sort, descending):
+    """Expected order: by the sort value, ties to the lower customer id"""
+    by_id = sorted(cards, key=lambda card: card['customer_id'])
+    return [card['customer_id'] for card in sorted(by_id, key=SORT_KEYS[sort], reverse=descending)]
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+@pytest.mark.parametrize('sort', list(SORT_KEYS))
+def test_pages_follow_one_ranking(client, sort, order):
+    cards = expected_cards()
+    assert len(cards) > 40
+    assert any(card['outages'] for card in cards)
+
+    seen = []
+    page = 1
+    while True:
+        response = client.get('/api/dashboard/customer-scorecard', query_string={
+            **WINDOW, 'sort': sort, 'order': order, 'page': page, 'per_page': 7
+        })
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        assert body['pagination']['total'] == len(cards)
+        seen.extend(card['customer_id'] for card in body['customers'])
+        if not body['pagination']['has_next']:
+            break
+        page += 1
+
+    assert page == body['pagination']['pages'] == -(-len(cards) // 7)
+    assert seen == ranked(cards, sort, order == 'desc')
+
+
+@pytest.mark.parametrize('sort', ['breaches', 'outages'])
+def test_cards_carry_the_counts(client, sort):
+    expected = {card['customer_id']: card for card in expected_cards()}
+    response = client.get('/api/dashboard/customer-scorecard', query_string={**WINDOW, 'sort': sort, 'per_page': 10})
+    for card in response.get_json()['customers']:
+        reference = expected[card['customer_id']]
+        assert card['total_tickets'] == reference['total_tickets']
+        assert card['sla_breaches'] == reference['sla_breaches']
+        assert card['open_tickets'] == reference['open_tickets']
+        assert card['outages'] == reference['outages']
+        assert set(card['response_time_percentiles_hours']) == {'p50', 'p90', 'p95', 'p99'}
+
+
+@pytest.mark.parametrize('sort', ['breaches', 'outages'])
+def test_page_past_the_end_is_empty(client, sort):
+    response = client.get('/api/dashboard/customer-scorecard', query_string={**WINDOW, 'sort': sort, 'page': 1000})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['customers'] == [] and not body['pagination']['has_next']
+
+
+@pytest.mark.parametrize('params', [
+    {'sort': 'latency'},
+    {'page': 0},
+    {'per_page': -5},
+    {'page': 'two'},
+    {'percentiles': '50,101'},
+])
+def test_bad_parameters_are_rejected(client, params):
+    response = client.get('/api/dashboard/customer-scorecard', query_string={**WINDOW, **params})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
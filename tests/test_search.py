@@ -0,0 +1,52 @@
+"""Full-text search stays in step with imports, archive moves and restores."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.main import app
+from src.routes.data_extraction import import_tickets
+from src.services.search import fts5_query
+from src.services.ticket_archive import month_start, ticket_archive
+from tests.conftest import ticket_record as record
+
+
+@pytest.fixture
+def archiving(app_context, monkeypatch):
+    monkeypatch.setattr(ticket_archive, 'after_days', 60)
+
+
+def search(text, **filters):
+    response = app.test_client().get('/api/dashboard/tickets', query_string={'q': text, **filters})
+    assert response.status_code == 200, response.get_json()
+    return [ticket['external_id'] for ticket in response.get_json()['tickets']]
+
+
+def test_fts5_query_quotes_chunks_and_prefixes_the_last():
+    assert fts5_query('AD-BIDDEX sms') == '"AD-BIDDEX" "sms"*'
+    assert fts5_query('say "hi"') == '"say" """hi"""*'
+    assert fts5_query('  -- ') is None
+
+
+def test_search_follows_tickets_into_and_out_of_the_archive(archiving):
+    now = datetime.utcnow()
+    old = now - timedelta(days=200)
+    import_tickets([
+        record(1, now - timedelta(days=1), subject='Biddex | Voice trunk flapping'),
+        record(2, old, status=5, subject='Biddex | SMS throttled on route', description='Carrier throttling'),
+        record(3, old, status=2, subject='Biddex | SMS throttled again')
+    ])
+    assert [month for month, _ in ticket_archive.partitions()] == [month_start(old)]
+
+    # The archived ticket is still found, by subject, description and prefix
+    since = (old - timedelta(days=1)).isoformat()
+    assert sorted(search('throttled', start_date=since)) == ['2', '3']
+    assert search('carrier thrott', start_date=since) == ['2']
+    assert search('flapping') == ['1']
+    # Windows after the archived month don't reach it
+    assert search('carrier', start_date=(now - timedelta(days=7)).isoformat()) == []
+
+    # Restored with a new subject: found once, under the new words only
+    import_tickets([record(2, old, status=2, subject='Biddex | SMS route blocked', updated_at=now)])
+    assert search('blocked', start_date=since) == ['2']
+    assert search('throttled', start_date=since) == ['3']
+    assert search('carrier', start_date=since) == []
@@ -0,0 +1,69 @@
+import math
+import random
+
+import pytest
+
+from src.services.sketches import DDSketch
+
+
+def lognormal_hours(seed, count):
+    rnd = random.Random(seed)
+    return [rnd.lognormvariate(1, 1.5) for _ in range(count)]
+
+
+def exact_quantile(values, q):
+    """The value the sketch approximates: the one at rank floor(q * (n - 1))"""
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize('alpha', [0.01, 0.05])
+def test_quantiles_stay_within_the_relative_error_bound(alpha):
+    values = lognormal_hours(1, 20000)
+    sketch = DDSketch(alpha=alpha)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999, 1):
+        exact = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= alpha * exact * (1 + 1e-9)
+
+
+def test_merged_sketches_match_one_sketch_over_all_values():
+    parts = [lognormal_hours(seed, 3000) for seed in range(4)]
+    parts[0].extend([0.0] * 50)
+
+    whole = DDSketch()
+    merged = DDSketch()
+    for part in parts:
+        sketch = DDSketch()
+        for value in part:
+            sketch.add(value)
+            whole.add(value)
+        merged.merge(sketch)
+
+    assert merged.count == whole.count == 12050
+    assert merged.zero_count == 50
+    assert dict(merged.bins) == dict(whole.bins)
+    everything = [value for part in parts for value in part]
+    for q in (0, 0.5, 0.9, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+        exact = exact_quantile(everything, q)
+        assert abs(merged.quantile(q) - exact) <= 0.01 * exact * (1 + 1e-9)
+
+
+def test_json_round_trip_keeps_the_distribution():
+    sketch = DDSketch()
+    for value in lognormal_hours(7, 500) + [0.0, -1.0]:
+        sketch.add(value)
+
+    restored = DDSketch.from_json(sketch.to_json())
+    assert restored.count == sketch.count
+    assert restored.zero_count == 2
+    assert [restored.quantile(q) for q in (0, 0.5, 0.99)] == [sketch.quantile(q) for q in (0, 0.5, 0.99)]
+
+
+def test_empty_and_mismatched_sketches():
+    assert DDSketch().quantile(0.5) is None
+    with pytest.raises(ValueError):
+        DDSketch(alpha=0.01).merge(DDSketch(alpha=0.02))
@@ -0,0 +1,77 @@
+"""Archive routing: closed tickets move to monthly partitions and come back when they change."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.ticket import Ticket, TicketTag
+from src.routes.data_extraction import import_tickets
+from src.services.ticket_archive import partition_name, month_start, ticket_archive
+from tests.conftest import ticket_record as record
+
+
+@pytest.fixture
+def archiving(app_context, monkeypatch):
+    monkeypatch.setattr(ticket_archive, 'after_days', 60)
+
+
+def archived_ids(table_month):
+    partition = ticket_archive._table(table_month)
+    return dict(db.session.execute(db.select(partition.c.external_id, partition.c.id)).all())
+
+
+def tags_of(ticket_id):
+    return sorted(db.session.execute(db.select(TicketTag.tag).where(TicketTag.ticket_id == ticket_id)).scalars())
+
+
+def test_closed_old_tickets_move_to_their_month(archiving):
+    now = datetime.utcnow()
+    old = now - timedelta(days=200)
+    result = import_tickets([record(1, now - timedelta(days=2)), record(2, old, status=5), record(3, old, status=2)])
+
+    assert result['archived_tickets'] == 1
+    assert sorted(db.session.execute(db.select(Ticket.external_id)).scalars()) == ['1', '3']
+    assert list(archived_ids(month_start(old))) == ['2']
+    assert [month for month, _ in ticket_archive.partitions()] == [month_start(old)]
+    assert partition_name(month_start(old)) in {table.name for _, table in ticket_archive.partitions()}
+
+    # Windows reaching the archived month read it; recent windows only read the hot table
+    tickets = ticket_archive.source(old - timedelta(days=1), now)
+    assert db.session.query(tickets.external_id).filter(tickets.created_at >= old - timedelta(days=1)).count() == 3
+    assert ticket_archive.source(now - timedelta(days=7), now) is Ticket
+
+
+def test_new_ticket_never_reuses_an_archived_id(archiving):
+    now = datetime.utcnow()
+    old = now - timedelta(days=200)
+    # The old closed ticket is imported last, so it holds the highest id when archived
+    import_tickets([record(1, now - timedelta(days=2)), record(2, old, status=5, tags=['x2'])])
+    archived_id = archived_ids(month_start(old))['2']
+
+    import_tickets([record(3, now - timedelta(days=1))])
+    new_ticket = Ticket.query.filter_by(external_id='3').one()
+    assert new_ticket.id > archived_id
+    assert tags_of(new_ticket.id) == []
+
+    # The next import heals interrupted moves; the archived ticket must survive it
+    import_tickets([record(4, now)])
+    assert archived_ids(month_start(old)) == {'2': archived_id}
+    assert tags_of(archived_id) == ['x2']
+
+
+def test_changed_archived_ticket_is_restored_with_its_id_and_tags(archiving):
+    now = datetime.utcnow()
+    old = now - timedelta(days=200)
+    import_tickets([record(1, now - timedelta(days=2)), record(2, old, status=5, tags=['x2'])])
+    archived_id = archived_ids(month_start(old))['2']
+    import_tickets([record(3, now - timedelta(days=1))])
+
+    # Reopened: the ticket moves back to the hot table and stays there while open
+    result = import_tickets([record(2, old, status=2, tags=['x2'], updated_at=now)])
+
+    assert result['updated_tickets'] == 1 and result['imported_tickets'] == 0
+    restored = Ticket.query.filter_by(external_id='2').one()
+    assert restored.id == archived_id
+    assert restored.status == 'Open'
+    assert tags_of(archived_id) == ['x2']
+    assert archived_ids(month_start(old)) == {}
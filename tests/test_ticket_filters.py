@@ -0,0 +1,62 @@
+"""Tag and custom field filters on /tickets, over the hot table and the archive."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.main import app
+from src.routes.data_extraction import import_tickets
+from src.services.ticket_archive import ticket_archive
+from tests.conftest import ticket_record
+
+
+def record(ticket_id, created_at, tier=None, **fields):
+    ticket = ticket_record(ticket_id, created_at, **fields)
+    if tier:
+        ticket['custom_fields']['cf_customer_tier'] = tier
+    return ticket
+
+
+@pytest.fixture
+def tickets(app_context, monkeypatch):
+    monkeypatch.setattr(ticket_archive, 'after_days', 60)
+    now = datetime.utcnow()
+    import_tickets([
+        record(1, now - timedelta(days=1), tags=['sms', 'vip'], tier='Gold'),
+        record(2, now - timedelta(days=2), tags=['sms'], tier='Silver'),
+        record(3, now - timedelta(days=3), tags=['voice', 'vip']),
+        record(4, now - timedelta(days=200), status=5, tags=['sms', 'vip', 'vip', ''], tier='Gold')
+    ])
+    assert len(ticket_archive.partitions()) == 1
+    return now
+
+
+def external_ids(**filters):
+    response = app.test_client().get('/api/dashboard/tickets', query_string=filters)
+    assert response.status_code == 200, response.get_json()
+    return [ticket['external_id'] for ticket in response.get_json()['tickets']]
+
+
+def test_repeated_tags_must_all_match(tickets):
+    recent = (tickets - timedelta(days=30)).isoformat()
+    assert external_ids(tag='sms', start_date=recent) == ['1', '2']
+    assert external_ids(tag=['sms', 'vip'], start_date=recent) == ['1']
+    # Without dates the archived months are searched too
+    assert external_ids(tag=['sms', 'vip']) == ['1', '4']
+    assert external_ids(tag=['sms', 'voice']) == []
+    assert external_ids(tag='nope') == []
+
+
+def test_tags_are_stored_once_and_returned(tickets):
+    response = app.test_client().get('/api/dashboard/tickets', query_string={'tag': 'vip'})
+    tags = {ticket['external_id']: sorted(ticket['tags']) for ticket in response.get_json()['tickets']}
+    assert tags == {'1': ['sms', 'vip'], '3': ['vip', 'voice'], '4': ['sms', 'vip']}
+
+
+def test_customer_tier_filter_and_custom_fields(tickets):
+    assert external_ids(customer_tier='Gold', start_date=(tickets - timedelta(days=30)).isoformat()) == ['1']
+    assert external_ids(customer_tier='Gold', tag='sms') == ['1', '4']
+    assert external_ids(customer_tier='Bronze') == []
+
+    response = app.test_client().get('/api/dashboard/tickets', query_string={'customer_tier': 'Silver'})
+    (ticket,) = response.get_json()['tickets']
+    assert ticket['custom_fields'] == {'cf_customer_type': 'Wholesale', 'cf_customer_tier': 'Silver'}
@@ -0,0 +1,128 @@
+"""The columnar snapshot and the SQL fallback must return the same dashboards."""
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.generator import default_end, seed_database
+from src.main import app
+from src.models.user import db
+from src.models.state import bump_data_version, get_data_version
+from src.services.ticket_snapshot import SnapshotManager, TicketSnapshot, ticket_snapshots
+from tests.conftest import clear_database
+
+END = default_end()
+WINDOWS = [
+    (END - timedelta(days=30), END),
+    (END - timedelta(days=120), END - timedelta(days=45, hours=7)),
+]
+ENDPOINTS = [
+    ('sla-metrics', {}),
+    ('sla-metrics', {'customer_type': 'enterprise', 'product_line': 'SMS'}),
+    ('customer-segments', {}),
+    ('trends', {}),
+    ('trends', {'customer_type': 'wholesale'}),
+    ('executive-summary', {}),
+]
+
+
+@pytest.fixture(scope='module')
+def client():
+    with app.app_context():
+        seed_database(3000, seed=11)
+        try:
+            yield app.test_client()
+        finally:
+            app.config['ANALYTICS_SNAPSHOT'] = False
+            clear_database()
+
+
+def fetch(client, endpoint, params, snapshot):
+    app.config['ANALYTICS_SNAPSHOT'] = snapshot
+    if snapshot:
+        ticket_snapshots.load()
+        assert ticket_snapshots.current() is not None
+    response = client.get(f'/api/dashboard/{endpoint}', query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def assert_same(expected, actual, path='$'):
+    """Equal structures, floats to within the 2-decimal rounding of the responses"""
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), path
+        for key in expected:
+            assert_same(expected[key], actual[key], f'{path}.{key}')
+    elif isinstance(expected, list):
+        assert len(expected) == len(actual), path
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            assert_same(left, right, f'{path}[{index}]')
+    elif isinstance(expected, float) or isinstance(actual, float):
+        assert actual == pytest.approx(expected, abs=0.011), path
+    else:
+        assert expected == actual, path
+
+
+@pytest.mark.parametrize('endpoint,filters', ENDPOINTS)
+@pytest.mark.parametrize('window', WINDOWS, ids=['last-30-days', 'older-window'])
+def test_snapshot_matches_sql(client, endpoint, filters, window):
+    params = {'start_date': window[0].isoformat(), 'end_date': window[1].isoformat(), **filters}
+    from_sql = fetch(client, endpoint, params, snapshot=False)
+    from_snapshot = fetch(client, endpoint, params, snapshot=True)
+
+    assert_same(from_sql, from_snapshot)
+
+
+def test_segments_report_real_resolution_hours(client):
+    params = {'start_date': WINDOWS[0][0].isoformat(), 'end_date': WINDOWS[0][1].isoformat()}
+    segments = fetch(client, 'customer-segments', params, snapshot=False)['segments']
+
+    assert segments
+    # Synthetic tickets resolve within days, never in negative or absurd times
+    assert all(0 < segment['avg_resolution_hours'] < 24 * 30 for segment in segments)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.05)
+
+
+def test_new_version_builds_in_background_while_the_old_one_serves(client, monkeypatch):
+    app.config['ANALYTICS_SNAPSHOT'] = True
+    ticket_snapshots.load()
+    old = ticket_snapshots.current()
+
+    started, release = threading.Event(), threading.Event()
+    build = TicketSnapshot.build
+
+    def slow_build(*args, **kwargs):
+        started.set()
+        release.wait(10)
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(TicketSnapshot, 'build', slow_build)
+    bump_data_version()
+    db.session.commit()
+
+    assert ticket_snapshots.current() is old
+    assert started.wait(10)
+    assert ticket_snapshots.current() is old
+    release.set()
+    wait_for(lambda: ticket_snapshots.current().version == get_data_version())
+
+
+def test_published_snapshot_is_mapped_without_building(client, monkeypatch):
+    app.config['ANALYTICS_SNAPSHOT'] = True
+    bump_data_version()
+    db.session.commit()
+    assert ticket_snapshots.publish()
+
+    def no_build(*args, **kwargs):
+        raise AssertionError('worker rebuilt a published snapshot')
+
+    monkeypatch.setattr(TicketSnapshot, 'build', no_build)
+    worker = SnapshotManager()
+    assert worker.current().version == get_data_version()